@@ -0,0 +1,168 @@
+import re
+from typing import Any, Iterable
+
+_ITEM_RE = re.compile(
+    r"^(?P<func>count|sum|min|max|avg)\s*\(\s*(?P<column>\*|\w+)\s*\)$",
+    re.IGNORECASE,
+)
+_COLUMN_RE = re.compile(r"^\w+$")
+
+
+class Aggregate:
+    """
+    Агрегатная функция над столбцом: count, sum, min, max, avg.
+
+    Состояние группы — список [число значений, накопленное значение],
+    обновляется по одной строке методом step.
+    """
+
+    def __init__(self, func: str, column: str):
+        self.func = func
+        self.column = column
+        self.name = f"{func}({column})"
+
+    def start(self) -> list:
+        return [0, None]
+
+    def step(self, state: list, row: dict) -> None:
+        if self.column == "*":
+            state[0] += 1
+            return
+        value = row.get(self.column)
+        if value is None:
+            return
+        state[0] += 1
+        if state[1] is None:
+            state[1] = value
+        elif self.func in ("sum", "avg"):
+            state[1] += value
+        elif self.func == "min":
+            if value < state[1]:
+                state[1] = value
+        elif self.func == "max":
+            if value > state[1]:
+                state[1] = value
+
+    def merge(self, state: list, other: list) -> None:
+        """Добавить к state частичное состояние other той же группы."""
+        count, value = other
+        state[0] += count
+        if value is None:
+            return
+        if state[1] is None:
+            state[1] = value
+        elif self.func in ("sum", "avg"):
+            state[1] += value
+        elif self.func == "min":
+            state[1] = min(state[1], value)
+        elif self.func == "max":
+            state[1] = max(state[1], value)
+
+    def result(self, state: list) -> Any:
+        count, value = state
+        if self.func == "count":
+            return count
+        if self.func == "sum":
+            return value if count else 0
+        if self.func == "avg":
+            return round(value / count, 6) if count else None
+        return value
+
+    def __repr__(self) -> str:
+        return self.name
+
+
+SelectItem = str | Aggregate
+
+
+def parse_select_list(text: str) -> list[SelectItem]:
+    """
+    Разобрать список выборки: 'is_active, count(*), avg(age)' →
+    ['is_active', Aggregate('count', '*'), Aggregate('avg', 'age')].
+    """
+    items: list[SelectItem] = []
+    for part in text.split(","):
+        part = part.strip()
+        match = _ITEM_RE.match(part)
+        if match is not None:
+            func, column = match.group("func").lower(), match.group("column")
+            if column == "*" and func != "count":
+                raise ValueError(f"{func}(*) не поддерживается.")
+            items.append(Aggregate(func, column))
+        elif _COLUMN_RE.match(part):
+            items.append(part)
+        else:
+            raise ValueError(f"Некорректный элемент выборки: {part!r}")
+    return items
+
+
+Groups = dict[tuple, list[list]]
+
+
+def _aggregates(items: list[SelectItem]) -> list[Aggregate]:
+    return [item for item in items if isinstance(item, Aggregate)]
+
+
+def fold(
+    rows: Iterable[dict],
+    items: list[SelectItem],
+    group_by: list[str],
+) -> Groups:
+    """
+    Свернуть rows за один проход с хеш-группировкой: ключ группы —
+    кортеж значений столбцов group_by, значение — состояния агрегатов.
+    Без group_by всегда есть одна группа ().
+    """
+    aggregates = _aggregates(items)
+    groups: Groups = {}
+    if not group_by:
+        groups[()] = [agg.start() for agg in aggregates]
+    for row in rows:
+        key = tuple(row.get(column) for column in group_by)
+        states = groups.get(key)
+        if states is None:
+            states = groups[key] = [agg.start() for agg in aggregates]
+        for agg, state in zip(aggregates, states, strict=True):
+            agg.step(state, row)
+    return groups
+
+
+def merge(parts: list[Groups], items: list[SelectItem]) -> Groups:
+    """Объединить частичные свертки (например, по частям таблицы) по порядку."""
+    aggregates = _aggregates(items)
+    groups: Groups = {}
+    for part in parts:
+        for key, states in part.items():
+            target = groups.get(key)
+            if target is None:
+                groups[key] = states
+                continue
+            for agg, state, other in zip(aggregates, target, states, strict=True):
+                agg.merge(state, other)
+    return groups
+
+
+def finish(
+    groups: Groups,
+    items: list[SelectItem],
+    group_by: list[str],
+) -> list[dict]:
+    """Строки результата в порядке первого появления групп."""
+    aggregates = _aggregates(items)
+    names = [item.name if isinstance(item, Aggregate) else item for item in items]
+    result = []
+    for key, states in groups.items():
+        values = dict(zip(group_by, key, strict=True))
+        for agg, state in zip(aggregates, states, strict=True):
+            values[agg.name] = agg.result(state)
+        result.append({name: values[name] for name in names})
+    return result
+
+
+def aggregate(
+    rows: Iterable[dict],
+    items: list[SelectItem],
+    group_by: list[str],
+) -> list[dict]:
+    """Вычислить агрегаты за один проход по rows (см. fold)."""
+    return finish(fold(rows, items, group_by), items, group_by)
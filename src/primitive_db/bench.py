@@ -0,0 +1,281 @@
+import json
+import os
+import platform
+import random
+import string
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable
+
+from src.primitive_db.constants import BENCH_OPERATIONS, BENCH_SCHEMA, BENCH_SEED
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import Session
+from src.primitive_db.statement import parse_statement
+from src.primitive_db.utils import load_table_data, save_table_data
+
+_REPEATS = 3
+
+
+def parse_schema(text: str) -> dict[str, str]:
+    """'name:str value:int' → {'name': 'str', 'value': 'int'}."""
+    schema = {}
+    for part in text.split():
+        column, _, kind = part.partition(":")
+        if kind not in ("int", "str", "bool"):
+            raise ValueError(f"Некорректный столбец схемы: {part!r}")
+        schema[column] = kind
+    if not schema:
+        raise ValueError("Схема таблицы пуста.")
+    return schema
+
+
+def summarize(samples: list[float], rows: int | None = None) -> dict[str, Any]:
+    """Сводка замеров (в секундах): пропускная способность и перцентили в мс."""
+    ordered = sorted(samples)
+    total = sum(ordered)
+
+    def percentile(p: float) -> float:
+        rank = max(0, min(len(ordered) - 1, round(p / 100 * len(ordered)) - 1))
+        return round(ordered[rank] * 1000, 4)
+
+    summary = {
+        "count": len(ordered),
+        "total_s": round(total, 6),
+        "ops_per_sec": round(len(ordered) / total, 2) if total else None,
+        "p50_ms": percentile(50),
+        "p99_ms": percentile(99),
+        "max_ms": round(ordered[-1] * 1000, 4),
+    }
+    if rows is not None:
+        summary["rows_per_sec"] = round(rows * len(ordered) / total, 2)
+    return summary
+
+
+class Benchmark:
+    """
+    Набор замеров основных операций на синтетических таблицах.
+
+    Для каждого размера создается таблица bench_<N> с заданной схемой,
+    заполняется через import и проверяется командами insert, select
+    (по равенству без индекса и с индексом, по диапазону), update и delete,
+    а также загрузкой и записью таблицы целиком, разбором команд и запуском
+    программы. У сегментированной таблицы нет индексов и загрузки целиком:
+    эти замеры равны None, а диапазон замеряется по зонам (select_range).
+    Все операции выполняются во временном каталоге.
+    """
+
+    def __init__(
+        self,
+        sizes: list[int],
+        schema: dict[str, str],
+        operations: int = BENCH_OPERATIONS,
+        table_format: str = "json",
+        seed: int = BENCH_SEED,
+    ):
+        self.sizes = sizes
+        self.schema = schema
+        self.operations = operations
+        self.table_format = table_format
+        self.seed = seed
+        self.key = next((c for c, t in schema.items() if t == "int"), None)
+        self._random = random.Random(seed)
+        self._session: Session | None = None
+
+    def _value(self, kind: str, rows: int) -> Any:
+        if kind == "int":
+            return self._random.randrange(rows)
+        if kind == "bool":
+            return self._random.random() < 0.5
+        return "".join(self._random.choices(string.ascii_lowercase, k=8))
+
+    def _literal(self, kind: str, rows: int) -> str:
+        value = self._value(kind, rows)
+        if kind == "str":
+            return f'"{value}"'
+        return str(value).lower() if kind == "bool" else str(value)
+
+    def _run(self, command: str) -> float:
+        result = self._session.execute(command)
+        if not result.ok:
+            raise RuntimeError(f"{command}: {result.output.strip()}")
+        return result.elapsed
+
+    def _measure(self, make_command: Callable[[int], str]) -> dict[str, Any]:
+        return summarize([self._run(make_command(i)) for i in range(self.operations)])
+
+    def _timed(self, action: Callable[[], Any], rows: int) -> dict[str, Any]:
+        samples = []
+        for _ in range(_REPEATS):
+            start = time.perf_counter()
+            action()
+            samples.append(time.perf_counter() - start)
+        return summarize(samples, rows)
+
+    def _write_import_file(self, path: str, rows: int) -> None:
+        with open(path, "w", encoding="utf-8") as f:
+            for _ in range(rows):
+                record = [self._value(kind, rows) for kind in self.schema.values()]
+                f.write(json.dumps(record) + "\n")
+
+    def _parse(self, commands: list[str]) -> dict[str, Any]:
+        """Разбор команд insert/update/delete без выполнения."""
+        samples = []
+        for command in commands:
+            start = time.perf_counter()
+            parse_statement(command)
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def _startup(self, script: str) -> dict[str, Any]:
+        """Запуск программы в отдельном процессе со скриптом script."""
+        package_root = os.path.dirname(
+            os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+        )
+        env = dict(os.environ)
+        env["PYTHONPATH"] = os.pathsep.join(
+            filter(None, [package_root, env.get("PYTHONPATH")])
+        )
+        command = [sys.executable, "-m", "src.primitive_db.main", "--script", "-"]
+        samples = []
+        for _ in range(_REPEATS):
+            start = time.perf_counter()
+            subprocess.run(
+                command,
+                input=script,
+                env=env,
+                capture_output=True,
+                text=True,
+                check=True,
+            )
+            samples.append(time.perf_counter() - start)
+        return summarize(samples)
+
+    def _bench_size(self, rows: int) -> dict[str, Any]:
+        table = f"bench_{rows}"
+        columns = " ".join(f"{c}:{t}" for c, t in self.schema.items())
+        self._run(f"create_table {table} {columns}")
+        results: dict[str, Any] = {}
+
+        import_file = f"{table}.jsonl"
+        self._write_import_file(import_file, rows)
+        results["import"] = summarize(
+            [self._run(f"import {table} from {import_file}")], rows
+        )
+        os.remove(import_file)
+        if self.table_format != "json":
+            self._run(f"convert_table {table} {self.table_format}")
+
+        def insert_command(_: int) -> str:
+            values = ", ".join(
+                self._literal(kind, rows) for kind in self.schema.values()
+            )
+            return f"insert into {table} values ({values})"
+
+        results["insert"] = self._measure(insert_command)
+
+        if self.key is not None:
+            key = self.key
+
+            def select_eq(_: int) -> str:
+                return f"select from {table} where {key} = {self._value('int', rows)}"
+
+            def select_range(_: int) -> str:
+                low = self._value("int", rows)
+                return (
+                    f"select from {table} where {key} between {low} and {low + 100}"
+                )
+
+            results["select_eq"] = self._measure(select_eq)
+            if self.table_format == "segmented":
+                results["select_range"] = self._measure(select_range)
+                results["select_eq_index"] = results["select_range_index"] = None
+            else:
+                self._run(f"create_index {table} {key}")
+                self._run(f"create_index {table} {key} sorted")
+                results["select_eq_index"] = self._measure(select_eq)
+                results["select_range_index"] = self._measure(select_range)
+
+        update_column, update_kind = next(iter(self.schema.items()))
+
+        def update_command(_: int) -> str:
+            value = self._literal(update_kind, rows)
+            row_id = self._random.randint(1, rows)
+            return f"update {table} set {update_column} = {value} where ID = {row_id}"
+
+        results["update"] = self._measure(update_command)
+
+        deleted = self._random.sample(range(1, rows + 1), min(rows, self.operations))
+        results["delete"] = self._measure(
+            lambda i: f"delete from {table} where ID = {deleted[i % len(deleted)]}"
+        )
+
+        commands = [
+            make(i)
+            for make in (insert_command, update_command)
+            for i in range(self.operations)
+        ]
+        results["parse"] = self._parse(commands)
+
+        if self.table_format == "segmented":
+            results["save"] = results["load"] = None
+        else:
+            data = load_table_data(table)
+            results["save"] = self._timed(
+                lambda: save_table_data(table, data), len(data)
+            )
+            results["load"] = self._timed(lambda: load_table_data(table), len(data))
+        results["startup"] = self._startup("list_tables\n")
+        if self.key is not None:
+            results["startup_select"] = self._startup(
+                f"select from {table} where {self.key} = 0 limit 1\n"
+            )
+        return {"rows": rows, "operations": results}
+
+    def run(self) -> dict[str, Any]:
+        """Выполнить все замеры и вернуть результаты (готовые для JSON)."""
+        report: dict[str, Any] = {
+            "created": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "format": self.table_format,
+            "schema": self.schema,
+            "operations": self.operations,
+            "seed": self.seed,
+            "sizes": [],
+        }
+        cwd = os.getcwd()
+        set_auto_confirm(True)
+        with tempfile.TemporaryDirectory(prefix="primitive_db_bench_") as workdir:
+            os.chdir(workdir)
+            try:
+                self._session = Session(echo=False)
+                try:
+                    for rows in self.sizes:
+                        report["sizes"].append(self._bench_size(rows))
+                finally:
+                    self._session.close()
+            finally:
+                os.chdir(cwd)
+                set_auto_confirm(False)
+        return report
+
+
+def run_bench(
+    sizes: list[int],
+    schema: str = BENCH_SCHEMA,
+    operations: int = BENCH_OPERATIONS,
+    table_format: str = "json",
+    output: str | None = None,
+) -> None:
+    """Запустить замеры и вывести JSON в stdout или в файл output."""
+    benchmark = Benchmark(sizes, parse_schema(schema), operations, table_format)
+    text = json.dumps(benchmark.run(), ensure_ascii=False, indent=2)
+    if output is None:
+        print(text)
+        return
+    with open(output, "w", encoding="utf-8") as f:
+        f.write(text + "\n")
+    print(f"Результаты сохранены в {output}.")
@@ -0,0 +1,220 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_right
+from typing import Any, Iterator
+
+MAGIC = b"PDBT"
+_HEADER_LEN = struct.Struct("<I")
+_ALIGN = 8
+
+
+def _le(values: array) -> bytes:
+    """Байты массива в порядке little-endian."""
+    if sys.byteorder == "big":
+        values = array(values.typecode, values)
+        values.byteswap()
+    return values.tobytes()
+
+
+def _pad(size: int) -> int:
+    return -size % _ALIGN
+
+
+def find_all(
+    haystack: Any,
+    needle: bytes,
+    width: int,
+    start: int = 0,
+    end: int | None = None,
+) -> list[int]:
+    """
+    Позиции элементов шириной width, равных needle, в haystack[start:end].
+
+    Поиск выполняется методом find (bytes и mmap, на C), совпадения не
+    на границе элемента отбрасываются.
+    """
+    if end is None:
+        end = len(haystack)
+    positions = []
+    found = haystack.find(needle, start, end)
+    while found != -1:
+        if (found - start) % width == 0:
+            positions.append((found - start) // width)
+            found = haystack.find(needle, found + width, end)
+        else:
+            found = haystack.find(needle, found + 1, end)
+    return positions
+
+
+def write_table(path: str, schema: dict[str, str], rows: list[dict]) -> None:
+    """
+    Записать таблицу в бинарном формате.
+
+    После сигнатуры и JSON-заголовка со схемой идут столбцы: int —
+    по 8 байт, bool — по 1 байту, str — таблица смещений (n + 1 по 8 байт)
+    и куча UTF-8 строк. Каждый столбец выровнен на 8 байт.
+    """
+    blocks: list[bytes] = []
+    columns: dict[str, dict] = {}
+    offset = 0
+    for column, type_name in schema.items():
+        if type_name == "int":
+            data = _le(array("q", (r[column] for r in rows)))
+        elif type_name == "bool":
+            data = bytes(1 if r[column] else 0 for r in rows)
+        else:
+            encoded = [r[column].encode("utf-8") for r in rows]
+            offsets = array("q", [0])
+            for item in encoded:
+                offsets.append(offsets[-1] + len(item))
+            data = _le(offsets) + b"".join(encoded)
+        columns[column] = {"type": type_name, "offset": offset, "size": len(data)}
+        blocks.append(data + b"\0" * _pad(len(data)))
+        offset += len(data) + _pad(len(data))
+
+    header = json.dumps(
+        {"rows": len(rows), "schema": schema, "columns": columns},
+        ensure_ascii=False,
+    ).encode("utf-8")
+    prefix = MAGIC + _HEADER_LEN.pack(len(header)) + header
+    with open(path, "wb") as f:
+        f.write(prefix + b"\0" * _pad(len(prefix)))
+        for block in blocks:
+            f.write(block)
+        f.flush()
+        os.fsync(f.fileno())
+
+
+class BinaryTable:
+    """
+    Таблица в бинарном формате, открытая через mmap.
+
+    Строки не разбираются целиком: where вычисляется поиском по области
+    нужного столбца, а значения читаются только для найденных строк.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._file = open(path, "rb")
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:4] != MAGIC:
+            self._mm.close()
+            self._file.close()
+            raise ValueError(f"Файл {path} не является бинарной таблицей.")
+        (header_len,) = _HEADER_LEN.unpack_from(self._mm, 4)
+        header_end = 4 + _HEADER_LEN.size + header_len
+        header = json.loads(self._mm[4 + _HEADER_LEN.size:header_end])
+        self.schema: dict[str, str] = header["schema"]
+        self.length: int = header["rows"]
+        data_start = header_end + _pad(header_end)
+        self._view = memoryview(self._mm)
+        self._columns: dict[str, tuple[str, int, int]] = {}
+        self._ints: dict[str, memoryview] = {}
+        self._offsets: dict[str, memoryview] = {}
+        for column, info in header["columns"].items():
+            start = data_start + info["offset"]
+            end = start + info["size"]
+            self._columns[column] = (info["type"], start, end)
+            if info["type"] == "int":
+                self._ints[column] = self._view[start:end].cast("q")
+            elif info["type"] == "str":
+                table_end = start + (self.length + 1) * 8
+                self._offsets[column] = self._view[start:table_end].cast("q")
+
+    def __len__(self) -> int:
+        return self.length
+
+    def value(self, column: str, pos: int) -> Any:
+        type_name, start, _ = self._columns[column]
+        if type_name == "int":
+            return self._ints[column][pos]
+        if type_name == "bool":
+            return self._mm[start + pos] == 1
+        offsets = self._offsets[column]
+        heap = start + (self.length + 1) * 8
+        return self._mm[heap + offsets[pos]:heap + offsets[pos + 1]].decode("utf-8")
+
+    def row(self, pos: int) -> dict:
+        return {column: self.value(column, pos) for column in self.schema}
+
+    def rows(self, positions: list[int] | None = None) -> Iterator[dict]:
+        if positions is None:
+            positions = range(self.length)
+        for pos in positions:
+            yield self.row(pos)
+
+    def to_rows(self) -> list[dict]:
+        return list(self.rows())
+
+    def _match_column(self, column: str, value: Any) -> list[int]:
+        if column not in self._columns:
+            return []
+        type_name, start, end = self._columns[column]
+        if type_name == "int":
+            if not isinstance(value, int):
+                return []
+            needle = _le(array("q", [value]))
+            return find_all(self._mm, needle, 8, start, start + self.length * 8)
+        if type_name == "bool":
+            if value not in (True, False):
+                return []
+            needle = b"\x01" if value else b"\x00"
+            return find_all(self._mm, needle, 1, start, start + self.length)
+        if not isinstance(value, str):
+            return []
+        offsets = self._offsets[column]
+        if value == "":
+            return [
+                i for i in range(self.length) if offsets[i] == offsets[i + 1]
+            ]
+        heap = start + (self.length + 1) * 8
+        needle = value.encode("utf-8")
+        result = []
+        found = self._mm.find(needle, heap, end)
+        while found != -1:
+            rel = found - heap
+            pos = bisect_right(offsets, rel) - 1
+            if offsets[pos] == rel and offsets[pos + 1] - rel == len(needle):
+                result.append(pos)
+            found = self._mm.find(needle, found + 1, end)
+        return result
+
+    def match(self, where: dict | None) -> list[int]:
+        """Позиции строк, удовлетворяющих where (равенства по столбцам)."""
+        if not where:
+            return list(range(self.length))
+        result: set[int] | None = None
+        for column, value in where.items():
+            found = set(self._match_column(column, value))
+            result = found if result is None else result & found
+            if not result:
+                return []
+        return sorted(result)
+
+    def close(self) -> None:
+        for view in (*self._ints.values(), *self._offsets.values()):
+            view.release()
+        self._view.release()
+        self._mm.close()
+        self._file.close()
+
+
+def read_table(path: str) -> list[dict]:
+    """Прочитать бинарную таблицу целиком в список строк."""
+    table = BinaryTable(path)
+    try:
+        return table.to_rows()
+    finally:
+        table.close()
+
+
+def read_schema(path: str) -> dict[str, str]:
+    """Прочитать схему из заголовка бинарной таблицы."""
+    with open(path, "rb") as f:
+        prefix = f.read(4 + _HEADER_LEN.size)
+        (header_len,) = _HEADER_LEN.unpack_from(prefix, 4)
+        return json.loads(f.read(header_len))["schema"]
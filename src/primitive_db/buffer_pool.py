@@ -0,0 +1,259 @@
+import sys
+from collections import OrderedDict
+
+from src.primitive_db.binary_format import BinaryTable
+from src.primitive_db.cache import result_cache
+from src.primitive_db.constants import (
+    TABLE_POOL_FLUSH_EVERY,
+    TABLE_POOL_MEMORY_BUDGET,
+)
+from src.primitive_db.indexes import index_registry
+from src.primitive_db.metrics import metrics
+from src.primitive_db.segments import SegmentedTable
+from src.primitive_db.storage import get_table_log
+from src.primitive_db.table_stats import table_stats
+from src.primitive_db.utils import (
+    change_records,
+    load_table_data,
+    log_table_changes,
+)
+
+
+def _estimate_size(rows: list[dict]) -> int:
+    """Грубая оценка памяти, занимаемой строками таблицы (по первой строке)."""
+    size = sys.getsizeof(rows)
+    if not rows:
+        return size
+    sample = rows[0]
+    per_row = sys.getsizeof(sample) + sum(sys.getsizeof(v) for v in sample.values())
+    return size + per_row * len(rows)
+
+
+class _PoolEntry:
+    def __init__(self, rows: list[dict], signature: tuple):
+        self.rows = rows
+        self.signature = signature
+        self.size = _estimate_size(rows)
+        self.pending: dict[int, dict | None] = {}
+        self.mutations = 0
+
+
+class TablePool:
+    """
+    Пул таблиц: разобранные строки остаются в памяти между командами.
+
+    Свежесть проверяется по mtime/размеру файлов таблицы, изменения
+    копятся и записываются в журнал раз в flush_every мутаций
+    (0 — только при вытеснении или выходе), при превышении
+    memory_budget вытесняются давно не использованные таблицы.
+    Во время транзакции (begin … end) изменения не записываются и
+    таблицы не вытесняются.
+    """
+
+    def __init__(
+        self,
+        memory_budget: int = TABLE_POOL_MEMORY_BUDGET,
+        flush_every: int = TABLE_POOL_FLUSH_EVERY,
+    ):
+        self.memory_budget = memory_budget
+        self.flush_every = flush_every
+        self._entries: OrderedDict[str, _PoolEntry] = OrderedDict()
+        self.in_transaction = False
+
+    def configure(
+        self,
+        memory_budget: int | None = None,
+        flush_every: int | None = None,
+    ) -> None:
+        """Изменить бюджет памяти и политику записи."""
+        if memory_budget is not None:
+            self.memory_budget = memory_budget
+        if flush_every is not None:
+            self.flush_every = flush_every
+        self._evict()
+
+    def get(self, table_name: str) -> list[dict]:
+        """Вернуть строки таблицы, перечитав файл только если он изменился."""
+        entry = self._entries.get(table_name)
+        if entry is not None:
+            if entry.pending or entry.signature == self._signature(table_name):
+                self._entries.move_to_end(table_name)
+                return entry.rows
+            del self._entries[table_name]
+
+        signature = self._signature(table_name)
+        result_cache.check(table_name, signature)
+        rows = load_table_data(table_name)
+        metrics.add("table_loads_total", label=table_name)
+        index_registry.attach(table_name, rows)
+        self._entries[table_name] = _PoolEntry(rows, signature)
+        self._evict(keep=table_name)
+        return rows
+
+    def get_readable(
+        self,
+        table_name: str,
+    ) -> list[dict] | BinaryTable | SegmentedTable:
+        """
+        Источник для чтения: строки из пула, если таблица загружена,
+        иначе бинарный снимок без журнала открывается через mmap.
+        Открытую BinaryTable вызывающий закрывает сам. Сегментированная
+        таблица в пул не попадает: ее сегменты читаются по одному.
+        """
+        log = get_table_log(table_name)
+        if log.format == "segmented":
+            return SegmentedTable(table_name)
+        if (
+            table_name not in self._entries
+            and log.format == "binary"
+            and not log.has_log()
+        ):
+            result_cache.check(table_name, log.signature())
+            return BinaryTable(log.binary_path)
+        return self.get(table_name)
+
+    def record_changes(
+        self,
+        table_name: str,
+        rows: list[dict],
+        changed: list[dict] | None = None,
+        deleted_ids: list[int] | None = None,
+    ) -> None:
+        """
+        Запомнить новые строки таблицы и изменения для записи в журнал.
+        Изменения копятся по ID строки, поэтому строка, ID которой
+        изменился (ее нет в индексе ID под новым значением), отвергается.
+        """
+        indexes = index_registry.get(table_name, rows)
+        if indexes is not None:
+            for row in changed or []:
+                if indexes.by_id.get(row["ID"]) is not row:
+                    raise ValueError(
+                        f'ID записи таблицы "{table_name}" изменился: '
+                        f'ID={row["ID"]} нет в индексе.'
+                    )
+        entry = self._entries.get(table_name)
+        if entry is None:
+            entry = self._entries[table_name] = _PoolEntry(rows, ())
+        entry.rows = rows
+        entry.size = _estimate_size(rows)
+        table_stats.observe(table_name, rows, changed or [])
+        for row in changed or []:
+            entry.pending[row["ID"]] = row
+        for row_id in deleted_ids or []:
+            entry.pending[row_id] = None
+        entry.mutations += 1
+        self._entries.move_to_end(table_name)
+        if (
+            self.flush_every
+            and not self.in_transaction
+            and entry.mutations >= self.flush_every
+        ):
+            self.flush(table_name)
+        self._evict(keep=table_name)
+
+    def flush(self, table_name: str | None = None) -> None:
+        """Записать накопленные изменения одной или всех таблиц."""
+        names = [table_name] if table_name else list(self._entries)
+        for name in names:
+            entry = self._entries.get(name)
+            if entry is None or not entry.pending:
+                continue
+            log_table_changes(name, *self._split(entry), index_registry.next_id(name))
+            entry.pending.clear()
+            entry.mutations = 0
+            before, entry.signature = entry.signature, self._signature(name)
+            table_stats.sync(name, before, entry.signature)
+
+    @staticmethod
+    def _split(entry: _PoolEntry) -> tuple[list[dict], list[int]]:
+        """Накопленные изменения → (измененные строки, удаленные ID)."""
+        changed = [row for row in entry.pending.values() if row is not None]
+        deleted = [i for i, row in entry.pending.items() if row is None]
+        return changed, deleted
+
+    def begin(self) -> None:
+        """Начать транзакцию: записать накопленное и дальше только копить."""
+        self.flush()
+        self.in_transaction = True
+
+    def pending_records(self) -> dict[str, list[dict]]:
+        """Записи журнала по таблицам со всеми изменениями транзакции."""
+        return {
+            name: change_records(*self._split(entry), index_registry.next_id(name))
+            for name, entry in self._entries.items()
+            if entry.pending
+        }
+
+    def changed_elsewhere(self) -> list[str]:
+        """
+        Таблицы с изменениями транзакции, файлы которых после загрузки
+        изменил другой процесс (проверяется под блокировками записи).
+        """
+        return [
+            name
+            for name, entry in self._entries.items()
+            if entry.pending and entry.signature != self._signature(name)
+        ]
+
+    def end(self, committed: bool) -> None:
+        """
+        Завершить транзакцию. После фиксации изменения уже в журналах —
+        остается их забыть; при откате таблицы выгружаются из памяти,
+        чтобы перечитать их с диска в прежнем виде.
+        """
+        self.in_transaction = False
+        if not committed:
+            self._entries.clear()
+            return
+        for name, entry in self._entries.items():
+            if entry.pending:
+                entry.pending.clear()
+                entry.mutations = 0
+                before, entry.signature = entry.signature, self._signature(name)
+                table_stats.sync(name, before, entry.signature)
+
+    def reset(self, table_name: str) -> None:
+        """
+        Заменить таблицу в пуле пустой: она удалена в транзакции, а ее
+        файлы остаются на диске до фиксации.
+        """
+        rows: list[dict] = []
+        index_registry.attach(table_name, rows)
+        self._entries[table_name] = _PoolEntry(rows, self._signature(table_name))
+
+    def discard(self, table_name: str) -> None:
+        """Убрать таблицу из пула без записи изменений."""
+        self._entries.pop(table_name, None)
+
+    def stats(self) -> dict[str, int]:
+        """Таблиц в пуле, оценка занятой ими памяти и незаписанных строк."""
+        return {
+            "tables": len(self._entries),
+            "memory_bytes": sum(e.size for e in self._entries.values()),
+            "pending_rows": sum(len(e.pending) for e in self._entries.values()),
+        }
+
+    def close(self) -> None:
+        """Записать все изменения и очистить пул."""
+        self.flush()
+        self._entries.clear()
+
+    def _signature(self, table_name: str) -> tuple:
+        return get_table_log(table_name).signature()
+
+    def _evict(self, keep: str | None = None) -> None:
+        if self.in_transaction:
+            return
+        total = sum(e.size for e in self._entries.values())
+        for name in list(self._entries):
+            if total <= self.memory_budget:
+                break
+            if name == keep:
+                continue
+            self.flush(name)
+            total -= self._entries.pop(name).size
+
+
+table_pool = TablePool()
+metrics.register("table_pool", table_pool.stats)
@@ -0,0 +1,139 @@
+from collections import OrderedDict
+from typing import Any, Callable
+
+from src.primitive_db.constants import (
+    CACHE_KEY_ALL,
+    CACHE_MAX_ENTRIES,
+    CACHE_MAX_ROWS,
+)
+from src.primitive_db.metrics import metrics
+
+
+class ResultCache:
+    """
+    Кэш результатов select с ключом (таблица, версия таблицы, условие).
+
+    Версия таблицы увеличивается при каждой мутации через core и когда
+    файлы таблицы при чтении оказываются измененными (другим процессом),
+    старые результаты таблицы при этом удаляются. Вытеснение — LRU по числу
+    записей и суммарному числу строк в закэшированных результатах.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = CACHE_MAX_ENTRIES,
+        max_rows: int = CACHE_MAX_ROWS,
+    ):
+        self.max_entries = max_entries
+        self.max_rows = max_rows
+        self._entries: OrderedDict[tuple, tuple[list[dict], int]] = OrderedDict()
+        self._versions: dict[str, int] = {}
+        self._signatures: dict[str, tuple] = {}
+        self._rows = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def version(self, table_name: str) -> int:
+        return self._versions.get(table_name, 0)
+
+    @staticmethod
+    def predicate(where: Any) -> str:
+        """Условие where в ключе кэша ('all' — без условия)."""
+        if where is None:
+            return CACHE_KEY_ALL
+        if isinstance(where, dict):
+            return str(sorted(where.items()))
+        return repr(where)
+
+    def _key(self, table_name: str, version: int, where: Any) -> tuple:
+        return (table_name, version, self.predicate(where))
+
+    def lookup(self, table_name: str, where: Any) -> list[dict] | None:
+        """Вернуть закэшированный результат или None (с учетом счетчиков)."""
+        key = self._key(table_name, self.version(table_name), where)
+        if key not in self._entries:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._entries.move_to_end(key)
+        return self._entries[key][0]
+
+    def store(
+        self,
+        table_name: str,
+        version: int,
+        where: Any,
+        result: list[dict],
+    ) -> None:
+        """
+        Сохранить результат, вычисленный при версии таблицы version.
+        Если таблица с тех пор изменилась, результат отбрасывается.
+        """
+        key = self._key(table_name, version, where)
+        if (
+            version != self.version(table_name)
+            or len(result) > self.max_rows
+            or key in self._entries
+        ):
+            return
+        self._entries[key] = (result, len(result))
+        self._rows += len(result)
+        self._evict()
+
+    def get_or_compute(
+        self,
+        table_name: str,
+        where: Any,
+        value_func: Callable[[], list[dict]],
+    ) -> list[dict]:
+        """Вернуть результат из кэша или вычислить и сохранить его."""
+        result = self.lookup(table_name, where)
+        if result is None:
+            version = self.version(table_name)
+            result = value_func()
+            self.store(table_name, version, where, result)
+        return result
+
+    def invalidate(self, table_name: str) -> None:
+        """Увеличить версию таблицы и удалить ее результаты."""
+        self._versions[table_name] = self.version(table_name) + 1
+        for key in [k for k in self._entries if k[0] == table_name]:
+            self._rows -= self._entries.pop(key)[1]
+
+    def check(self, table_name: str, signature: tuple) -> None:
+        """
+        Сбросить результаты таблицы, если отпечаток ее файлов изменился
+        с прошлой проверки: таблица читается с диска заново.
+        """
+        if self._signatures.get(table_name) != signature:
+            self._signatures[table_name] = signature
+            self.invalidate(table_name)
+
+    def clear(self) -> None:
+        self._entries.clear()
+        self._rows = 0
+
+    def stats(self) -> dict[str, Any]:
+        """Счетчики попаданий, промахов и вытеснений."""
+        total = self.hits + self.misses
+        return {
+            "entries": len(self._entries),
+            "rows": self._rows,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "hit_rate": self.hits / total if total else 0.0,
+        }
+
+    def _evict(self) -> None:
+        while self._entries and (
+            len(self._entries) > self.max_entries or self._rows > self.max_rows
+        ):
+            _, (_, size) = self._entries.popitem(last=False)
+            self._rows -= size
+            self.evictions += 1
+
+
+result_cache = ResultCache()
+metrics.register("result_cache", result_cache.stats)
@@ -0,0 +1,142 @@
+import json
+import queue
+import socket
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterator
+
+from src.primitive_db.constants import CLIENT_POOL_SIZE, SERVER_HOST, SERVER_PORT
+
+
+class ServerError(Exception):
+    """Сервер выполнил команду с ошибкой; текст ошибки — в output."""
+
+    def __init__(self, response: dict):
+        super().__init__(response.get("output", "").strip())
+        self.response = response
+
+
+class Client:
+    """
+    Соединение с сервером базы данных (database serve).
+
+    execute отправляет команду одной строкой JSON и ждет ответ:
+    словарь с ключами ok, rows, output и elapsed.
+    """
+
+    def __init__(
+        self,
+        socket_path: str | None = None,
+        host: str = SERVER_HOST,
+        port: int = SERVER_PORT,
+        timeout: float | None = None,
+    ):
+        if socket_path is not None:
+            self._sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            address: Any = socket_path
+        else:
+            self._sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+            address = (host, port)
+        self._sock.settimeout(timeout)
+        self._sock.connect(address)
+        self._file = self._sock.makefile("rb")
+        self._next_id = 0
+
+    def execute(self, command: str, check: bool = False) -> dict:
+        """
+        Выполнить команду на сервере. При check=True ошибка команды
+        поднимает ServerError.
+        """
+        self._next_id += 1
+        request = {"id": self._next_id, "command": command}
+        line = json.dumps(request, ensure_ascii=False) + "\n"
+        self._sock.sendall(line.encode("utf-8"))
+        answer = self._file.readline()
+        if not answer:
+            raise ConnectionError("Сервер закрыл соединение.")
+        response = json.loads(answer)
+        if check and not response["ok"]:
+            raise ServerError(response)
+        return response
+
+    def select(self, command: str) -> list[dict]:
+        """Выполнить select и вернуть строки результата."""
+        return self.execute(command, check=True)["rows"] or []
+
+    def close(self) -> None:
+        self._file.close()
+        self._sock.close()
+
+    def __enter__(self) -> "Client":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class ClientPool:
+    """
+    Пул соединений с сервером для многопоточных клиентов.
+
+    Соединения открываются по мере надобности, но не больше size
+    одновременно; освобожденные соединения используются повторно.
+    Транзакцию нужно вести на одном соединении — через connection().
+    """
+
+    def __init__(self, size: int = CLIENT_POOL_SIZE, **address: Any):
+        self.size = size
+        self._address = address
+        self._idle: queue.LifoQueue[Client] = queue.LifoQueue()
+        self._slots = threading.BoundedSemaphore(size)
+        self._closed = False
+
+    @contextmanager
+    def connection(self) -> Iterator[Client]:
+        """Взять соединение из пула на время блока with."""
+        if self._closed:
+            raise ConnectionError("Пул соединений закрыт.")
+        self._slots.acquire()
+        try:
+            try:
+                client = self._idle.get_nowait()
+            except queue.Empty:
+                client = Client(**self._address)
+        except BaseException:
+            self._slots.release()
+            raise
+        broken = False
+        try:
+            yield client
+        except (ConnectionError, OSError, ValueError):
+            broken = True
+            raise
+        finally:
+            if broken or self._closed:
+                client.close()
+            else:
+                self._idle.put(client)
+            self._slots.release()
+
+    def execute(self, command: str, check: bool = False) -> dict:
+        """Выполнить одну команду на свободном соединении."""
+        with self.connection() as client:
+            return client.execute(command, check)
+
+    def select(self, command: str) -> list[dict]:
+        with self.connection() as client:
+            return client.select(command)
+
+    def close(self) -> None:
+        """Закрыть все свободные соединения пула."""
+        self._closed = True
+        while True:
+            try:
+                self._idle.get_nowait().close()
+            except queue.Empty:
+                break
+
+    def __enter__(self) -> "ClientPool":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -1,4 +1,39 @@
+import os
+
 META_FILE = "db_meta.json"
+INDEX_FILE = "db_indexes.json"
+STATS_FILE = "db_stats.json"
+TXN_FILE = "db_txn.json"
 DATA_DIR = "data"
 VALID_TYPES = {"int", "str", "bool"}
-CACHE_KEY_ALL = "all"
\ No newline at end of file
+CACHE_KEY_ALL = "all"
+WAL_SUFFIX = ".wal."
+BINARY_SUFFIX = ".tbl"
+SEQUENCE_SUFFIX = ".seq"
+TABLE_FORMATS = {"json", "binary", "segmented"}
+SEGMENT_ROWS = 10_000
+SEGMENT_SUFFIX = ".jsonl"
+SEGMENT_MANIFEST = "zones.json"
+WAL_COMPACT_THRESHOLD = 1000
+WAL_FSYNC_BATCH = 32
+TABLE_POOL_MEMORY_BUDGET = 256 * 1024 * 1024
+TABLE_POOL_FLUSH_EVERY = 1
+CACHE_MAX_ENTRIES = 128
+CACHE_MAX_ROWS = 100_000
+STATEMENT_CACHE_SIZE = 256
+STATS_HLL_PRECISION = 12
+STATS_HISTOGRAM_BUCKETS = 10
+SELECT_PAGE_SIZE = 50
+IMPORT_BATCH_SIZE = 10_000
+DELETE_IN_PLACE_MAX = 64
+PARALLEL_WORKERS = os.cpu_count() or 1
+PARALLEL_MIN_ROWS = 1_000_000
+SERVER_HOST = "127.0.0.1"
+SERVER_PORT = 7433
+SERVER_MAX_LINE = 64 * 1024 * 1024
+CLIENT_POOL_SIZE = 4
+PROFILE_TOP = 15
+BENCH_SIZES = "10000"
+BENCH_OPERATIONS = 1000
+BENCH_SCHEMA = "name:str value:int flag:bool"
+BENCH_SEED = 42
@@ -1,14 +1,30 @@
-from typing import Any
+import heapq
+from bisect import bisect_left
+from itertools import islice
+from typing import Any, Iterable, Iterator
 
-from src.primitive_db.constants import CACHE_KEY_ALL, VALID_TYPES
+from src.primitive_db.aggregate import SelectItem
+from src.primitive_db.aggregate import aggregate as aggregate_rows
+from src.primitive_db.binary_format import BinaryTable
+from src.primitive_db.cache import result_cache
+from src.primitive_db.constants import (
+    DELETE_IN_PLACE_MAX,
+    IMPORT_BATCH_SIZE,
+    VALID_TYPES,
+)
 from src.primitive_db.decorators import (
     confirm_action,
-    create_cacher,
     handle_db_errors,
-    log_time,
+    timed,
 )
+from src.primitive_db.expr import Compare, Expr, compile_where, to_expr
+from src.primitive_db.indexes import SortedIndex, TableIndexes, index_registry
+from src.primitive_db.metrics import metrics
+from src.primitive_db.parallel import parallel_scan
+from src.primitive_db.planner import AccessPlan, plan_access
+from src.primitive_db.segments import SegmentedTable
 
-cache_result = create_cacher()
+Where = dict | Expr | None
 
 
 @handle_db_errors
@@ -46,6 +62,7 @@ def drop_table(metadata, table_name):
         return metadata
 
     del metadata[table_name]
+    result_cache.invalidate(table_name)
     print(f'Таблица "{table_name}" успешно удалена.')
     return metadata
 
@@ -84,22 +101,51 @@ def _validate_and_cast(values: list[Any], column_types: list[str]) -> list[Any]:
     return casted
 
 
-def _next_id(rows: list[dict]) -> int:
-    """Вернуть следующий ID: max+1, если есть строки; иначе 1."""
+def check_assignments(schema: dict[str, str], set_clause: dict) -> dict:
+    """
+    Проверить присваивания update по схеме таблицы и привести значения
+    к типам столбцов, как в insert. ID не изменяется: журнал и пул
+    таблиц хранят изменения по ID строки, и смена ключа оставила бы в
+    журнале прежнюю строку.
+    """
+    if "ID" in set_clause:
+        raise ValueError('Ошибка: Столбец "ID" изменить нельзя.')
+    casted = {}
+    for column, value in set_clause.items():
+        if column not in schema:
+            raise ValueError(f'Ошибка: Столбец "{column}" не найден.')
+        try:
+            casted[column] = _validate_and_cast([value], [schema[column]])[0]
+        except ValueError as e:
+            raise ValueError(f"Некорректное значение: {e}. Попробуйте снова.") from e
+    return casted
+
+
+def _next_id(rows: list[dict] | SegmentedTable) -> int:
+    """
+    Вернуть следующий ID: max+1, если есть строки; иначе 1 (у
+    сегментированной таблицы он хранится в манифесте).
+    Используется, только если строки не привязаны к индексу ID.
+    """
+    if isinstance(rows, SegmentedTable):
+        return rows.next_id
     if not rows:
         return 1
     return max(int(r["ID"]) for r in rows) + 1
 
 
 @handle_db_errors
-@log_time
+@timed
 def insert(
     metadata: dict, 
     table_name: str, 
     values: list[Any], 
-    rows: list[dict],
-) -> list[dict]:
-    """Добавить запись (без ID в values, ID генерируется автоматически)."""
+    rows: list[dict] | SegmentedTable,
+) -> list[dict] | SegmentedTable:
+    """
+    Добавить запись (без ID в values, ID генерируется автоматически).
+    В сегментированную таблицу запись сразу дописывается на диск.
+    """
     if table_name not in metadata:
         print(f'Ошибка: Таблица "{table_name}" не существует.')
         return rows
@@ -115,58 +161,389 @@ def insert(
         print(f"Некорректное значение: {e}. Попробуйте снова.")
         return rows
 
-    new_id = _next_id(rows)
+    indexes = index_registry.get(table_name, rows)
+    new_id = indexes.allocate_id() if indexes is not None else _next_id(rows)
     row = {"ID": new_id}
     for c, v in zip(non_id_columns, casted, strict=False):
         row[c] = v
 
     rows.append(row)
+    if indexes is not None:
+        indexes.on_insert(row)
+    result_cache.invalidate(table_name)
     print(f'Запись с ID={new_id} успешно добавлена в таблицу "{table_name}".')
     return rows
 
 
-def _match_where(row: dict, where: dict | None) -> bool:
+@handle_db_errors
+@timed
+def insert_many(
+    metadata: dict,
+    table_name: str,
+    values_iter: Iterable[list[Any]],
+    rows: list[dict] | SegmentedTable,
+    batch_size: int = IMPORT_BATCH_SIZE,
+) -> list[dict] | SegmentedTable:
+    """
+    Добавить много записей за один шаг.
+
+    Значения проверяются пачками по batch_size; при первой ошибке не
+    добавляется ничего. ID выделяются одним диапазоном после проверки.
+    """
+    if table_name not in metadata:
+        print(f'Ошибка: Таблица "{table_name}" не существует.')
+        return rows
+
+    schema = metadata[table_name]
+    non_id_columns = list(schema.keys())[1:]
+    non_id_types = [schema[c] for c in non_id_columns]
+
+    staged: list[list[Any]] = []
+    values_iter = iter(values_iter)
+    while batch := list(islice(values_iter, batch_size)):
+        for values in batch:
+            try:
+                staged.append(_validate_and_cast(values, non_id_types))
+            except ValueError as e:
+                print(
+                    f"Некорректное значение в записи {len(staged) + 1}: {e}. "
+                    "Ни одна запись не добавлена."
+                )
+                return rows
+
+    indexes = index_registry.get(table_name, rows)
+    if indexes is not None:
+        ids = indexes.allocate_ids(len(staged))
+    else:
+        first_id = _next_id(rows)
+        ids = range(first_id, first_id + len(staged))
+
+    new_rows = [
+        {"ID": new_id, **dict(zip(non_id_columns, casted, strict=False))}
+        for new_id, casted in zip(ids, staged, strict=False)
+    ]
+    rows.extend(new_rows)
+    if indexes is not None:
+        indexes.on_insert_many(new_rows)
+    result_cache.invalidate(table_name)
+    print(f'Добавлено записей: {len(new_rows)} в таблицу "{table_name}".')
+    return rows
+
+
+def _positions(table: BinaryTable, where: Where) -> list[int]:
+    """
+    Позиции строк бинарной таблицы по where: равенства
+    верхнего уровня ищутся по столбцам, остальное проверяется по строкам.
+    """
+    expr = to_expr(where)
+    if expr is None:
+        return table.match(None)
+    positions = table.match(expr.equalities() or None)
+    if isinstance(expr, Compare) and expr.op == "=":
+        return positions
+    predicate = expr.compile()
+    return [pos for pos in positions if predicate(table.row(pos))]
+
+
+def plan(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where,
+    table_name: str | None,
+) -> AccessPlan:
+    """План доступа к строкам для where (см. planner.plan_access)."""
+    if isinstance(rows, BinaryTable):
+        return AccessPlan("column_scan", len(rows))
+    if isinstance(rows, SegmentedTable):
+        segments = rows.matching(where)
+        return AccessPlan(
+            "zone_scan",
+            sum(segment.rows for segment in segments),
+            detail=f"сегментов {len(segments)} из {len(rows.segments)}",
+        )
+    indexes = index_registry.get(table_name, rows) if table_name else None
+    return plan_access(to_expr(where), indexes, len(rows))
+
+
+def _candidates(
+    rows: list[dict],
+    where: Where,
+    table_name: str | None,
+) -> list[dict]:
+    """Строки-кандидаты для where: по выбранному планом индексу или все."""
+    access = plan(rows, where, table_name)
+    metrics.add("access_total", label=access.kind)
+    if access.ids is None:
+        return rows
+    indexes = index_registry.get(table_name, rows)
+    return [indexes.by_id[i] for i in sorted(access.ids)]
+
+
+def _parallel(rows: list[dict] | BinaryTable | SegmentedTable, where: Where) -> bool:
+    """
+    Просматривать ли таблицу параллельно: это бинарная таблица больше
+    порога, а условие не сужается поиском равенств по байтам.
+    """
+    if not isinstance(rows, BinaryTable) or not parallel_scan.applies(rows):
+        return False
+    expr = to_expr(where)
+    return expr is None or not expr.equalities()
+
+
+def _scan(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where,
+    table_name: str | None,
+) -> Iterator[dict]:
+    """
+    Лениво перебрать строки, удовлетворяющие where. Просмотренные строки
+    и способ доступа учитываются в метриках (rows_scanned_total, access_total).
+    """
+    if where and _parallel(rows, where):
+        metrics.add("access_total", label="parallel_scan")
+        metrics.add("rows_scanned_total", len(rows))
+        return rows.rows(parallel_scan.match(rows, to_expr(where)))
+    if isinstance(rows, SegmentedTable):
+        return rows.scan(where)
+    if isinstance(rows, BinaryTable):
+        metrics.add("access_total", label="column_scan")
+        metrics.add("rows_scanned_total", len(rows))
+        return rows.rows(_positions(rows, where))
     if not where:
-        return True
-    for k, v in where.items():
-        if k not in row or row[k] != v:
-            return False
-    return True
+        metrics.add("access_total", label="full_scan")
+        metrics.add("rows_scanned_total", len(rows))
+        return iter(rows)
+    predicate = compile_where(where)
+    candidates = _candidates(rows, where, table_name)
+    metrics.add("rows_scanned_total", len(candidates))
+    return (r for r in candidates if predicate(r))
 
 
 @handle_db_errors
-@log_time
-def select(rows: list[dict], where: dict | None = None) -> list[dict]:
-    key = CACHE_KEY_ALL if where is None else str(sorted(where.items()))
-    return cache_result(
-        key, 
-        lambda: [r for r in rows if _match_where(r, where)] if where else rows,
-    )
+@timed
+def select(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where = None,
+    table_name: str | None = None,
+) -> list[dict]:
+    """Выбрать строки по where; с table_name результат кэшируется."""
+    def compute() -> list[dict]:
+        return list(_scan(rows, where, table_name))
+
+    if table_name is None:
+        return compute()
+    return result_cache.get_or_compute(table_name, where, compute)
+
+
+@handle_db_errors
+@timed
+def aggregate(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    items: list[SelectItem],
+    where: Where = None,
+    table_name: str | None = None,
+    group_by: list[str] | None = None,
+) -> list[dict]:
+    """
+    Агрегатный запрос (count, sum, min, max, avg с group by): строки
+    по where перебираются один раз и сразу сворачиваются по группам.
+    Большие таблицы сворачиваются по частям параллельно.
+    """
+    group_by = group_by or []
+    if _parallel(rows, where):
+        metrics.add("access_total", label="parallel_scan")
+        metrics.add("rows_scanned_total", len(rows))
+        return parallel_scan.aggregate(rows, to_expr(where), items, group_by)
+    return aggregate_rows(_scan(rows, where, table_name), items, group_by)
+
+
+def order_index(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where,
+    table_name: str | None,
+    order_by: str,
+) -> tuple[TableIndexes, SortedIndex] | None:
+    """
+    Упорядоченный индекс, по которому стоит обходить строки для order by:
+    он есть у столбца, а where не сужается другим индексом (иначе дешевле
+    отсортировать немногих кандидатов).
+    """
+    if not isinstance(rows, list) or table_name is None:
+        return None
+    indexes = index_registry.get(table_name, rows)
+    if indexes is None or order_by not in indexes.sorted:
+        return None
+    if where and plan(rows, where, table_name).kind != "full_scan":
+        return None
+    return indexes, indexes.sorted[order_by]
+
+
+def _ordered(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where,
+    table_name: str | None,
+    order_by: str,
+    descending: bool,
+    stop: int | None,
+) -> Iterator[dict]:
+    """
+    Строки по where в порядке столбца order_by.
+
+    С упорядоченным индексом строки берутся в порядке индекса и
+    проверяются условием — для limit просматривается только начало.
+    Без индекса первые stop строк отбираются кучей, иначе сортируются.
+    """
+    found = order_index(rows, where, table_name, order_by)
+    if found is not None:
+        metrics.add("access_total", label="order_index")
+        indexes, index = found
+        predicate = compile_where(where)
+        by_id = indexes.by_id
+        ordered = (by_id[i] for i in index.iter_ids(descending))
+        return (r for r in ordered if predicate(r))
+
+    matched = _scan(rows, where, table_name)
+
+    def key(row: dict) -> Any:
+        return row[order_by]
+
+    if stop is not None:
+        pick = heapq.nlargest if descending else heapq.nsmallest
+        return iter(pick(stop, matched, key=key))
+    return iter(sorted(matched, key=key, reverse=descending))
+
+
+def select_stream(
+    rows: list[dict] | BinaryTable | SegmentedTable,
+    where: Where = None,
+    table_name: str | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    order_by: str | None = None,
+    descending: bool = False,
+    cache_hits: list[str] | None = None,
+) -> Iterator[dict]:
+    """
+    Потоково выбрать строки по where с пропуском offset и не более limit.
+
+    Строки отдаются по мере просмотра таблицы. Полный результат без
+    limit/offset попадает в кэш, если не превышает его лимита строк
+    (кроме сегментированной таблицы: ее файлы меняются, минуя пул,
+    и кэш не узнал бы об изменениях другого процесса).
+    С order_by строки упорядочиваются по столбцу (см. _ordered).
+    При попадании в кэш условие из его ключа добавляется в cache_hits.
+    """
+    stop = None if limit is None else offset + limit
+    if order_by is not None:
+        yield from islice(
+            _ordered(rows, where, table_name, order_by, descending, stop),
+            offset,
+            stop,
+        )
+        return
+    if isinstance(rows, SegmentedTable):
+        table_name = None
+    if table_name is not None:
+        cached = result_cache.lookup(table_name, where)
+        if cached is not None:
+            if cache_hits is not None:
+                cache_hits.append(result_cache.predicate(where))
+            yield from islice(cached, offset, stop)
+            return
+
+    matched = _scan(rows, where, table_name)
+    if table_name is None or limit is not None or offset:
+        yield from islice(matched, offset, stop)
+        return
+
+    version = result_cache.version(table_name)
+    collected: list[dict] | None = []
+    for row in matched:
+        if collected is not None:
+            collected.append(row)
+            if len(collected) > result_cache.max_rows:
+                collected = None
+        yield row
+    if collected is not None:
+        result_cache.store(table_name, version, where, collected)
 
 
 @handle_db_errors
 def update(
-    rows: list[dict], 
+    rows: list[dict] | SegmentedTable,
     set_clause: dict, 
-    where: dict | None = None,
-) -> tuple[list[dict], int]:
-    """Обновить строки по where, вернуть (rows, count)."""
-    count = 0
-    for r in rows:
-        if _match_where(r, where):
-            r.update(set_clause)
-            count += 1
-    return rows, count
+    where: Where = None,
+    table_name: str | None = None,
+) -> tuple[list[dict] | SegmentedTable, list[dict]]:
+    """
+    Обновить строки по where на месте, вернуть (rows, измененные строки) —
+    в журнал таблицы записываются только они. Сегментированная таблица
+    изменяется на диске сразу.
+    """
+    if isinstance(rows, SegmentedTable):
+        return rows, rows.update(set_clause, where)
+
+    indexes = index_registry.get(table_name, rows) if table_name else None
+    updated = []
+    for r in _scan(rows, where, table_name):
+        old = dict(r) if indexes is not None else r
+        r.update(set_clause)
+        if indexes is not None:
+            indexes.on_update(old, r)
+        updated.append(r)
+    if updated and table_name is not None:
+        result_cache.invalidate(table_name)
+    return rows, updated
+
+
+def _row_id(row: dict) -> int:
+    return row["ID"]
+
+
+def _remove_rows(rows: list[dict], removed: list[dict]) -> None:
+    """
+    Удалить строки из списка на месте. Немногие строки находятся
+    двоичным поиском по ID (строки хранятся по возрастанию ID) и
+    удаляются по позиции; иначе список пересобирается за один проход.
+    """
+    if len(removed) <= DELETE_IN_PLACE_MAX:
+        positions = []
+        for row in removed:
+            pos = bisect_left(rows, row["ID"], key=_row_id)
+            if pos == len(rows) or rows[pos] is not row:
+                break
+            positions.append(pos)
+        else:
+            for pos in sorted(positions, reverse=True):
+                del rows[pos]
+            return
+    removed_ids = {row["ID"] for row in removed}
+    rows[:] = [r for r in rows if r["ID"] not in removed_ids]
 
 
 @handle_db_errors
 @confirm_action("удаление записей")
-def delete(rows: list[dict], where: dict | None = None) -> tuple[list[dict], int]:
-    """Удалить строки по where, вернуть (rows, count)."""
+def delete(
+    rows: list[dict] | SegmentedTable,
+    where: Where = None,
+    table_name: str | None = None,
+) -> tuple[list[dict] | SegmentedTable, list[int]]:
+    """
+    Удалить строки по where из того же списка, вернуть (rows, ID
+    удаленных строк) — в журнал таблицы записываются только они.
+    Из сегментированной таблицы строки удаляются на диске сразу.
+    """
+    if isinstance(rows, SegmentedTable):
+        return rows, rows.delete(where)
+
+    indexes = index_registry.get(table_name, rows) if table_name else None
     if not where:
-        filtered = []
-        count = len(rows)
+        removed = rows.copy()
+        rows.clear()
     else:
-        filtered = [r for r in rows if not _match_where(r, where)]
-        count = len(rows) - len(filtered)
-    return filtered, count
\ No newline at end of file
+        removed = list(_scan(rows, where, table_name))
+        _remove_rows(rows, removed)
+    if indexes is not None:
+        indexes.on_delete(removed, rows)
+    if removed and table_name is not None:
+        result_cache.invalidate(table_name)
+    return rows, [r["ID"] for r in removed]
\ No newline at end of file
@@ -1,5 +1,7 @@
 import time
-from typing import Any, Callable
+from typing import Callable
+
+from src.primitive_db.metrics import metrics
 
 
 def handle_db_errors(func: Callable) -> Callable:
@@ -20,43 +22,41 @@ def handle_db_errors(func: Callable) -> Callable:
             print(f"Произошла непредвиденная ошибка: {e}")
     return wrapper
 
+_confirm_settings = {"auto": False}
+
+
+def set_auto_confirm(enabled: bool) -> None:
+    """Включить или выключить автоматическое подтверждение опасных действий."""
+    _confirm_settings["auto"] = enabled
+
+
 def confirm_action(action_name: str) -> Callable:
     """Декоратор для подтверждения опасных действий."""
     def decorator(func: Callable) -> Callable:
         def wrapper(*args, **kwargs):
+            if _confirm_settings["auto"]:
+                return func(*args, **kwargs)
             answer = input(
                 f'Вы уверены, что хотите выполнить "{action_name}"? [y/n]: '
             ).strip().lower()
             if answer != "y":
                 print("Операция отменена пользователем.")
-                if args and isinstance(args[0], list):
-                    return args[0], 0
+                if args and not isinstance(args[0], dict):
+                    return args[0], []
                 return args[0] if args else None
             return func(*args, **kwargs)
         return wrapper
     return decorator
 
-def log_time(func: Callable) -> Callable:
-    """Декоратор для измерения времени выполнения функции."""
+def timed(func: Callable) -> Callable:
+    """
+    Декоратор для измерения времени выполнения функции: время попадает
+    в гистограмму core_seconds (см. команду stats), а не в вывод.
+    """
     def wrapper(*args, **kwargs):
-        start = time.monotonic()
-        result = func(*args, **kwargs)
-        end = time.monotonic()
-        elapsed = end - start
-        print(f"Функция {func.__name__} выполнилась за {elapsed:.3f} секунд.")
-        return result
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            metrics.observe("core_seconds", time.perf_counter() - start, func.__name__)
     return wrapper
-
-def create_cacher() -> Callable:
-    """Создает функцию для кэширования результатов."""
-    cache: dict[str, Any] = {}
-
-    def cache_result(key: str, value_func: Callable[[], Any]) -> Any:
-        if key in cache:
-            print(f"(из кэша) Запрос '{key}' найден.")
-            return cache[key]
-        result = value_func()
-        cache[key] = result
-        return result
-
-    return cache_result
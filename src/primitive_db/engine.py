@@ -1,9 +1,30 @@
-import shlex
+import contextlib
+import copy
+import io
+import json
+import os
+import re
+import time
+from typing import Callable, Iterable
 
-from prettytable import PrettyTable
-
-from src.primitive_db.constants import META_FILE
+from src.primitive_db.aggregate import Aggregate, parse_select_list
+from src.primitive_db.binary_format import BinaryTable
+from src.primitive_db.buffer_pool import table_pool
+from src.primitive_db.cache import result_cache
+from src.primitive_db.constants import (
+    INDEX_FILE,
+    META_FILE,
+    PROFILE_TOP,
+    SEGMENT_ROWS,
+    SELECT_PAGE_SIZE,
+    STATS_FILE,
+    TABLE_FORMATS,
+)
+from src.primitive_db.core import (
+    aggregate as core_aggregate,
+)
 from src.primitive_db.core import (
+    check_assignments,
     create_table,
     drop_table,
 )
@@ -14,19 +35,63 @@ from src.primitive_db.core import (
     insert as core_insert,
 )
 from src.primitive_db.core import (
-    select as core_select,
+    insert_many as core_insert_many,
+)
+from src.primitive_db.core import (
+    order_index as core_order_index,
+)
+from src.primitive_db.core import (
+    plan as core_plan,
+)
+from src.primitive_db.core import (
+    select_stream as core_select_stream,
 )
 from src.primitive_db.core import (
     update as core_update,
 )
-from src.primitive_db.parser import parse_set, parse_values, parse_where
+from src.primitive_db.decorators import handle_db_errors, set_auto_confirm
+from src.primitive_db.expr import Expr, parse_condition
+from src.primitive_db.indexes import index_registry
+from src.primitive_db.join import (
+    JoinPlan,
+    JoinSide,
+    join_stream,
+    plan_join,
+    qualify,
+    split_where,
+)
+from src.primitive_db.locks import get_file_lock
+from src.primitive_db.metrics import metrics
+from src.primitive_db.parallel import parallel_scan
+from src.primitive_db.parser import (
+    parse_group,
+    parse_join,
+    parse_limit,
+    parse_order,
+    split_command,
+)
+from src.primitive_db.segments import SegmentedTable
+from src.primitive_db.statement import parse_statement
+from src.primitive_db.storage import get_table_log
+from src.primitive_db.table_stats import TableStats, table_stats
 from src.primitive_db.utils import (
+    close_table_storage,
+    commit_transaction,
+    delete_table_data,
+    file_signature,
     load_metadata,
-    load_table_data,
+    read_import_file,
+    recover_transaction,
     save_metadata,
-    save_table_data,
 )
 
+_AGGREGATE_RE = re.compile(
+    r"^select\s+(?P<items>.+?)\s+from\s+(?P<table>\S+)(?P<tail>.*)$",
+    re.DOTALL,
+)
+# Команды, изменяющие таблицу, и позиция имени таблицы в аргументах.
+_WRITE_COMMANDS = {"insert": 2, "import": 1, "update": 1, "delete": 2}
+
 
 def print_help() -> None:
     """Вывод справочной информации о командах."""
@@ -35,18 +100,46 @@ def print_help() -> None:
     print("<command> create_table <имя> <столбец1:тип> ... - создать таблицу")
     print("<command> list_tables - показать список всех таблиц")
     print("<command> drop_table <имя> - удалить таблицу")
+    print("<command> create_index <имя> <столбец> [hash|sorted]")
+    print("  - создать хеш-индекс или упорядоченный индекс (int, str)")
+    print("<command> convert_table <имя> <json|binary|segmented> [<строк>]")
+    print("  - сменить формат файла; segmented — сегменты по <строк> записей")
+
+    print("\n*** Транзакции ***")
+    print("Функции:")
+    print("<command> begin - начать транзакцию")
+    print("<command> commit - зафиксировать изменения транзакции")
+    print("<command> rollback - отменить изменения транзакции")
 
     print("\n*** Операции с данными (CRUD) ***")
     print("Функции:")
-    print("<command> insert into <имя> values (<v1>, <v2>, ...)")
-    print("  - добавить запись в таблицу")
-    print("<command> select from <имя> [where <столбец>=<значение>]")
+    print("<command> insert into <имя> values (<v1>, <v2>, ...)[, (...)]")
+    print("  - добавить одну или несколько записей в таблицу")
+    print("<command> import <имя> from <файл.csv|файл.jsonl>")
+    print("  - загрузить записи из файла")
+    print("<command> select from <имя> [where <условие>]")
+    print("  [order by <столбец> [desc]] [limit <n>] [offset <m>]")
     print("  - выбрать записи")
+    print("  условие: =, !=, <, <=, >, >=, in (...), between ... and ...,")
+    print("  and, or и скобки")
+    print("<command> select <столбцы и агрегаты> from <имя> [where <условие>]")
+    print("  [group by <столбец>, ...] - count(*), sum, min, max, avg")
+    print("<command> select from <a> join <b> on <a>.<столбец> = <b>.<столбец>")
+    print("  [where ...] [order by ...] [limit <n>] [offset <m>]")
+    print("  - соединить две таблицы (hash join)")
+    print("<command> explain select ... - показать план выполнения запроса")
     print("<command> update <имя> set <столбец>=<значение>")
     print("  where <столбец>=<значение> - обновить записи")
     print("<command> delete from <имя> where <столбец>=<значение>")
     print("  - удалить запись")
     print("<command> info <имя> - информация о таблице")
+    print("<command> analyze <имя> - собрать статистику таблицы:")
+    print("  число различных значений, min/max, гистограмма")
+    print("<command> cache_stats - статистика кэша запросов")
+    print("<command> stats [json|prometheus|reset|save <файл>]")
+    print("  - метрики: задержки команд, просмотренные строки, ввод-вывод")
+    print("<command> profile <команда> - выполнить команду под cProfile")
+    print("  и tracemalloc и показать профиль")
 
     print("\n*** Общие команды ***")
     print("<command> exit - выйти из программы")
@@ -58,6 +151,8 @@ def _print_table(rows: list[dict]) -> None:
     if not rows:
         print("Нет записей.")
         return
+    from prettytable import PrettyTable
+
     headers = list(rows[0].keys())
     table = PrettyTable()
     table.field_names = headers
@@ -66,173 +161,1094 @@ def _print_table(rows: list[dict]) -> None:
     print(table)
 
 
+def _print_column_stats(stats: TableStats) -> None:
+    """Вывести статистику столбцов таблицы, собранную analyze."""
+    from prettytable import PrettyTable
+
+    table = PrettyTable()
+    table.field_names = ["Столбец", "Различных ≈", "Мин.", "Макс."]
+    for column, column_stats in stats.columns.items():
+        table.add_row([
+            column,
+            column_stats.distinct.count(),
+            column_stats.min,
+            column_stats.max,
+        ])
+    print(table)
+    print("Гистограммы (границы корзин и [число значений]):")
+    for column, column_stats in stats.columns.items():
+        print(f"  {column}: {column_stats.histogram()}")
+
+
+@handle_db_errors
+def _print_rows(rows: Iterable[dict], page_size: int = SELECT_PAGE_SIZE) -> int:
+    """
+    Выводить записи страницами по page_size строк по мере их поступления.
+    Вернуть число выведенных записей.
+    """
+    page: list[dict] = []
+    printed = 0
+    for r in rows:
+        page.append(r)
+        if len(page) >= page_size:
+            _print_table(page)
+            printed += len(page)
+            page = []
+    if page or not printed:
+        _print_table(page)
+    return printed + len(page)
+
+
+class CommandResult:
+    """Результат выполнения одной команды."""
+
+    def __init__(self, command: str):
+        self.command = command
+        self.ok = True
+        self.rows: list[dict] | None = None
+        self.output = ""
+        self.cached = False
+        self.elapsed = 0.0
+        self.exit = False
+
+
+class Session:
+    """
+    Сеанс работы с базой данных: разбор и выполнение команд.
+
+    Метаданные и таблицы остаются загруженными между вызовами execute.
+    Между begin и commit изменения копятся в памяти и записываются
+    одной атомарной фиксацией; rollback их отбрасывает.
+
+    Несколько процессов могут работать с одной базой: команда, изменяющая
+    таблицу, выполняется под ее блокировкой записи, а изменения
+    db_meta.json другими процессами подхватываются перед каждой командой.
+
+    При echo=False вывод команды сохраняется в CommandResult.output,
+    а строки select — в CommandResult.rows.
+    """
+
+    def __init__(
+        self,
+        meta_file: str = META_FILE,
+        index_file: str = INDEX_FILE,
+        echo: bool = True,
+        stats_file: str = STATS_FILE,
+    ):
+        self.meta_file = meta_file
+        self.index_file = index_file
+        self.stats_file = stats_file
+        self.echo = echo
+        self._meta_lock = get_file_lock(f"{meta_file}.lock")
+        with self._meta_lock.exclusive():
+            if recover_transaction():
+                print("Восстановлена прерванная фиксация транзакции.")
+        self._meta_signature = file_signature(meta_file)
+        self.metadata = load_metadata(meta_file)
+        index_registry.load(index_file)
+        table_stats.load(stats_file)
+        self._txn: dict | None = None
+        self._handlers: dict[str, Callable] = {
+            "exit": self._exit,
+            "help": self._help,
+            "list_tables": self._list_tables,
+            "create_table": self._create_table,
+            "drop_table": self._drop_table,
+            "create_index": self._create_index,
+            "convert_table": self._convert_table,
+            "insert": self._insert,
+            "import": self._import,
+            "select": self._select,
+            "explain": self._explain,
+            "update": self._update,
+            "delete": self._delete,
+            "info": self._info,
+            "analyze": self._analyze,
+            "cache_stats": self._cache_stats,
+            "stats": self._stats,
+            "profile": self._profile,
+            "begin": self._begin,
+            "commit": self._commit,
+            "rollback": self._rollback,
+        }
+
+    def execute(self, command: str) -> CommandResult:
+        """Выполнить одну команду и вернуть ее результат."""
+        result = CommandResult(command)
+        start = time.perf_counter()
+        if self.echo:
+            self._dispatch(command.strip(), result)
+        else:
+            with contextlib.redirect_stdout(io.StringIO()) as buffer:
+                self._dispatch(command.strip(), result)
+            result.output = buffer.getvalue()
+        result.elapsed = time.perf_counter() - start
+        name = command.split(maxsplit=1)[0] if command.strip() else ""
+        label = name if name in self._handlers else "unknown"
+        metrics.observe("command_seconds", result.elapsed, label)
+        if not result.ok:
+            metrics.add("command_errors_total", label=label)
+        return result
+
+    def _dispatch(self, user_input: str, result: CommandResult) -> None:
+        try:
+            args = split_command(user_input)
+        except ValueError as e:
+            return self._fail(result, f"Некорректная команда: {e}.")
+        if not args:
+            return
+        handler = self._handlers.get(args[0])
+        if handler is None:
+            return self._fail(result, f"Функции {args[0]!r} нет. Попробуйте снова.")
+        try:
+            self._refresh_metadata()
+            with self._writing(args):
+                handler(args, user_input, result)
+        except Exception as e:
+            self._fail(result, f"Произошла непредвиденная ошибка: {e}")
+
+    def close(self) -> None:
+        """
+        Записать изменения всех таблиц и индексы на диск.
+        Незафиксированная транзакция отменяется.
+        """
+        if self._txn is not None:
+            self._rollback_transaction()
+            print("Незафиксированная транзакция отменена.")
+        table_pool.close()
+        parallel_scan.close()
+        close_table_storage()
+        index_registry.save(self.index_file)
+        table_stats.save(self.stats_file)
+        metrics.dump()
+
+    @property
+    def in_transaction(self) -> bool:
+        """Открыта ли транзакция (begin без commit/rollback)."""
+        return self._txn is not None
+
+    def _fail(self, result: CommandResult, message: str) -> None:
+        result.ok = False
+        print(message)
+
+    def _writing(self, args: list[str]) -> contextlib.AbstractContextManager:
+        """
+        Блокировка записи таблицы, которую изменяет команда. В транзакции
+        таблицы блокируются только при фиксации.
+        """
+        position = _WRITE_COMMANDS.get(args[0])
+        if self._txn is not None or position is None or len(args) <= position:
+            return contextlib.nullcontext()
+        return get_table_log(args[position]).write_lock.exclusive()
+
+    def _readable(
+        self,
+        table_name: str,
+        where: Expr | None,
+    ) -> list[dict] | BinaryTable | SegmentedTable:
+        """
+        Источник строк для чтения (см. TablePool.get_readable). Если по
+        свежей статистике условию не отвечает ни одна строка, таблица
+        не читается.
+        """
+        if not table_stats.may_match(table_name, where):
+            metrics.add("access_total", label="stats_skip")
+            return []
+        return table_pool.get_readable(table_name)
+
+    def _writable(self, table_name: str) -> list[dict] | SegmentedTable:
+        """
+        Строки для изменения: из пула или сегменты таблицы. Сегменты
+        изменяются на диске сразу, поэтому в транзакции недоступны.
+        """
+        if get_table_log(table_name).format != "segmented":
+            return table_pool.get(table_name)
+        if self._txn is not None:
+            raise ValueError(
+                f'Ошибка: сегментированная таблица "{table_name}" '
+                "не изменяется в транзакции."
+            )
+        return SegmentedTable(table_name)
+
+    def _refresh_metadata(self) -> None:
+        """
+        Перечитать db_meta.json, если его изменил другой процесс. Таблицы,
+        удаленные или пересозданные с другой схемой, выгружаются из памяти.
+        """
+        if self._txn is not None:
+            return
+        signature = file_signature(self.meta_file)
+        if signature == self._meta_signature:
+            return
+        metadata = load_metadata(self.meta_file)
+        for table_name, schema in self.metadata.items():
+            if metadata.get(table_name) != schema:
+                table_pool.discard(table_name)
+                result_cache.invalidate(table_name)
+                index_registry.drop_table(table_name)
+                table_stats.drop_table(table_name)
+        self.metadata = metadata
+        self._meta_signature = signature
+
+    def _save_metadata(self) -> None:
+        """Сохранить метаданные (в транзакции — при фиксации)."""
+        if self._txn is None:
+            save_metadata(self.meta_file, self.metadata)
+            self._meta_signature = file_signature(self.meta_file)
+
+    def _rollback_transaction(self) -> None:
+        self.metadata = self._txn["metadata"]
+        self._txn = None
+        table_pool.end(committed=False)
+        result_cache.clear()
+        index_registry.load(self.index_file)
+        table_stats.load(self.stats_file)
+
+    # ---------- Общие команды и управление таблицами ----------
+    def _exit(self, args, user_input, result) -> None:
+        print("Выход из программы...")
+        self.close()
+        result.exit = True
+
+    def _help(self, args, user_input, result) -> None:
+        print_help()
+
+    def _list_tables(self, args, user_input, result) -> None:
+        if self.metadata:
+            for t in self.metadata.keys():
+                print("-", t)
+        else:
+            print("Таблиц пока нет.")
+
+    def _create_table(self, args, user_input, result) -> None:
+        if len(args) < 3:
+            return self._fail(result, "Ошибка: недостаточно аргументов.")
+        table_name = args[1]
+        columns = args[2:]
+        with self._meta_lock.exclusive():
+            self._refresh_metadata()
+            metadata = create_table(self.metadata, table_name, columns)
+            if metadata is not None:
+                self.metadata = metadata
+            self._save_metadata()
+
+    def _drop_table(self, args, user_input, result) -> None:
+        if len(args) < 2:
+            return self._fail(result, "Ошибка: укажите имя таблицы.")
+        table_name = args[1]
+        if self._txn is not None:
+            existed = table_name in self.metadata
+            metadata = drop_table(self.metadata, table_name)
+            if metadata is not None:
+                self.metadata = metadata
+            if existed and table_name not in self.metadata:
+                index_registry.drop_table(table_name)
+                table_stats.drop_table(table_name)
+                table_pool.reset(table_name)
+                self._txn["dropped"].append(table_name)
+            return
+        with self._meta_lock.exclusive():
+            self._refresh_metadata()
+            existed = table_name in self.metadata
+            metadata = drop_table(self.metadata, table_name)
+            if metadata is not None:
+                self.metadata = metadata
+            if not existed or table_name in self.metadata:
+                return
+            self._save_metadata()
+            index_registry.drop_table(table_name)
+            table_stats.drop_table(table_name)
+            table_pool.discard(table_name)
+            index_registry.save(self.index_file)
+            table_stats.save(self.stats_file)
+            delete_table_data(table_name)
+
+    def _create_index(self, args, user_input, result) -> None:
+        if self._txn is not None:
+            return self._fail(result, "Ошибка: create_index недоступен в транзакции.")
+        if len(args) not in (3, 4) or args[3:] not in ([], ["hash"], ["sorted"]):
+            return self._fail(
+                result,
+                "Ошибка: используйте формат: "
+                "create_index <имя> <столбец> [hash|sorted]",
+            )
+        table_name, column = args[1], args[2]
+        kind = args[3] if len(args) == 4 else "hash"
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        if column not in self.metadata[table_name]:
+            return self._fail(result, f'Ошибка: Столбец "{column}" не найден.')
+        if kind == "sorted" and self.metadata[table_name][column] == "bool":
+            return self._fail(
+                result, "Ошибка: упорядоченный индекс строится по int и str."
+            )
+        if get_table_log(table_name).format == "segmented":
+            return self._fail(
+                result,
+                "Ошибка: у сегментированной таблицы нет индексов, "
+                "сегменты отбираются по зонам min/max.",
+            )
+        rows = table_pool.get(table_name)
+        index_registry.create(table_name, column, rows, kind)
+        index_registry.save(self.index_file)
+        print(f'Индекс ({kind}) по столбцу "{column}" таблицы "{table_name}" создан.')
+
+    def _convert_table(self, args, user_input, result) -> None:
+        if self._txn is not None:
+            return self._fail(
+                result, "Ошибка: convert_table недоступен в транзакции."
+            )
+        usage = "Ошибка: используйте формат: convert_table <имя> <формат> [<строк>]"
+        if len(args) not in (3, 4):
+            return self._fail(result, usage)
+        table_name, fmt = args[1], args[2]
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        if fmt not in TABLE_FORMATS:
+            return self._fail(
+                result,
+                f"Некорректный формат: {fmt}. Доступны: json, binary, segmented.",
+            )
+        segment_rows = SEGMENT_ROWS
+        if len(args) == 4:
+            if fmt != "segmented" or not args[3].isdigit() or int(args[3]) < 1:
+                return self._fail(result, usage)
+            segment_rows = int(args[3])
+        log = get_table_log(table_name)
+        if fmt == "segmented" and log.format == "segmented":
+            return self._fail(
+                result, f'Ошибка: Таблица "{table_name}" уже сегментирована.'
+            )
+        detail = ""
+        # Фоновое уплотнение журнала берет ту же блокировку записи: его
+        # нужно дождаться до ее захвата, иначе перевод ждал бы его вечно.
+        table_pool.flush(table_name)
+        log.wait()
+        with log.write_lock.exclusive():
+            if fmt == "segmented":
+                table = self._segment_table(table_name, segment_rows)
+                detail = f": сегментов {len(table.segments)} по {segment_rows} записей"
+            elif log.format == "segmented":
+                segmented = SegmentedTable(table_name)
+                log.save_sequence(segmented.next_id)
+                log.convert(fmt, self.metadata[table_name], segmented.to_rows())
+            else:
+                table_pool.discard(table_name)
+                log.convert(fmt, self.metadata[table_name])
+        print(f'Таблица "{table_name}" преобразована в формат {fmt}{detail}.')
+
+    def _segment_table(self, table_name: str, segment_rows: int) -> SegmentedTable:
+        """
+        Переписать таблицу сегментами. Ее индексы и статистика удаляются:
+        сегменты изменяются, минуя пул, и не поддерживали бы их.
+        """
+        rows = table_pool.get(table_name)
+        table_pool.flush(table_name)
+        table = SegmentedTable.create(
+            table_name, rows, segment_rows, index_registry.next_id(table_name) or 1
+        )
+        table_pool.discard(table_name)
+        result_cache.invalidate(table_name)
+        get_table_log(table_name).remove_snapshot()
+        index_registry.drop_table(table_name)
+        index_registry.save(self.index_file)
+        table_stats.drop_table(table_name)
+        table_stats.save(self.stats_file)
+        return table
+
+    # ---------- Транзакции ----------
+    def _begin(self, args, user_input, result) -> None:
+        if self._txn is not None:
+            return self._fail(result, "Ошибка: транзакция уже начата.")
+        table_pool.begin()
+        close_table_storage()
+        index_registry.save(self.index_file)
+        table_stats.save(self.stats_file)
+        self._txn = {"metadata": copy.deepcopy(self.metadata), "dropped": []}
+        print("Транзакция начата.")
+
+    def _commit(self, args, user_input, result) -> None:
+        if self._txn is None:
+            return self._fail(result, "Ошибка: нет активной транзакции.")
+        tables = table_pool.pending_records()
+        dropped = self._txn["dropped"]
+        with contextlib.ExitStack() as stack:
+            stack.enter_context(self._meta_lock.exclusive())
+            for table_name in sorted(set(tables) | set(dropped)):
+                log = get_table_log(table_name)
+                stack.enter_context(log.write_lock.exclusive())
+            conflicts = table_pool.changed_elsewhere()
+            if not conflicts:
+                commit_transaction(
+                    self.meta_file, self._merge_metadata(), tables, dropped
+                )
+                self._meta_signature = file_signature(self.meta_file)
+        if conflicts:
+            self._rollback_transaction()
+            names = ", ".join(f'"{name}"' for name in conflicts)
+            return self._fail(
+                result,
+                f"Ошибка: таблицы {names} изменены другим процессом после "
+                "начала транзакции. Транзакция отменена.",
+            )
+        self._txn = None
+        table_pool.end(committed=True)
+        index_registry.save(self.index_file)
+        table_stats.save(self.stats_file)
+        print(f"Транзакция зафиксирована. Изменено таблиц: {len(tables)}.")
+
+    def _merge_metadata(self) -> dict:
+        """
+        Метаданные для фиксации: к текущему db_meta.json (его могли
+        изменить другие процессы) применяются только изменения транзакции.
+        """
+        before = self._txn["metadata"]
+        metadata = load_metadata(self.meta_file)
+        for table_name in self._txn["dropped"]:
+            metadata.pop(table_name, None)
+        for table_name, schema in self.metadata.items():
+            if before.get(table_name) != schema:
+                metadata[table_name] = schema
+        self.metadata = metadata
+        return metadata
+
+    def _rollback(self, args, user_input, result) -> None:
+        if self._txn is None:
+            return self._fail(result, "Ошибка: нет активной транзакции.")
+        self._rollback_transaction()
+        print("Транзакция отменена.")
+
+    # ---------- CRUD-команды ----------
+    def _insert(self, args, user_input, result) -> None:
+        if len(args) < 5 or args[1] != "into" or args[3] != "values":
+            return self._fail(
+                result, "Ошибка: используйте формат: insert into <имя> values (<...>)"
+            )
+        table_name = args[2]
+        try:
+            groups = parse_statement(user_input).values
+        except Exception as e:
+            return self._fail(result, f"Некорректное значение: {e}. Попробуйте снова.")
+
+        try:
+            rows = self._writable(table_name)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        count_before = len(rows)
+        if len(groups) == 1:
+            rows = core_insert(self.metadata, table_name, groups[0], rows)
+        else:
+            rows = core_insert_many(self.metadata, table_name, groups, rows)
+        if isinstance(rows, list) and len(rows) > count_before:
+            table_pool.record_changes(table_name, rows, changed=rows[count_before:])
+
+    def _import(self, args, user_input, result) -> None:
+        if len(args) != 4 or args[2] != "from":
+            return self._fail(
+                result, "Ошибка: используйте формат: import <имя> from <файл>"
+            )
+        table_name, filepath = args[1], args[3]
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        if not os.path.isfile(filepath):
+            return self._fail(result, f'Ошибка: Файл "{filepath}" не найден.')
+        try:
+            rows = self._writable(table_name)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        count_before = len(rows)
+        columns = list(self.metadata[table_name].keys())[1:]
+        records = read_import_file(filepath, columns)
+        rows = core_insert_many(self.metadata, table_name, records, rows)
+        if isinstance(rows, list) and len(rows) > count_before:
+            table_pool.record_changes(table_name, rows, changed=rows[count_before:])
+
+    def _parse_select(self, args: list[str], user_input: str) -> tuple:
+        """Разобрать select → (таблица, where, limit, offset, order by, desc)."""
+        usage = (
+            "Ошибка: используйте формат: select from <имя> [where ...] "
+            "[order by <столбец> [desc]] [limit <n>] [offset <m>]"
+        )
+        if len(args) < 3 or args[0] != "select" or args[1] != "from":
+            raise ValueError(usage)
+        table_name = args[2]
+        parts = user_input.split(maxsplit=3)
+        tail, limit, offset = parse_limit(parts[3] if len(parts) > 3 else "")
+        tail, order_by, descending = parse_order(tail)
+        schema = self.metadata.get(table_name)
+        if order_by is not None and schema is not None and order_by not in schema:
+            raise ValueError(f'Ошибка: Столбец "{order_by}" не найден.')
+
+        where = None
+        if tail:
+            if not tail.startswith("where"):
+                raise ValueError(usage)
+            try:
+                where = parse_condition(tail[len("where"):])
+            except ValueError as e:
+                raise ValueError(
+                    f"Некорректное значение: {e}. Попробуйте снова."
+                ) from e
+        where = table_stats.order(table_name, where)
+        return table_name, where, limit, offset, order_by, descending
+
+    def _parse_join(self, user_input: str) -> tuple | None:
+        """
+        Разобрать соединение → (левая таблица, [(таблица, столбец on,
+        условие по ней)] для обеих таблиц, остаток where, limit, offset,
+        order by, desc). Не соединение — None.
+        """
+        parsed = parse_join(user_input)
+        if parsed is None:
+            return None
+        left, right, left_column, right_column, tail = parsed
+        if left == right:
+            raise ValueError(
+                "Ошибка: соединение таблицы с самой собой не поддерживается."
+            )
+        schemas = {}
+        for table_name, column in ((left, left_column), (right, right_column)):
+            if table_name not in self.metadata:
+                raise ValueError(f'Ошибка: Таблица "{table_name}" не существует.')
+            if column not in self.metadata[table_name]:
+                raise ValueError(f'Ошибка: Столбец "{table_name}.{column}" не найден.')
+            schemas[table_name] = self.metadata[table_name]
+
+        tail, limit, offset = parse_limit(tail)
+        tail, order_by, descending = parse_order(tail)
+        if order_by is not None:
+            order_by = qualify(order_by, schemas)
+        where = None
+        if tail:
+            if not tail.startswith("where"):
+                raise ValueError(
+                    "Ошибка: используйте формат: select from <a> join <b> "
+                    "on <a>.<столбец> = <b>.<столбец> [where ...] "
+                    "[order by <столбец> [desc]] [limit <n>] [offset <m>]"
+                )
+            try:
+                where = parse_condition(tail[len("where"):])
+            except ValueError as e:
+                raise ValueError(
+                    f"Некорректное значение: {e}. Попробуйте снова."
+                ) from e
+        pushed, residual = split_where(where, schemas)
+        sides = [
+            (left, left_column, table_stats.order(left, pushed[left])),
+            (right, right_column, table_stats.order(right, pushed[right])),
+        ]
+        return left, sides, residual, limit, offset, order_by, descending
+
+    def _join_plan(self, sides: list[tuple]) -> tuple[JoinPlan, list]:
+        """План соединения и открытые источники строк (их нужно закрыть)."""
+        sources = [self._readable(table_name, where) for table_name, _, where in sides]
+        left, right = (
+            JoinSide(table_name, source, column, where)
+            for (table_name, column, where), source in zip(sides, sources, strict=True)
+        )
+        return plan_join(left, right), sources
+
+    def _join(self, parsed: tuple, result: CommandResult) -> None:
+        left, sides, residual, limit, offset, order_by, descending = parsed
+        plan, sources = self._join_plan(sides)
+        try:
+            stream = join_stream(
+                plan, left, residual, limit, offset, order_by, descending
+            )
+            if self.echo:
+                returned = _print_rows(stream)
+            else:
+                result.rows = list(stream)
+                returned = len(result.rows)
+            metrics.add("rows_returned_total", returned)
+        finally:
+            for source in sources:
+                if isinstance(source, BinaryTable):
+                    source.close()
+
+    def _select(self, args, user_input, result) -> None:
+        try:
+            join = self._parse_join(user_input)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        if join is not None:
+            return self._join(join, result)
+        if len(args) > 1 and args[1] != "from":
+            return self._aggregate(args, user_input, result)
+        try:
+            (
+                table_name, where, limit, offset, order_by, descending
+            ) = self._parse_select(args, user_input)
+        except ValueError as e:
+            return self._fail(result, str(e))
+
+        source = self._readable(table_name, where)
+        cache_hits: list[str] = []
+        try:
+            stream = core_select_stream(
+                source,
+                where,
+                table_name=table_name,
+                limit=limit,
+                offset=offset,
+                order_by=order_by,
+                descending=descending,
+                cache_hits=cache_hits,
+            )
+            if self.echo:
+                returned = _print_rows(stream)
+            else:
+                result.rows = list(stream)
+                returned = len(result.rows)
+            metrics.add("rows_returned_total", returned)
+            result.cached = bool(cache_hits)
+            if self.echo and cache_hits:
+                print(f"(из кэша) Запрос '{cache_hits[0]}' найден.")
+        finally:
+            if isinstance(source, BinaryTable):
+                source.close()
+
+    def _parse_aggregate(self, user_input: str) -> tuple:
+        """Разобрать агрегатный select → (таблица, элементы, where, group by)."""
+        match = _AGGREGATE_RE.match(user_input)
+        if match is None:
+            raise ValueError(
+                "Ошибка: используйте формат: select <столбцы и агрегаты> "
+                "from <имя> [where ...] [group by <столбец>, ...]"
+            )
+        table_name = match.group("table")
+        if table_name not in self.metadata:
+            raise ValueError(f'Ошибка: Таблица "{table_name}" не существует.')
+        schema = self.metadata[table_name]
+        tail, group_by = parse_group(match.group("tail"))
+        try:
+            items = parse_select_list(match.group("items"))
+            where = None
+            if tail:
+                if not tail.startswith("where"):
+                    raise ValueError(f"Лишний фрагмент запроса: {tail!r}")
+                where = parse_condition(tail[len("where"):])
+        except ValueError as e:
+            raise ValueError(f"Некорректное значение: {e}. Попробуйте снова.") from e
+
+        for item in items:
+            column = item.column if isinstance(item, Aggregate) else item
+            if column != "*" and column not in schema:
+                raise ValueError(f'Ошибка: Столбец "{column}" не найден.')
+            if isinstance(item, str) and item not in group_by:
+                raise ValueError(
+                    f'Ошибка: Столбец "{item}" должен быть указан в group by.'
+                )
+            if (
+                isinstance(item, Aggregate)
+                and item.func in ("sum", "avg")
+                and schema[column] != "int"
+            ):
+                raise ValueError(f"Ошибка: {item.name} требует столбец типа int.")
+        for column in group_by:
+            if column not in schema:
+                raise ValueError(f'Ошибка: Столбец "{column}" не найден.')
+        return table_name, items, table_stats.order(table_name, where), group_by
+
+    def _aggregate(self, args, user_input, result) -> None:
+        try:
+            table_name, items, where, group_by = self._parse_aggregate(user_input)
+        except ValueError as e:
+            return self._fail(result, str(e))
+
+        count = None
+        only_count = (
+            len(items) == 1
+            and isinstance(items[0], Aggregate)
+            and items[0].name == "count(*)"
+        )
+        if only_count and where is None and not group_by:
+            count = index_registry.row_count(table_name)
+            if count is None:
+                count = table_stats.row_count(table_name)
+        if count is not None:
+            metrics.add("access_total", label="row_count")
+            rows = [{"count(*)": count}]
+        else:
+            source = self._readable(table_name, where)
+            try:
+                rows = core_aggregate(
+                    source, items, where, table_name=table_name, group_by=group_by
+                )
+            finally:
+                if isinstance(source, BinaryTable):
+                    source.close()
+            if rows is None:
+                result.ok = False
+                return
+        result.rows = rows
+        metrics.add("rows_returned_total", len(rows))
+        if self.echo:
+            _print_table(rows)
+
+    def _explain(self, args, user_input, result) -> None:
+        command = user_input[len("explain"):].strip()
+        try:
+            join = self._parse_join(command)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        if join is not None:
+            return self._explain_join(join)
+        try:
+            table_name, where, _, _, order_by, _ = self._parse_select(
+                args[1:], command
+            )
+        except ValueError as e:
+            return self._fail(result, str(e))
+        if not table_stats.may_match(table_name, where):
+            print("План: пустой результат [условие вне min/max по статистике]")
+            return
+        source = table_pool.get_readable(table_name)
+        try:
+            if order_by is None:
+                print(f"План: {core_plan(source, where, table_name)}")
+            elif core_order_index(source, where, table_name, order_by):
+                print(f'План: обход упорядоченного индекса "{order_by}"')
+            else:
+                print(f"План: {core_plan(source, where, table_name)}")
+                print(f'Сортировка: по столбцу "{order_by}"')
+        finally:
+            if isinstance(source, BinaryTable):
+                source.close()
+        stats = table_stats.get(table_name)
+        if stats is not None and where is not None:
+            estimate = round(stats.row_count * stats.selectivity(where))
+            print(f"Условие: {where!r}, по статистике ~{estimate} строк")
+
+    def _explain_join(self, parsed: tuple) -> None:
+        _, sides, residual, _, _, order_by, _ = parsed
+        plan, sources = self._join_plan(sides)
+        try:
+            print(f"План: {plan}")
+            for side in (plan.probe, plan.build):
+                if side.where is not None:
+                    access = core_plan(side.rows, side.where, side.table)
+                    print(f"Условие {side.table}: {side.where!r} ({access})")
+            if residual is not None:
+                print(f"Условие после соединения: {residual!r}")
+            if order_by is not None:
+                print(f'Сортировка: по столбцу "{order_by}"')
+        finally:
+            for source in sources:
+                if isinstance(source, BinaryTable):
+                    source.close()
+
+    def _update(self, args, user_input, result) -> None:
+        if len(args) < 5 or args[2] != "set":
+            return self._fail(
+                result, "Ошибка: используйте формат: update <имя> set <...> where <...>"
+            )
+        table_name = args[1]
+        try:
+            statement = parse_statement(user_input)
+        except Exception as e:
+            return self._fail(result, f"Некорректное значение: {e}. Попробуйте снова.")
+        if statement.where is None:
+            return self._fail(result, "Ошибка: укажите условие where.")
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        try:
+            set_clause = check_assignments(
+                self.metadata[table_name], statement.assignments
+            )
+        except ValueError as e:
+            return self._fail(result, str(e))
+        where = table_stats.order(table_name, statement.where)
+        if not table_stats.may_match(table_name, where):
+            metrics.add("access_total", label="stats_skip")
+            print("Подходящих записей не найдено.")
+            return
+
+        try:
+            rows = self._writable(table_name)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        rows, changed = core_update(rows, set_clause, where, table_name=table_name)
+        if changed:
+            if isinstance(rows, list):
+                table_pool.record_changes(table_name, rows, changed=changed)
+            if len(changed) == 1:
+                print(
+                    f'Запись с ID={changed[0]["ID"]} в таблице "{table_name}" '
+                    f'успешно обновлена.'
+                )
+            else:
+                print(f"Обновлено записей: {len(changed)}")
+        else:
+            print("Подходящих записей не найдено.")
+
+    def _delete(self, args, user_input, result) -> None:
+        if len(args) < 4 or args[1] != "from" or args[3] != "where":
+            return self._fail(
+                result, "Ошибка: используйте формат: delete from <имя> where <...>"
+            )
+        table_name = args[2]
+        try:
+            where = parse_statement(user_input).where
+        except Exception as e:
+            return self._fail(result, f"Некорректное значение: {e}. Попробуйте снова.")
+        where = table_stats.order(table_name, where)
+        if not table_stats.may_match(table_name, where):
+            metrics.add("access_total", label="stats_skip")
+            print("Подходящих записей не найдено.")
+            return
+
+        try:
+            rows = self._writable(table_name)
+        except ValueError as e:
+            return self._fail(result, str(e))
+        rows, deleted_ids = core_delete(rows, where, table_name=table_name)
+        if deleted_ids and isinstance(rows, list):
+            table_pool.record_changes(table_name, rows, deleted_ids=deleted_ids)
+        if len(deleted_ids) == 1:
+            print(f'Запись успешно удалена из таблицы "{table_name}".')
+        elif len(deleted_ids) > 1:
+            print(f"Удалено записей: {len(deleted_ids)}")
+        else:
+            print("Подходящих записей не найдено.")
+
+    def _info(self, args, user_input, result) -> None:
+        if len(args) < 2:
+            return self._fail(result, "Ошибка: укажите имя таблицы.")
+        table_name = args[1]
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        schema = self.metadata[table_name]
+        segmented = None
+        if get_table_log(table_name).format == "segmented":
+            segmented = SegmentedTable(table_name)
+        count = index_registry.row_count(table_name)
+        if count is None:
+            count = table_stats.row_count(table_name)
+        if count is None:
+            source = segmented if segmented is not None else table_pool.get(table_name)
+            count = len(source)
+        cols_str = ", ".join(f"{k}:{v}" for k, v in schema.items())
+        print(f"Таблица: {table_name}")
+        print(f"Столбцы: {cols_str}")
+        print(f"Количество записей: {count}")
+        if segmented is not None:
+            print(
+                f"Сегментов: {len(segmented.segments)} "
+                f"(до {segmented.segment_rows} записей в каждом)"
+            )
+        stats = table_stats.get(table_name)
+        if stats is not None:
+            state = (
+                "актуальна"
+                if table_stats.fresh(table_name) is not None
+                else "устарела, повторите analyze"
+            )
+            print(f"Статистика: analyze {stats.analyzed} ({state})")
+            _print_column_stats(stats)
+
+    def _analyze(self, args, user_input, result) -> None:
+        if self._txn is not None:
+            return self._fail(result, "Ошибка: analyze недоступен в транзакции.")
+        if len(args) != 2:
+            return self._fail(result, "Ошибка: используйте формат: analyze <имя>")
+        table_name = args[1]
+        if table_name not in self.metadata:
+            return self._fail(result, f'Ошибка: Таблица "{table_name}" не существует.')
+        if get_table_log(table_name).format == "segmented":
+            return self._fail(
+                result,
+                "Ошибка: analyze недоступен для сегментированной таблицы: "
+                "у каждого сегмента есть свои min/max.",
+            )
+        rows = table_pool.get(table_name)
+        table_pool.flush(table_name)
+        stats = table_stats.analyze(table_name, rows, self.metadata[table_name])
+        table_stats.save(self.stats_file)
+        print(
+            f'Статистика таблицы "{table_name}" собрана: '
+            f"записей {stats.row_count}, столбцов {len(stats.columns)}."
+        )
+
+    def _cache_stats(self, args, user_input, result) -> None:
+        stats = result_cache.stats()
+        print(f"Записей в кэше: {stats['entries']} (строк: {stats['rows']})")
+        print(f"Попаданий: {stats['hits']}, промахов: {stats['misses']}, "
+              f"вытеснений: {stats['evictions']}")
+        print(f"Доля попаданий: {stats['hit_rate']:.1%}")
+
+    def _stats(self, args, user_input, result) -> None:
+        mode = args[1] if len(args) > 1 else None
+        if mode == "json" and len(args) == 2:
+            print(json.dumps(metrics.snapshot(), ensure_ascii=False, indent=2))
+        elif mode == "prometheus" and len(args) == 2:
+            print(metrics.to_prometheus(), end="")
+        elif mode == "reset" and len(args) == 2:
+            metrics.reset()
+            print("Метрики сброшены.")
+        elif mode == "save" and len(args) == 3:
+            print(f"Метрики сохранены в {metrics.dump(args[2])}.")
+        elif mode is None:
+            self._print_stats()
+        else:
+            self._fail(
+                result,
+                "Ошибка: используйте формат: "
+                "stats [json|prometheus|reset|save <файл>]",
+            )
+
+    def _print_stats(self) -> None:
+        from prettytable import PrettyTable
+
+        snapshot = metrics.snapshot()
+        table = PrettyTable()
+        table.field_names = ["Команда", "Вызовов", "p50, мс", "p99, мс", "Макс., мс"]
+        for label, hist in snapshot["histograms"].get("command_seconds", {}).items():
+            table.add_row([
+                label,
+                hist["count"],
+                f"{hist['p50'] * 1000:.3f}",
+                f"{hist['p99'] * 1000:.3f}",
+                f"{hist['max'] * 1000:.3f}",
+            ])
+        print(table)
+
+        def total(name: str) -> float:
+            return sum(snapshot["counters"].get(name, {}).values())
+
+        print(f"Строк просмотрено: {total('rows_scanned_total'):g}, "
+              f"возвращено: {total('rows_returned_total'):g}")
+        print(f"Байт прочитано: {total('bytes_read_total'):g}, "
+              f"записано: {total('bytes_written_total'):g}")
+        access = snapshot["counters"].get("access_total", {})
+        if access:
+            print("Доступ к строкам: " + ", ".join(
+                f"{kind} — {count:g}" for kind, count in access.items()
+            ))
+        segments = snapshot["counters"].get("segments_total")
+        if segments:
+            print(f"Сегментов прочитано: {segments.get('read', 0):g}, "
+                  f"отсечено по зонам: {segments.get('skipped', 0):g}")
+        cache = snapshot["result_cache"]
+        print(f"Кэш запросов: попаданий {cache['hits']}, промахов "
+              f"{cache['misses']} ({cache['hit_rate']:.1%})")
+        statements = snapshot["statement_cache"]
+        print(f"Кэш шаблонов команд: попаданий {statements['hits']}, промахов "
+              f"{statements['misses']} ({statements['hit_rate']:.1%})")
+        pool = snapshot["table_pool"]
+        print(f"Пул таблиц: таблиц {pool['tables']}, "
+              f"~{pool['memory_bytes'] / 1024 / 1024:.1f} МиБ, "
+              f"загрузок с диска {total('table_loads_total'):g}")
+
+    def _profile(self, args, user_input, result) -> None:
+        command = user_input[len("profile"):].strip()
+        if len(args) < 2 or args[1] == "profile":
+            return self._fail(result, "Ошибка: используйте формат: profile <команда>")
+        import cProfile
+        import pstats
+        import tracemalloc
+
+        tracing = tracemalloc.is_tracing()
+        if not tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        profiler = cProfile.Profile()
+        profiler.enable()
+        try:
+            self._dispatch(command, result)
+        finally:
+            profiler.disable()
+            after = tracemalloc.take_snapshot()
+            _, peak = tracemalloc.get_traced_memory()
+            if not tracing:
+                tracemalloc.stop()
+
+        print(f"\n*** Профиль: {command} ***")
+        buffer = io.StringIO()
+        stats = pstats.Stats(profiler, stream=buffer)
+        stats.sort_stats("cumulative").print_stats(PROFILE_TOP)
+        print(buffer.getvalue().strip())
+        print(f"\nПиковый объем памяти: {peak / 1024:.1f} КиБ")
+        print("Больше всего памяти выделено в строках:")
+        ignore = (
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+        )
+        allocations = after.filter_traces(ignore).compare_to(
+            before.filter_traces(ignore), "lineno"
+        )
+        for stat in allocations[:PROFILE_TOP]:
+            print(f"  {stat}")
+
+
 def run() -> None:
     """Главный цикл консольного приложения."""
-    metadata = load_metadata(META_FILE)
+    session = Session()
 
     print("\n*** База данных запущена ***")
-    print_help()
+    print("Список команд — help, выход — exit.\n")
 
     while True:
         try:
             user_input = input("Введите команду: ").strip()
         except (EOFError, KeyboardInterrupt):
             print("\nВыход из программы...")
+            session.close()
             break
 
-        if not user_input:
-            continue
+        if session.execute(user_input).exit:
+            break
 
-        args = shlex.split(user_input)
-        cmd = args[0]
 
-        if cmd == "exit":
-            print("Выход из программы...")
-            break
+def _script_commands(lines: Iterable[str]) -> Iterable[str]:
+    """Команды скрипта: без пустых строк, комментариев (#, --) и ';' в конце."""
+    for line in lines:
+        command = line.strip().removesuffix(";").strip()
+        if command and not command.startswith(("#", "--")):
+            yield command
 
-        elif cmd == "help":
-            print_help()
 
-        elif cmd == "list_tables":
-            if metadata:
-                for t in metadata.keys():
-                    print("-", t)
-            else:
-                print("Таблиц пока нет.")
-
-        elif cmd == "create_table":
-            if len(args) < 3:
-                print("Ошибка: недостаточно аргументов.")
-                continue
-            table_name = args[1]
-            columns = args[2:]
-            metadata = create_table(metadata, table_name, columns)
-            save_metadata(META_FILE, metadata)
-
-        elif cmd == "drop_table":
-            if len(args) < 2:
-                print("Ошибка: укажите имя таблицы.")
-                continue
-            table_name = args[1]
-            metadata = drop_table(metadata, table_name)
-            save_metadata(META_FILE, metadata)
-
-        # ---------- CRUD-команды ----------
-        elif cmd == "insert":
-            if len(args) < 5 or args[1] != "into" or args[3] != "values":
-                print("Ошибка: используйте формат: insert into <имя> values (<...>)")
-                continue
-            table_name = args[2]
-            try:
-                after_values = user_input.split("values", maxsplit=1)[1].strip()
-                values = parse_values(after_values)
-            except Exception as e:
-                print(f"Некорректное значение: {e}. Попробуйте снова.")
-                continue
-
-            rows = load_table_data(table_name)
-            rows = core_insert(metadata, table_name, values, rows)
-            save_table_data(table_name, rows)
-
-        elif cmd == "select":
-            if len(args) < 3 or args[1] != "from":
-                print("Ошибка: используйте формат: select from <имя> [where ...]")
-                continue
-            table_name = args[2]
-            rows = load_table_data(table_name)
+def _print_timings(results: list[CommandResult]) -> None:
+    """Вывести время выполнения каждой команды скрипта и итог."""
+    from prettytable import PrettyTable
 
-            where = None
-            if len(args) > 3:
-                if args[3] != "where":
-                    print("Ошибка: используйте формат: select from <имя> [where ...]")
-                    continue
-                where_segment = user_input.split("where", maxsplit=1)[1].strip()
-                try:
-                    where = parse_where(where_segment)
-                except Exception as e:
-                    print(f"Некорректное значение: {e}. Попробуйте снова.")
-                    continue
-
-            result = core_select(rows, where)
-            _print_table(result)
-
-        elif cmd == "update":
-            if len(args) < 5 or args[2] != "set":
-                print("Ошибка: используйте формат: update <имя> set <...> where <...>")
-                continue
-            table_name = args[1]
-            if " where " not in user_input:
-                print("Ошибка: укажите условие where.")
-                continue
-
-            set_segment = (
-                user_input.split(" set ", maxsplit=1)[1]
-                .split(" where ", maxsplit=1)[0]
-                .strip()
-            )
-            where_segment = user_input.split(" where ", maxsplit=1)[1].strip()
-            try:
-                set_clause = parse_set(set_segment)
-                where = parse_where(where_segment)
-            except Exception as e:
-                print(f"Некорректное значение: {e}. Попробуйте снова.")
-                continue
-
-            rows = load_table_data(table_name)
-            rows, count = core_update(rows, set_clause, where)
-            save_table_data(table_name, rows)
-            if count > 0:
-                ids = [
-                    r["ID"]
-                    for r in rows 
-                    if all(r.get(k) == v for k, v in set_clause.items())
-                ]
-                if len(ids) == 1:
-                    print(
-                        f'Запись с ID={ids[0]} в таблице "{table_name}" '
-                        f'успешно обновлена.'
-                    )
-                else:
-                    print(f"Обновлено записей: {count}")
-            else:
-                print("Подходящих записей не найдено.")
-
-        elif cmd == "delete":
-            if len(args) < 4 or args[1] != "from" or args[3] != "where":
-                print("Ошибка: используйте формат: delete from <имя> where <...>")
-                continue
-            table_name = args[2]
-            where_segment = user_input.split("where", maxsplit=1)[1].strip()
-            try:
-                where = parse_where(where_segment)
-            except Exception as e:
-                print(f"Некорректное значение: {e}. Попробуйте снова.")
-                continue
-
-            rows = load_table_data(table_name)
-            rows, count = core_delete(rows, where)
-            save_table_data(table_name, rows)
-            if count == 1:
-                print(f'Запись успешно удалена из таблицы "{table_name}".')
-            elif count > 1:
-                print(f"Удалено записей: {count}")
-            else:
-                print("Подходящих записей не найдено.")
-
-        elif cmd == "info":
-            if len(args) < 2:
-                print("Ошибка: укажите имя таблицы.")
-                continue
-            table_name = args[1]
-            if table_name not in metadata:
-                print(f'Ошибка: Таблица "{table_name}" не существует.')
-                continue
-            schema = metadata[table_name]
-            rows = load_table_data(table_name)
-            cols_str = ", ".join(f"{k}:{v}" for k, v in schema.items())
-            print(f"Таблица: {table_name}")
-            print(f"Столбцы: {cols_str}")
-            print(f"Количество записей: {len(rows)}")
+    table = PrettyTable()
+    table.field_names = ["№", "Команда", "Статус", "Время, мс"]
+    table.align["Команда"] = "l"
+    for number, r in enumerate(results, start=1):
+        command = r.command if len(r.command) <= 60 else r.command[:57] + "..."
+        status = "ok" if r.ok else "ошибка"
+        table.add_row([number, command, status, f"{r.elapsed * 1000:.3f}"])
+    print(table)
+    total = sum(r.elapsed for r in results)
+    rate = len(results) / total if total else 0.0
+    print(
+        f"Выполнено команд: {len(results)} за {total:.3f} с "
+        f"({rate:.1f} команд/с), ошибок: {sum(not r.ok for r in results)}."
+    )
+
+
+def run_script(lines: Iterable[str], auto_confirm: bool = False) -> bool:
+    """
+    Выполнить команды подряд без интерактивного ввода.
 
+    Таблицы остаются в памяти между командами; при auto_confirm опасные
+    действия выполняются без вопроса. В конце выводится время каждой
+    команды. Возвращает True, если все команды выполнены без ошибок.
+    """
+    set_auto_confirm(auto_confirm)
+    session = Session()
+    results: list[CommandResult] = []
+    try:
+        for command in _script_commands(lines):
+            result = session.execute(command)
+            results.append(result)
+            if result.exit:
+                break
         else:
-            print(f"Функции {cmd!r} нет. Попробуйте снова.")
+            session.close()
+    finally:
+        set_auto_confirm(False)
+    _print_timings(results)
+    return all(r.ok for r in results)
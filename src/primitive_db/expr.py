@@ -0,0 +1,326 @@
+import operator
+from functools import lru_cache
+from typing import Any, Callable
+
+from src.primitive_db.constants import STATEMENT_CACHE_SIZE
+from src.primitive_db.parser import (
+    Param,
+    Token,
+    bind,
+    parameterize,
+    parse_literal,
+    tokenize,
+)
+
+Predicate = Callable[[dict], bool]
+
+_MISSING = object()
+_OPERATORS: dict[str, Callable[[Any, Any], bool]] = {
+    "=": operator.eq,
+    "!=": operator.ne,
+    "<": operator.lt,
+    "<=": operator.le,
+    ">": operator.gt,
+    ">=": operator.ge,
+}
+
+
+class Expr:
+    """Узел условия where."""
+
+    def compile(self) -> Predicate:
+        """Собрать условие в функцию row → bool."""
+        raise NotImplementedError
+
+    def equalities(self) -> dict:
+        """Равенства верхнего уровня (конъюнкция), пригодные для индексов."""
+        return {}
+
+    def columns(self) -> set[str]:
+        raise NotImplementedError
+
+    def map_columns(self, rename: Callable[[str], str]) -> "Expr":
+        """Копия условия со столбцами, переименованными функцией rename."""
+        raise NotImplementedError
+
+    def bind(self, params: list[Any]) -> "Expr":
+        """Копия условия шаблона со значениями params вместо Param."""
+        raise NotImplementedError
+
+
+class Compare(Expr):
+    def __init__(self, column: str, op: str, value: Any):
+        self.column = column
+        self.op = "!=" if op == "<>" else op
+        self.value = value
+
+    def compile(self) -> Predicate:
+        column, value = self.column, self.value
+        if self.op == "=":
+            return lambda row: row.get(column, _MISSING) == value
+        if self.op == "!=":
+            return lambda row: column in row and row[column] != value
+        compare = _OPERATORS[self.op]
+
+        def predicate(row: dict) -> bool:
+            try:
+                return compare(row[column], value)
+            except (KeyError, TypeError):
+                return False
+
+        return predicate
+
+    def equalities(self) -> dict:
+        return {self.column: self.value} if self.op == "=" else {}
+
+    def columns(self) -> set[str]:
+        return {self.column}
+
+    def map_columns(self, rename: Callable[[str], str]) -> Expr:
+        return Compare(rename(self.column), self.op, self.value)
+
+    def bind(self, params: list[Any]) -> Expr:
+        return Compare(self.column, self.op, bind(self.value, params))
+
+    def __repr__(self) -> str:
+        return f"{self.column} {self.op} {self.value!r}"
+
+
+class InList(Expr):
+    def __init__(self, column: str, values: list[Any]):
+        self.column = column
+        self.values = values
+
+    def compile(self) -> Predicate:
+        column = self.column
+        try:
+            values: Any = frozenset(self.values)
+        except TypeError:
+            values = list(self.values)
+        return lambda row: row.get(column, _MISSING) in values
+
+    def columns(self) -> set[str]:
+        return {self.column}
+
+    def map_columns(self, rename: Callable[[str], str]) -> Expr:
+        return InList(rename(self.column), self.values)
+
+    def bind(self, params: list[Any]) -> Expr:
+        return InList(self.column, [bind(v, params) for v in self.values])
+
+    def __repr__(self) -> str:
+        return f"{self.column} in ({', '.join(map(repr, self.values))})"
+
+
+class Between(Expr):
+    def __init__(self, column: str, low: Any, high: Any):
+        self.column = column
+        self.low = low
+        self.high = high
+
+    def compile(self) -> Predicate:
+        column, low, high = self.column, self.low, self.high
+
+        def predicate(row: dict) -> bool:
+            try:
+                return low <= row[column] <= high
+            except (KeyError, TypeError):
+                return False
+
+        return predicate
+
+    def columns(self) -> set[str]:
+        return {self.column}
+
+    def map_columns(self, rename: Callable[[str], str]) -> Expr:
+        return Between(rename(self.column), self.low, self.high)
+
+    def bind(self, params: list[Any]) -> Expr:
+        return Between(self.column, bind(self.low, params), bind(self.high, params))
+
+    def __repr__(self) -> str:
+        return f"{self.column} between {self.low!r} and {self.high!r}"
+
+
+class And(Expr):
+    def __init__(self, items: list[Expr]):
+        self.items = items
+
+    def compile(self) -> Predicate:
+        predicates = [item.compile() for item in self.items]
+        if len(predicates) == 2:
+            first, second = predicates
+            return lambda row: first(row) and second(row)
+        return lambda row: all(p(row) for p in predicates)
+
+    def equalities(self) -> dict:
+        result: dict = {}
+        for item in self.items:
+            result.update(item.equalities())
+        return result
+
+    def columns(self) -> set[str]:
+        return set().union(*(item.columns() for item in self.items))
+
+    def map_columns(self, rename: Callable[[str], str]) -> Expr:
+        return And([item.map_columns(rename) for item in self.items])
+
+    def bind(self, params: list[Any]) -> Expr:
+        return And([item.bind(params) for item in self.items])
+
+    def __repr__(self) -> str:
+        return "(" + " and ".join(map(repr, self.items)) + ")"
+
+
+class Or(Expr):
+    def __init__(self, items: list[Expr]):
+        self.items = items
+
+    def compile(self) -> Predicate:
+        predicates = [item.compile() for item in self.items]
+        return lambda row: any(p(row) for p in predicates)
+
+    def columns(self) -> set[str]:
+        return set().union(*(item.columns() for item in self.items))
+
+    def map_columns(self, rename: Callable[[str], str]) -> Expr:
+        return Or([item.map_columns(rename) for item in self.items])
+
+    def bind(self, params: list[Any]) -> Expr:
+        return Or([item.bind(params) for item in self.items])
+
+    def __repr__(self) -> str:
+        return "(" + " or ".join(map(repr, self.items)) + ")"
+
+
+def from_dict(where: dict) -> Expr:
+    """{'age': 28, 'name': 'A'} → age = 28 and name = 'A'."""
+    items: list[Expr] = [Compare(k, "=", v) for k, v in where.items()]
+    return items[0] if len(items) == 1 else And(items)
+
+
+def to_expr(where: "dict | Expr | None") -> Expr | None:
+    if where is None or isinstance(where, Expr):
+        return where
+    return from_dict(where) if where else None
+
+
+def compile_where(where: "dict | Expr | None") -> Predicate:
+    """Скомпилировать where (словарь равенств или Expr) в функцию."""
+    expr = to_expr(where)
+    if expr is None:
+        return lambda row: True
+    return expr.compile()
+
+
+class _Parser:
+    def __init__(self, tokens: list[Token] | tuple[Token, ...]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> tuple[str, str] | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def peek_word(self) -> str | None:
+        token = self.peek()
+        if token is not None and token[0] == "word":
+            return token[1].lower()
+        return None
+
+    def take(self, kind: str | None = None, value: str | None = None) -> str:
+        if self.pos >= len(self.tokens):
+            raise ValueError("Неожиданный конец условия.")
+        tok_kind, tok_value = self.tokens[self.pos]
+        if (kind and tok_kind != kind) or (
+            value and tok_value.lower() != value
+        ):
+            raise ValueError(f"Ожидалось {value or kind}, получено: {tok_value!r}")
+        self.pos += 1
+        return tok_value
+
+    def literal(self) -> Any:
+        kind, value = self.peek() or ("", "")
+        if kind not in ("str", "word", "param"):
+            raise ValueError(f"Ожидалось значение, получено: {value!r}")
+        self.pos += 1
+        return Param(int(value)) if kind == "param" else parse_literal(value)
+
+    def parse(self) -> Expr:
+        expr = self.or_expr()
+        if self.pos != len(self.tokens):
+            raise ValueError(f"Лишний фрагмент условия: {self.tokens[self.pos][1]!r}")
+        return expr
+
+    def or_expr(self) -> Expr:
+        items = [self.and_expr()]
+        while self.peek_word() == "or":
+            self.pos += 1
+            items.append(self.and_expr())
+        return items[0] if len(items) == 1 else Or(items)
+
+    def and_expr(self) -> Expr:
+        items = [self.atom()]
+        while self.peek_word() == "and":
+            self.pos += 1
+            items.append(self.atom())
+        return items[0] if len(items) == 1 else And(items)
+
+    def atom(self) -> Expr:
+        if self.peek() == ("punct", "("):
+            self.pos += 1
+            expr = self.or_expr()
+            self.take("punct", ")")
+            return expr
+        column = self.take("word")
+        keyword = self.peek_word()
+        if keyword == "in":
+            self.pos += 1
+            self.take("punct", "(")
+            values = [self.literal()]
+            while self.peek() == ("punct", ","):
+                self.pos += 1
+                values.append(self.literal())
+            self.take("punct", ")")
+            return InList(column, values)
+        if keyword == "between":
+            self.pos += 1
+            low = self.literal()
+            self.take("word", "and")
+            high = self.literal()
+            return Between(column, low, high)
+        op = self.take("op")
+        return Compare(column, op, self.literal())
+
+
+def parse_tokens(tokens: list[Token] | tuple[Token, ...]) -> Expr:
+    """Разобрать условие из готовых токенов (в том числе шаблона с Param)."""
+    return _Parser(tokens).parse()
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _prepare_condition(template: tuple[Token, ...]) -> Expr:
+    return parse_tokens(template)
+
+
+def parse_condition(text: str) -> Expr:
+    """
+    Разобрать условие where: сравнения (=, !=, <, <=, >, >=), IN, BETWEEN,
+    AND, OR и скобки. 'age >= 18 and name in ("A", "B")' → Expr.
+
+    Условия, отличающиеся только значениями, разбираются один раз: шаблон
+    кэшируется, а значения подставляются через bind.
+    """
+    tokens = tokenize(text)
+    template, params = parameterize(tokens)
+    try:
+        expr = _prepare_condition(template)
+    except ValueError:
+        # Сообщение об ошибке — по исходным токенам, а не по шаблону.
+        return parse_tokens(tokens)
+    return expr.bind(params)
+
+
+def condition_cache_info() -> dict[str, int]:
+    """Статистика кэша шаблонов условий."""
+    info = _prepare_condition.cache_info()
+    return {"hits": info.hits, "misses": info.misses, "entries": info.currsize}
@@ -0,0 +1,346 @@
+import json
+from bisect import bisect_left, bisect_right, insort
+from typing import Any, Iterator
+
+from src.primitive_db.storage import get_table_log
+from src.primitive_db.utils import load_metadata, save_metadata
+
+
+def _encode(value: Any) -> str:
+    """Значение столбца → ключ JSON-объекта."""
+    return json.dumps(value, ensure_ascii=False)
+
+
+class HashIndex:
+    """Хеш-индекс по столбцу: значение → множество ID строк."""
+
+    def __init__(self, column: str):
+        self.column = column
+        self.buckets: dict[Any, set[int]] = {}
+
+    def build(self, rows: list[dict]) -> None:
+        self.buckets = {}
+        for row in rows:
+            self.add(row)
+
+    def add(self, row: dict) -> None:
+        self.buckets.setdefault(row.get(self.column), set()).add(row["ID"])
+
+    def remove(self, row: dict) -> None:
+        ids = self.buckets.get(row.get(self.column))
+        if ids is not None:
+            ids.discard(row["ID"])
+            if not ids:
+                del self.buckets[row.get(self.column)]
+
+    def lookup(self, value: Any) -> set[int]:
+        return self.buckets.get(value, set())
+
+    def to_json(self) -> dict:
+        return {_encode(v): sorted(ids) for v, ids in self.buckets.items()}
+
+    @classmethod
+    def from_json(cls, column: str, data: dict) -> "HashIndex":
+        index = cls(column)
+        index.buckets = {json.loads(k): set(ids) for k, ids in data.items()}
+        return index
+
+
+class SortedIndex:
+    """
+    Упорядоченный индекс по столбцу: отсортированный список пар
+    (значение, ID). Диапазон значений находится двоичным поиском.
+    """
+
+    def __init__(self, column: str):
+        self.column = column
+        self.entries: list[tuple[Any, int]] = []
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def build(self, rows: list[dict]) -> None:
+        self.entries = []
+        self.add_many(rows)
+
+    def add(self, row: dict) -> None:
+        value = row.get(self.column)
+        if value is not None:
+            insort(self.entries, (value, row["ID"]))
+
+    def add_many(self, rows: list[dict]) -> None:
+        """Добавить много строк: дописать и досортировать (timsort сольет)."""
+        column = self.column
+        self.entries.extend(
+            (r[column], r["ID"]) for r in rows if r.get(column) is not None
+        )
+        self.entries.sort()
+
+    def remove(self, row: dict) -> None:
+        value = row.get(self.column)
+        if value is None:
+            return
+        entry = (value, row["ID"])
+        pos = bisect_left(self.entries, entry)
+        if pos < len(self.entries) and self.entries[pos] == entry:
+            del self.entries[pos]
+
+    def bounds(
+        self,
+        low: Any = None,
+        high: Any = None,
+        low_inclusive: bool = True,
+        high_inclusive: bool = True,
+    ) -> tuple[int, int]:
+        """
+        Границы [start, end) записей со значением между low и high
+        (None — без ограничения с этой стороны).
+        """
+        start, end = 0, len(self.entries)
+        if low is not None:
+            if low_inclusive:
+                start = bisect_left(self.entries, (low,))
+            else:
+                start = bisect_right(self.entries, (low, float("inf")))
+        if high is not None:
+            if high_inclusive:
+                end = bisect_right(self.entries, (high, float("inf")))
+            else:
+                end = bisect_left(self.entries, (high,))
+        return start, max(start, end)
+
+    def ids(self, start: int, end: int) -> set[int]:
+        return {entry[1] for entry in self.entries[start:end]}
+
+    def iter_ids(self, descending: bool = False) -> Iterator[int]:
+        """
+        ID в порядке значений. При descending значения идут по убыванию,
+        а строки с равными значениями — по возрастанию ID, как у
+        устойчивой сортировки.
+        """
+        entries = self.entries
+        if not descending:
+            for entry in entries:
+                yield entry[1]
+            return
+        end = len(entries)
+        while end > 0:
+            start = bisect_left(entries, (entries[end - 1][0],), 0, end)
+            for pos in range(start, end):
+                yield entries[pos][1]
+            end = start
+
+    def to_json(self) -> list:
+        return [list(entry) for entry in self.entries]
+
+    @classmethod
+    def from_json(cls, column: str, data: list) -> "SortedIndex":
+        index = cls(column)
+        index.entries = [tuple(entry) for entry in data]
+        return index
+
+
+class TableIndexes:
+    """
+    Индексы одной таблицы, привязанные к списку ее строк в памяти:
+    первичный ключ (ID → строка и счетчик следующего ID), хеш-индексы
+    и упорядоченные индексы.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.hash: dict[str, HashIndex] = {}
+        self.sorted: dict[str, SortedIndex] = {}
+        self.rows: list[dict] | None = None
+        self.by_id: dict[int, dict] = {}
+        self.next_id = 1
+        self._persisted: dict = {}
+
+    def _fingerprint(self) -> list:
+        """Отпечаток файлов таблицы, по которому проверяется свежесть индекса."""
+        return [list(item) for item in get_table_log(self.table_name).signature()]
+
+    def attach(self, rows: list[dict]) -> None:
+        """Привязать индексы к загруженным строкам (перестроив устаревшие)."""
+        self.rows = rows
+        self.by_id = {r["ID"]: r for r in rows}
+        self.next_id = max(
+            self.next_id,
+            self._persisted.get("next_id", 1),
+            get_table_log(self.table_name).next_id,
+            max(self.by_id, default=0) + 1,
+        )
+        fresh = self._persisted.get("fingerprint") == self._fingerprint()
+        for column, index in self.hash.items():
+            stored = self._persisted.get("columns", {}).get(column)
+            if fresh and stored is not None:
+                self.hash[column] = HashIndex.from_json(column, stored)
+            else:
+                index.build(rows)
+        for column, index in self.sorted.items():
+            stored = self._persisted.get("sorted", {}).get(column)
+            if fresh and stored is not None:
+                self.sorted[column] = SortedIndex.from_json(column, stored)
+            else:
+                index.build(rows)
+        self._persisted = {}
+
+    def _all(self) -> list[HashIndex | SortedIndex]:
+        return [*self.hash.values(), *self.sorted.values()]
+
+    def create(self, column: str, rows: list[dict], kind: str = "hash") -> None:
+        if kind == "sorted":
+            self.sorted[column] = SortedIndex(column)
+        else:
+            self.hash[column] = HashIndex(column)
+        self.attach(rows)
+
+    def is_attached(self, rows: list[dict]) -> bool:
+        return self.rows is rows
+
+    def row_count(self) -> int | None:
+        """
+        Число строк по индексу ID; без загрузки таблицы — сохраненное
+        значение, если файлы таблицы с тех пор не менялись.
+        """
+        if self.rows is not None:
+            return len(self.by_id)
+        if self._persisted.get("fingerprint") == self._fingerprint():
+            return self._persisted.get("row_count")
+        return None
+
+    def allocate_id(self) -> int:
+        """Выдать следующий ID; удаленные ID повторно не выдаются."""
+        return self.allocate_ids(1)[0]
+
+    def allocate_ids(self, count: int) -> range:
+        """Выдать сразу count последовательных ID."""
+        ids = range(self.next_id, self.next_id + count)
+        self.next_id += count
+        return ids
+
+    def on_insert(self, row: dict) -> None:
+        self.by_id[row["ID"]] = row
+        for index in self._all():
+            index.add(row)
+
+    def on_insert_many(self, rows: list[dict]) -> None:
+        for row in rows:
+            self.by_id[row["ID"]] = row
+        for index in self.hash.values():
+            for row in rows:
+                index.add(row)
+        for index in self.sorted.values():
+            index.add_many(rows)
+
+    def on_update(self, old: dict, row: dict) -> None:
+        for index in self._all():
+            if old.get(index.column) != row.get(index.column):
+                index.remove(old)
+                index.add(row)
+
+    def on_delete(self, removed: list[dict], rows: list[dict]) -> None:
+        for row in removed:
+            self.by_id.pop(row["ID"], None)
+        if len(removed) > len(rows):
+            for index in self._all():
+                index.build(rows)
+        else:
+            for row in removed:
+                for index in self._all():
+                    index.remove(row)
+        self.rows = rows
+
+    def to_json(self) -> dict:
+        if self.rows is None:
+            return self._persisted
+        return {
+            "next_id": self.next_id,
+            "row_count": len(self.by_id),
+            "fingerprint": self._fingerprint(),
+            "columns": {c: i.to_json() for c, i in self.hash.items()},
+            "sorted": {c: i.to_json() for c, i in self.sorted.items()},
+        }
+
+
+class IndexRegistry:
+    """
+    Реестр индексов всех таблиц, хранится рядом с db_meta.json.
+
+    Файл индексов читается при первом обращении к ним, а не при запуске,
+    и записывается, только если индексы привязывались к таблицам или
+    менялись: команды, не трогающие таблицы (help, list_tables), его
+    не открывают.
+    """
+
+    def __init__(self):
+        self._tables: dict[str, TableIndexes] = {}
+        self._pending: str | None = None
+        self._changed = False
+
+    def load(self, filepath: str) -> None:
+        """Сбросить индексы и отложить чтение filepath до первого обращения."""
+        self._tables = {}
+        self._pending = filepath
+        self._changed = False
+
+    def _loaded(self) -> dict[str, TableIndexes]:
+        if self._pending is not None:
+            filepath, self._pending = self._pending, None
+            for table_name, data in load_metadata(filepath).items():
+                table = self._tables[table_name] = TableIndexes(table_name)
+                table.hash = {c: HashIndex(c) for c in data.get("columns", {})}
+                table.sorted = {c: SortedIndex(c) for c in data.get("sorted", {})}
+                table._persisted = data
+        return self._tables
+
+    def save(self, filepath: str) -> None:
+        if not self._changed:
+            return
+        save_metadata(
+            filepath,
+            {name: t.to_json() for name, t in self._loaded().items()},
+        )
+
+    def get(self, table_name: str, rows: list[dict]) -> TableIndexes | None:
+        """Индексы таблицы, если они есть и привязаны к этим строкам."""
+        table = self._loaded().get(table_name)
+        if table is None or not table.is_attached(rows):
+            return None
+        return table
+
+    def next_id(self, table_name: str) -> int | None:
+        """Счетчик следующего ID таблицы, если ее строки привязаны к индексам."""
+        table = self._loaded().get(table_name)
+        return table.next_id if table and table.rows is not None else None
+
+    def columns(self, table_name: str) -> list[str]:
+        table = self._loaded().get(table_name)
+        return [*table.hash, *table.sorted] if table else []
+
+    def row_count(self, table_name: str) -> int | None:
+        table = self._loaded().get(table_name)
+        return table.row_count() if table else None
+
+    def attach(self, table_name: str, rows: list[dict]) -> None:
+        table = self._loaded().setdefault(table_name, TableIndexes(table_name))
+        table.attach(rows)
+        self._changed = True
+
+    def create(
+        self,
+        table_name: str,
+        column: str,
+        rows: list[dict],
+        kind: str = "hash",
+    ) -> None:
+        table = self._loaded().setdefault(table_name, TableIndexes(table_name))
+        table.create(column, rows, kind)
+        self._changed = True
+
+    def drop_table(self, table_name: str) -> None:
+        if self._loaded().pop(table_name, None) is not None:
+            self._changed = True
+
+
+index_registry = IndexRegistry()
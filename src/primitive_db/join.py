@@ -0,0 +1,228 @@
+import heapq
+from itertools import islice
+from typing import Any, Callable, Iterator
+
+from src.primitive_db.binary_format import BinaryTable
+from src.primitive_db.core import select_stream
+from src.primitive_db.expr import And, Expr, compile_where
+from src.primitive_db.indexes import index_registry
+from src.primitive_db.metrics import metrics
+
+Lookup = Callable[[Any], list[dict]]
+
+
+class JoinSide:
+    """Таблица в соединении: строки, столбец из on и условие только по ней."""
+
+    def __init__(
+        self,
+        table: str,
+        rows: list[dict] | BinaryTable,
+        column: str,
+        where: Expr | None = None,
+    ):
+        self.table = table
+        self.rows = rows
+        self.column = column
+        self.where = where
+
+
+class JoinPlan:
+    """
+    План соединения: build — сторона, по которой ищутся пары,
+    probe — сторона, строки которой перебираются потоком.
+
+    index — у build есть индекс по столбцу соединения, хеш-таблица не
+    строится; hash — хеш-таблица строится по меньшей стороне.
+    """
+
+    def __init__(
+        self,
+        strategy: str,
+        build: JoinSide,
+        probe: JoinSide,
+        lookup: Lookup | None = None,
+    ):
+        self.strategy = strategy
+        self.build = build
+        self.probe = probe
+        self.lookup = lookup
+
+    def __repr__(self) -> str:
+        build, probe = self.build, self.probe
+        if self.strategy == "index":
+            return (
+                f"index_join [перебор {probe.table}, "
+                f"индекс {build.table}.{build.column}]"
+            )
+        return (
+            f"hash_join [хеш-таблица по {build.table}.{build.column} "
+            f"(~{len(build.rows)} строк), перебор {probe.table}]"
+        )
+
+
+def qualify(column: str, schemas: dict[str, dict[str, str]]) -> str:
+    """
+    Полное имя столбца соединения: 'таблица.столбец' проверяется,
+    а 'столбец' дополняется таблицей, если он есть только в одной из них.
+    """
+    table, dot, name = column.rpartition(".")
+    if dot:
+        if name not in schemas.get(table, {}):
+            raise ValueError(f'Ошибка: Столбец "{column}" не найден.')
+        return column
+    owners = [t for t, schema in schemas.items() if column in schema]
+    if not owners:
+        raise ValueError(f'Ошибка: Столбец "{column}" не найден.')
+    if len(owners) > 1:
+        raise ValueError(
+            f'Ошибка: Столбец "{column}" есть в нескольких таблицах, '
+            "укажите таблицу: <таблица>.<столбец>."
+        )
+    return f"{owners[0]}.{column}"
+
+
+def split_where(
+    expr: Expr | None,
+    schemas: dict[str, dict[str, str]],
+) -> tuple[dict[str, Expr | None], Expr | None]:
+    """
+    Разнести условие where соединения по таблицам.
+
+    Столбцы пишутся как 'таблица.столбец' или просто 'столбец' (см.
+    qualify). Части конъюнкции, зависящие от одной таблицы, проверяются
+    при ее просмотре (и могут использовать ее индексы); остальное — на
+    соединенных строках. Возвращает ({таблица: условие}, остаток).
+    """
+    pushed: dict[str, list[Expr]] = {table: [] for table in schemas}
+    if expr is None:
+        return {table: None for table in schemas}, None
+
+    expr = expr.map_columns(lambda column: qualify(column, schemas))
+    residual: list[Expr] = []
+    for item in expr.items if isinstance(expr, And) else [expr]:
+        tables = {column.rpartition(".")[0] for column in item.columns()}
+        if len(tables) == 1:
+            table = tables.pop()
+            pushed[table].append(
+                item.map_columns(lambda column: column.rpartition(".")[2])
+            )
+        else:
+            residual.append(item)
+
+    def combine(items: list[Expr]) -> Expr | None:
+        if not items:
+            return None
+        return items[0] if len(items) == 1 else And(items)
+
+    return {t: combine(items) for t, items in pushed.items()}, combine(residual)
+
+
+def _index_lookup(side: JoinSide) -> Lookup | None:
+    """Поиск строк стороны по значению столбца соединения через индекс."""
+    if not isinstance(side.rows, list):
+        return None
+    indexes = index_registry.get(side.table, side.rows)
+    if indexes is None:
+        return None
+    by_id = indexes.by_id
+    if side.column == "ID":
+        return lambda value: [by_id[value]] if value in by_id else []
+    hash_index = indexes.hash.get(side.column)
+    if hash_index is not None:
+        return lambda value: [by_id[i] for i in sorted(hash_index.lookup(value))]
+    sorted_index = indexes.sorted.get(side.column)
+    if sorted_index is None:
+        return None
+
+    def lookup(value: Any) -> list[dict]:
+        try:
+            start, end = sorted_index.bounds(value, value)
+        except TypeError:
+            return []
+        return [by_id[entry[1]] for entry in sorted_index.entries[start:end]]
+
+    return lookup
+
+
+def plan_join(left: JoinSide, right: JoinSide) -> JoinPlan:
+    """
+    Выбрать план: если у стороны есть индекс по столбцу соединения, пары
+    ищутся по нему (при индексах с обеих сторон — по большей стороне),
+    иначе хеш-таблица строится по меньшей стороне.
+    """
+    by_size = sorted((left, right), key=lambda side: len(side.rows))
+    for build in reversed(by_size):
+        lookup = _index_lookup(build)
+        if lookup is not None:
+            probe = right if build is left else left
+            return JoinPlan("index", build, probe, lookup)
+    return JoinPlan("hash", by_size[0], by_size[1])
+
+
+def join_stream(
+    plan: JoinPlan,
+    left_table: str,
+    residual: Expr | None = None,
+    limit: int | None = None,
+    offset: int = 0,
+    order_by: str | None = None,
+    descending: bool = False,
+) -> Iterator[dict]:
+    """
+    Выполнить соединение по плану и потоково отдавать строки результата
+    с ключами 'таблица.столбец' (сначала столбцы левой таблицы).
+
+    Строки probe перебираются по одной, поэтому в памяти помимо
+    хеш-таблицы меньшей стороны находится только текущая строка.
+    С order_by результат упорядочивается, как в select.
+    """
+    build, probe = plan.build, plan.probe
+    metrics.add("access_total", label=f"{plan.strategy}_join")
+    if plan.strategy == "index":
+        keep = compile_where(build.where)
+        lookup = plan.lookup
+
+        def matches(value: Any) -> list[dict]:
+            return [row for row in lookup(value) if keep(row)]
+    else:
+        table: dict[Any, list[dict]] = {}
+        for row in select_stream(build.rows, build.where, build.table):
+            key = row.get(build.column)
+            if key is not None:
+                table.setdefault(key, []).append(row)
+
+        def matches(value: Any) -> list[dict]:
+            return table.get(value, [])
+
+    probe_is_left = probe.table == left_table
+    left_name = left_table
+    right_name = build.table if probe_is_left else probe.table
+    accept = compile_where(residual)
+
+    def joined() -> Iterator[dict]:
+        for row in select_stream(probe.rows, probe.where, probe.table):
+            key = row.get(probe.column)
+            if key is None:
+                continue
+            for other in matches(key):
+                left_row, right_row = (row, other) if probe_is_left else (other, row)
+                result = {f"{left_name}.{k}": v for k, v in left_row.items()}
+                for k, v in right_row.items():
+                    result[f"{right_name}.{k}"] = v
+                if accept(result):
+                    yield result
+
+    stop = None if limit is None else offset + limit
+    rows = joined()
+    if order_by is not None:
+
+        def sort_key(row: dict) -> Any:
+            return row[order_by]
+
+        if stop is not None:
+            pick = heapq.nlargest if descending else heapq.nsmallest
+            rows = iter(pick(stop, rows, key=sort_key))
+        else:
+            rows = iter(sorted(rows, key=sort_key, reverse=descending))
+    return islice(rows, offset, stop)
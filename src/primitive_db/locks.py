@@ -0,0 +1,80 @@
+import os
+import threading
+from contextlib import contextmanager
+from typing import Iterator
+
+try:
+    import fcntl
+except ImportError:  # Windows: блокировки между процессами недоступны
+    fcntl = None
+
+
+class FileLock:
+    """
+    Блокировка «читатели/писатель» на файле через flock.
+
+    shared() могут держать несколько процессов сразу, exclusive() — только
+    один. Каждый поток открывает свой дескриптор, поэтому блокировка
+    действует и между потоками одного процесса; повторный захват тем же
+    потоком только увеличивает счетчик (поэтому объект на путь один —
+    см. get_file_lock). Без fcntl блокировка ничего не делает.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self._local = threading.local()
+
+    @contextmanager
+    def shared(self) -> Iterator[None]:
+        with self._hold(exclusive=False):
+            yield
+
+    @contextmanager
+    def exclusive(self) -> Iterator[None]:
+        with self._hold(exclusive=True):
+            yield
+
+    @contextmanager
+    def _hold(self, exclusive: bool) -> Iterator[None]:
+        state = self._local
+        depth = getattr(state, "depth", 0)
+        if depth:
+            if exclusive and not state.exclusive:
+                raise RuntimeError(
+                    f"Нельзя повысить разделяемую блокировку {self.path} "
+                    "до исключительной."
+                )
+            state.depth += 1
+            try:
+                yield
+            finally:
+                state.depth -= 1
+            return
+
+        fd = None
+        if fcntl is not None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            fcntl.flock(fd, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        state.depth, state.exclusive = 1, exclusive
+        try:
+            yield
+        finally:
+            state.depth = 0
+            if fd is not None:
+                fcntl.flock(fd, fcntl.LOCK_UN)
+                os.close(fd)
+
+
+_locks: dict[str, FileLock] = {}
+_locks_guard = threading.Lock()
+
+
+def get_file_lock(path: str) -> FileLock:
+    """Вернуть (создав при необходимости) блокировку файла path."""
+    key = os.path.abspath(path)
+    with _locks_guard:
+        lock = _locks.get(key)
+        if lock is None:
+            lock = _locks[key] = FileLock(path)
+        return lock
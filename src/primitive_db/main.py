@@ -1,10 +1,176 @@
 #!/usr/bin/env python3
-from src.primitive_db.engine import run
+import argparse
+import sys
+
+from src.primitive_db.buffer_pool import table_pool
+from src.primitive_db.constants import (
+    BENCH_OPERATIONS,
+    BENCH_SCHEMA,
+    BENCH_SIZES,
+    SERVER_HOST,
+    SERVER_PORT,
+    TABLE_FORMATS,
+    TABLE_POOL_FLUSH_EVERY,
+    TABLE_POOL_MEMORY_BUDGET,
+    WAL_COMPACT_THRESHOLD,
+    WAL_FSYNC_BATCH,
+)
+from src.primitive_db.metrics import metrics
+from src.primitive_db.parallel import parallel_scan
+from src.primitive_db.storage import configure_storage
 
 
 def main() -> None:
-    """Точка входа в приложение — запуск базы данных."""
-    run()
+    """
+    Точка входа в приложение — запуск базы данных.
+
+    Модули режимов (сервер, замеры, консоль) импортируются только для
+    выбранного режима, чтобы не замедлять запуск.
+    """
+    parser = argparse.ArgumentParser(prog="database")
+    parser.add_argument(
+        "mode",
+        nargs="?",
+        choices=["serve", "bench"],
+        help="serve — запустить сервер базы данных, bench — замеры производительности",
+    )
+    parser.add_argument(
+        "--script",
+        metavar="FILE",
+        help="выполнить команды из файла ('-' — из stdin) и выйти",
+    )
+    parser.add_argument(
+        "-y",
+        "--yes",
+        action="store_true",
+        help="не запрашивать подтверждение опасных действий",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        metavar="N",
+        help="число процессов для просмотра больших таблиц (1 — без параллелизма)",
+    )
+    parser.add_argument(
+        "--socket",
+        metavar="PATH",
+        help="serve: слушать Unix-сокет PATH вместо TCP",
+    )
+    parser.add_argument(
+        "--host",
+        default=SERVER_HOST,
+        help=f"serve: адрес TCP (по умолчанию {SERVER_HOST})",
+    )
+    parser.add_argument(
+        "--port",
+        type=int,
+        default=SERVER_PORT,
+        help=f"serve: порт TCP (по умолчанию {SERVER_PORT})",
+    )
+    parser.add_argument(
+        "--rows",
+        default=BENCH_SIZES,
+        help=f"bench: размеры таблиц через запятую (по умолчанию {BENCH_SIZES})",
+    )
+    parser.add_argument(
+        "--ops",
+        type=int,
+        default=BENCH_OPERATIONS,
+        help=f"bench: число операций каждого вида (по умолчанию {BENCH_OPERATIONS})",
+    )
+    parser.add_argument(
+        "--schema",
+        default=BENCH_SCHEMA,
+        help=f'bench: столбцы таблицы (по умолчанию "{BENCH_SCHEMA}")',
+    )
+    parser.add_argument(
+        "--format",
+        choices=sorted(TABLE_FORMATS),
+        default="json",
+        help="bench: формат хранения таблиц",
+    )
+    parser.add_argument(
+        "--output",
+        metavar="FILE",
+        help="bench: записать результаты JSON в файл вместо stdout",
+    )
+    parser.add_argument(
+        "--metrics",
+        metavar="FILE",
+        help="при выходе записать метрики в FILE (.prom — формат Prometheus, "
+        "иначе JSON)",
+    )
+    parser.add_argument(
+        "--compact-threshold",
+        type=int,
+        metavar="N",
+        help="уплотнять журнал таблицы после N записей "
+        f"(по умолчанию {WAL_COMPACT_THRESHOLD})",
+    )
+    parser.add_argument(
+        "--fsync-batch",
+        type=int,
+        metavar="N",
+        help="вызывать fsync раз в N записей журнала (0 — не вызывать, "
+        f"по умолчанию {WAL_FSYNC_BATCH})",
+    )
+    parser.add_argument(
+        "--pool-memory",
+        type=int,
+        metavar="MIB",
+        help="бюджет памяти пула таблиц в МиБ "
+        f"(по умолчанию {TABLE_POOL_MEMORY_BUDGET // 2**20})",
+    )
+    parser.add_argument(
+        "--flush-every",
+        type=int,
+        metavar="N",
+        help="записывать изменения в журнал раз в N мутаций (0 — при вытеснении "
+        f"и выходе, по умолчанию {TABLE_POOL_FLUSH_EVERY})",
+    )
+    args = parser.parse_args()
+    for option in ("compact_threshold", "fsync_batch", "pool_memory", "flush_every"):
+        if (getattr(args, option) or 0) < 0:
+            parser.error(f"--{option.replace('_', '-')}: ожидается число не меньше 0")
+    parallel_scan.configure(workers=args.workers)
+    configure_storage(
+        compact_threshold=args.compact_threshold,
+        fsync_batch=args.fsync_batch,
+    )
+    table_pool.configure(
+        memory_budget=None if args.pool_memory is None else args.pool_memory * 2**20,
+        flush_every=args.flush_every,
+    )
+    metrics.configure(dump_file=args.metrics)
+
+    if args.mode == "serve":
+        from src.primitive_db.server import serve
+
+        serve(args.socket, args.host, args.port)
+        return
+
+    if args.mode == "bench":
+        from src.primitive_db.bench import run_bench
+
+        try:
+            sizes = [int(size) for size in args.rows.split(",")]
+            run_bench(sizes, args.schema, args.ops, args.format, args.output)
+        except ValueError as e:
+            parser.error(str(e))
+        return
+
+    from src.primitive_db.engine import run, run_script
+
+    if args.script is None:
+        run()
+        return
+
+    if args.script == "-":
+        ok = run_script(sys.stdin, auto_confirm=args.yes)
+    else:
+        with open(args.script, "r", encoding="utf-8") as f:
+            ok = run_script(f, auto_confirm=args.yes)
+    sys.exit(0 if ok else 1)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,170 @@
+import json
+import math
+import os
+from bisect import bisect_left
+from typing import Any, Callable
+
+# Верхние границы корзин гистограмм задержек, в секундах.
+_BUCKETS = (
+    0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01,
+    0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, math.inf,
+)
+_PREFIX = "primitive_db"
+
+
+class Histogram:
+    """Гистограмма задержек с фиксированными корзинами (как в Prometheus)."""
+
+    def __init__(self):
+        self.buckets = [0] * len(_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.buckets[bisect_left(_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q: float) -> float:
+        """Оценка квантиля сверху: граница корзины, где накопилась доля q."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(_BUCKETS, self.buckets, strict=True):
+            seen += count
+            if seen >= rank and seen:
+                return min(bound, self.max)
+        return self.max
+
+    def to_json(self) -> dict[str, Any]:
+        return {
+            "count": self.count,
+            "sum": round(self.sum, 6),
+            "max": round(self.max, 6),
+            "p50": round(self.quantile(0.5), 6),
+            "p99": round(self.quantile(0.99), 6),
+        }
+
+
+class Metrics:
+    """
+    Счетчики и гистограммы работы базы.
+
+    Метрика задается именем и меткой (например, 'command_seconds' и
+    'select'). Источники (register) добавляют в снимок готовую статистику
+    других компонентов — например, кэша результатов.
+    """
+
+    def __init__(self):
+        self.enabled = True
+        self.dump_file: str | None = None
+        self._histograms: dict[tuple[str, str], Histogram] = {}
+        self._counters: dict[tuple[str, str], float] = {}
+        self._sources: dict[str, Callable[[], dict[str, Any]]] = {}
+
+    def configure(
+        self,
+        enabled: bool | None = None,
+        dump_file: str | None = None,
+    ) -> None:
+        """Включить/выключить сбор и задать файл для dump при выходе."""
+        if enabled is not None:
+            self.enabled = enabled
+        if dump_file is not None:
+            self.dump_file = dump_file
+
+    def register(self, name: str, source: Callable[[], dict[str, Any]]) -> None:
+        """Добавить в снимок статистику source() под именем name."""
+        self._sources[name] = source
+
+    def observe(self, name: str, seconds: float, label: str = "") -> None:
+        if not self.enabled:
+            return
+        histogram = self._histograms.get((name, label))
+        if histogram is None:
+            histogram = self._histograms[(name, label)] = Histogram()
+        histogram.observe(seconds)
+
+    def add(self, name: str, value: float = 1, label: str = "") -> None:
+        if not self.enabled or not value:
+            return
+        key = (name, label)
+        self._counters[key] = self._counters.get(key, 0) + value
+
+    def reset(self) -> None:
+        self._histograms.clear()
+        self._counters.clear()
+
+    def snapshot(self) -> dict[str, Any]:
+        """Все метрики одним словарем (для JSON)."""
+        histograms: dict[str, dict] = {}
+        for (name, label), histogram in sorted(self._histograms.items()):
+            histograms.setdefault(name, {})[label] = histogram.to_json()
+        counters: dict[str, dict] = {}
+        for (name, label), value in sorted(self._counters.items()):
+            counters.setdefault(name, {})[label] = value
+        snapshot = {"histograms": histograms, "counters": counters}
+        for name, source in self._sources.items():
+            snapshot[name] = source()
+        return snapshot
+
+    def to_prometheus(self) -> str:
+        """Метрики в текстовом формате Prometheus."""
+        lines: list[str] = []
+
+        def labels(label: str, extra: str = "") -> str:
+            parts = [f'kind="{label}"'] if label else []
+            if extra:
+                parts.append(extra)
+            return "{" + ",".join(parts) + "}" if parts else ""
+
+        for name in sorted({name for name, _ in self._histograms}):
+            metric = f"{_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} histogram")
+            for (hist_name, label), histogram in sorted(self._histograms.items()):
+                if hist_name != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(_BUCKETS, histogram.buckets, strict=True):
+                    cumulative += count
+                    le = "+Inf" if math.isinf(bound) else repr(bound)
+                    bucket = labels(label, f'le="{le}"')
+                    lines.append(f"{metric}_bucket{bucket} {cumulative}")
+                lines.append(f"{metric}_sum{labels(label)} {histogram.sum:.6f}")
+                lines.append(f"{metric}_count{labels(label)} {histogram.count}")
+        for name in sorted({name for name, _ in self._counters}):
+            metric = f"{_PREFIX}_{name}"
+            lines.append(f"# TYPE {metric} counter")
+            for (counter_name, label), value in sorted(self._counters.items()):
+                if counter_name == name:
+                    lines.append(f"{metric}{labels(label)} {value:g}")
+        for name, source in self._sources.items():
+            for key, value in source().items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    metric = f"{_PREFIX}_{name}_{key}"
+                    lines.append(f"# TYPE {metric} gauge")
+                    lines.append(f"{metric} {value:g}")
+        return "\n".join(lines) + "\n"
+
+    def dump(self, path: str | None = None) -> str | None:
+        """
+        Записать метрики в файл: .prom и .txt — в формате Prometheus,
+        остальное — JSON. Без path используется dump_file.
+        """
+        path = path or self.dump_file
+        if path is None:
+            return None
+        if os.path.splitext(path)[1] in (".prom", ".txt"):
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.snapshot(), ensure_ascii=False, indent=2) + "\n"
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+
+metrics = Metrics()
@@ -0,0 +1,137 @@
+import os
+from typing import Any, Callable
+
+from src.primitive_db.aggregate import Groups, SelectItem, finish, fold, merge
+from src.primitive_db.binary_format import BinaryTable
+from src.primitive_db.constants import PARALLEL_MIN_ROWS, PARALLEL_WORKERS
+from src.primitive_db.expr import Expr, compile_where
+
+
+def _match_chunk(path: str, expr: Expr, start: int, end: int) -> list[int]:
+    predicate = compile_where(expr)
+    table = BinaryTable(path)
+    try:
+        return [pos for pos in range(start, end) if predicate(table.row(pos))]
+    finally:
+        table.close()
+
+
+def _fold_chunk(
+    path: str,
+    expr: Expr | None,
+    items: list[SelectItem],
+    group_by: list[str],
+    start: int,
+    end: int,
+) -> Groups:
+    predicate = compile_where(expr)
+    table = BinaryTable(path)
+    try:
+        rows = (table.row(pos) for pos in range(start, end))
+        return fold(filter(predicate, rows), items, group_by)
+    finally:
+        table.close()
+
+
+class ParallelScanner:
+    """
+    Параллельный просмотр больших бинарных таблиц пулом процессов.
+
+    Таблица делится на непрерывные части по числу процессов; каждый
+    процесс открывает файл .tbl сам и читает свою часть через mmap.
+    Результаты частей объединяются по порядку, то есть по возрастанию ID.
+
+    Процессы запускаются через forkserver (или spawn), а не fork: при
+    fork дочерний процесс наследует блокировки, захваченные потоками
+    уплотнения журналов и сервера, и может на них зависнуть. Пул
+    создается при первом просмотре и переиспользуется до close, чтобы
+    запуск процессов не оплачивался каждым запросом.
+    """
+
+    def __init__(
+        self,
+        workers: int = PARALLEL_WORKERS,
+        min_rows: int = PARALLEL_MIN_ROWS,
+    ):
+        self.workers = workers
+        self.min_rows = min_rows
+        self._pool: Any = None
+
+    def configure(
+        self,
+        workers: int | None = None,
+        min_rows: int | None = None,
+    ) -> None:
+        """Изменить число процессов и порог размера таблицы."""
+        if workers is not None and workers != self.workers:
+            self.close()
+            self.workers = workers
+        if min_rows is not None:
+            self.min_rows = min_rows
+
+    def applies(self, source: list[dict] | BinaryTable) -> bool:
+        """
+        Стоит ли просматривать таблицу параллельно. Строки в памяти
+        просматриваются последовательно: передать их процессам дороже,
+        чем проверить условие. Процессов больше, чем ядер, не запускается.
+        """
+        if not isinstance(source, BinaryTable):
+            return False
+        return self._processes() >= 2 and len(source) >= self.min_rows
+
+    def _processes(self) -> int:
+        return max(1, min(self.workers, os.cpu_count() or 1))
+
+    def _chunks(self, total: int) -> list[tuple[int, int]]:
+        size = max(1, -(-total // self._processes()))
+        return [(start, min(start + size, total)) for start in range(0, total, size)]
+
+    def _executor(self) -> Any:
+        if self._pool is None:
+            import multiprocessing
+            from concurrent.futures import ProcessPoolExecutor
+
+            methods = multiprocessing.get_all_start_methods()
+            method = "forkserver" if "forkserver" in methods else "spawn"
+            self._pool = ProcessPoolExecutor(
+                self._processes(), mp_context=multiprocessing.get_context(method)
+            )
+        return self._pool
+
+    def _run(
+        self,
+        source: BinaryTable,
+        task: Callable[..., Any],
+        *args: Any,
+    ) -> list[Any]:
+        pool = self._executor()
+        futures = [
+            pool.submit(task, source.path, *args, start, end)
+            for start, end in self._chunks(len(source))
+        ]
+        return [future.result() for future in futures]
+
+    def match(self, source: BinaryTable, expr: Expr) -> list[int]:
+        """Позиции строк, удовлетворяющих expr, по возрастанию."""
+        parts = self._run(source, _match_chunk, expr)
+        return [pos for part in parts for pos in part]
+
+    def aggregate(
+        self,
+        source: BinaryTable,
+        expr: Expr | None,
+        items: list[SelectItem],
+        group_by: list[str],
+    ) -> list[dict]:
+        """Агрегаты: частичные свертки частей объединяются в одну."""
+        parts = self._run(source, _fold_chunk, expr, items, group_by)
+        return finish(merge(parts, items), items, group_by)
+
+    def close(self) -> None:
+        """Остановить процессы пула."""
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+
+
+parallel_scan = ParallelScanner()
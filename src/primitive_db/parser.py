@@ -1,8 +1,47 @@
+import re
 import shlex
 from typing import Any
 
+_LIMIT_RE = re.compile(
+    r"^(?P<rest>.*?)"
+    r"(?:\s*\blimit\s+(?P<limit>\d+))?"
+    r"(?:\s*\boffset\s+(?P<offset>\d+))?\s*$",
+    re.DOTALL,
+)
+_GROUP_RE = re.compile(
+    r"^(?P<rest>.*?)"
+    r"(?:\s*\bgroup\s+by\s+(?P<columns>\w+(?:\s*,\s*\w+)*))?\s*$",
+    re.DOTALL,
+)
+_ORDER_RE = re.compile(
+    r"^(?P<rest>.*?)"
+    r"(?:\s*\border\s+by\s+(?P<column>\w+(?:\.\w+)?)"
+    r"(?:\s+(?P<direction>asc|desc))?)?\s*$",
+    re.DOTALL,
+)
+_JOIN_RE = re.compile(
+    r"^select\s+from\s+(?P<left>\w+)\s+join\s+(?P<right>\w+)\s+on\s+"
+    r"(?P<first>\w+\.\w+)\s*=\s*(?P<second>\w+\.\w+)(?P<tail>.*)$",
+    re.DOTALL,
+)
+# Токены команды: строки в кавычках, операторы сравнения, скобки и запятые,
+# остальное — слова (имена, ключевые слова, числа, true/false).
+_TOKEN_RE = re.compile(
+    r"\s*(?:"
+    r"(?P<str>\"[^\"]*\"|'[^']*')"
+    r"|(?P<op><=|>=|!=|<>|=|<|>)"
+    r"|(?P<punct>[(),])"
+    r"|(?P<word>[^\s(),=<>!]+)"
+    r")"
+)
+# Аргументы команды: части в кавычках и без них, склеиваемые до пробела.
+_ARG_RE = re.compile(r"\"([^\"]*)\"|'([^']*)'|([^\s\"']+)|(\s+)")
+_INT_RE = re.compile(r"-?\d+")
 
-def _parse_literal(token: str) -> Any:
+Token = tuple[str, str]
+
+
+def parse_literal(token: str) -> Any:
     """
     Преобразовать строковый токен в Python-тип: int, bool, str (в кавычках).
     """
@@ -30,42 +69,144 @@ def _parse_literal(token: str) -> Any:
     return token
 
 
-def parse_values(values_segment: str) -> list[Any]:
-    """Разобрать часть вида: '(\"Sergei\", 28, true)' → список значений."""
-    text = values_segment.strip()
-    if text.startswith("(") and text.endswith(")"):
-        text = text[1:-1]
-
-    lexer = shlex.shlex(text, posix=True)
-    lexer.whitespace = ","
-    lexer.whitespace_split = True
-    tokens = list(lexer)
-    return [_parse_literal(t.strip()) for t in tokens if t.strip() != ""]
-
-
-def parse_where(where_segment: str) -> dict:
-    """Разобрать 'age = 28' → {'age': 28}. Поддерживаем одно равенство."""
-    parts = where_segment.split("=", maxsplit=1)
-    if len(parts) != 2:
-        raise ValueError("Ожидалось выражение формата: <столбец> = <значение>")
-    key = parts[0].strip()
-    val = _parse_literal(parts[1].strip())
-    return {key: val}
-
-
-def parse_set(set_segment: str) -> dict:
-    """Разобрать 'age = 29, is_active = false' → {'age': 29, 'is_active': False}."""
-    lexer = shlex.shlex(set_segment, posix=True)
-    lexer.whitespace = ","
-    lexer.whitespace_split = True
-    pairs = [p.strip() for p in lexer if p.strip()]
-
-    result: dict = {}
-    for pair in pairs:
-        kv = pair.split("=", maxsplit=1)
-        if len(kv) != 2:
-            raise ValueError(f"Некорректное выражение в set: {pair!r}")
-        key = kv[0].strip()
-        val = _parse_literal(kv[1].strip())
-        result[key] = val
-    return result
+class Param:
+    """Место литерала в шаблоне команды: номер в списке значений."""
+
+    __slots__ = ("index",)
+
+    def __init__(self, index: int):
+        self.index = index
+
+    def __repr__(self) -> str:
+        return f"?{self.index}"
+
+
+def bind(value: Any, params: list[Any]) -> Any:
+    """Подставить значение вместо Param; прочие значения вернуть как есть."""
+    return params[value.index] if isinstance(value, Param) else value
+
+
+def tokenize(text: str) -> list[Token]:
+    """
+    Разбить команду на токены за один проход:
+    'age >= 18 and name = "A"' → [('word', 'age'), ('op', '>='), ...].
+    """
+    tokens = []
+    pos = 0
+    text = text.strip()
+    while pos < len(text):
+        match = _TOKEN_RE.match(text, pos)
+        if match is None or match.end() == pos:
+            raise ValueError(f"Не удалось разобрать команду около: {text[pos:]!r}")
+        kind = match.lastgroup
+        tokens.append((kind, match.group(kind)))
+        pos = match.end()
+    return tokens
+
+
+def parameterize(tokens: list[Token]) -> tuple[tuple[Token, ...], list[Any]]:
+    """
+    Заменить литералы (строки в кавычках и целые числа) местами ('param', i):
+    команды, отличающиеся только значениями, получают один шаблон.
+    'age = 28' → ((('word', 'age'), ('op', '='), ('param', '0')), [28]).
+    """
+    template = []
+    params: list[Any] = []
+    for kind, value in tokens:
+        if kind == "str" or (kind == "word" and _INT_RE.fullmatch(value)):
+            template.append(("param", str(len(params))))
+            params.append(parse_literal(value))
+        else:
+            template.append((kind, value))
+    return tuple(template), params
+
+
+def split_command(text: str) -> list[str]:
+    """
+    Разбить команду на аргументы, как shlex.split: по пробелам, кавычки
+    снимаются. Команды с обратной косой чертой разбираются через shlex.
+    """
+    if "\\" in text:
+        return shlex.split(text)
+    args: list[str] = []
+    current: list[str] | None = None
+    pos = 0
+    while pos < len(text):
+        match = _ARG_RE.match(text, pos)
+        if match is None:
+            raise ValueError("No closing quotation")
+        pos = match.end()
+        if match.lastindex == 4:
+            if current is not None:
+                args.append("".join(current))
+                current = None
+            continue
+        if current is None:
+            current = []
+        current.append(match.group(match.lastindex))
+    if current is not None:
+        args.append("".join(current))
+    return args
+
+
+def parse_limit(segment: str) -> tuple[str, int | None, int]:
+    """
+    Отделить хвост 'limit <n> [offset <m>]' от сегмента.
+    'age = 28 limit 10 offset 5' → ('age = 28', 10, 5).
+    """
+    match = _LIMIT_RE.match(segment.strip())
+    limit = match.group("limit")
+    offset = match.group("offset")
+    return (
+        match.group("rest").strip(),
+        int(limit) if limit is not None else None,
+        int(offset) if offset is not None else 0,
+    )
+
+
+def parse_order(segment: str) -> tuple[str, str | None, bool]:
+    """
+    Отделить хвост 'order by <столбец> [asc|desc]' от сегмента.
+    'age > 18 order by name desc' → ('age > 18', 'name', True).
+    """
+    match = _ORDER_RE.match(segment.strip())
+    return (
+        match.group("rest").strip(),
+        match.group("column"),
+        match.group("direction") == "desc",
+    )
+
+
+def parse_join(user_input: str) -> tuple[str, str, str, str, str] | None:
+    """
+    Разобрать 'select from a join b on a.x = b.y <хвост>' →
+    ('a', 'b', 'x', 'y', '<хвост>'); не соединение — None.
+    Части условия on можно писать в любом порядке.
+    """
+    match = _JOIN_RE.match(user_input.strip())
+    if match is None:
+        return None
+    left, right = match.group("left"), match.group("right")
+    columns = {}
+    for part in (match.group("first"), match.group("second")):
+        table, _, column = part.partition(".")
+        if table not in (left, right) or table in columns:
+            raise ValueError(
+                "Ошибка: условие on должно связывать столбцы двух таблиц: "
+                f"on {left}.<столбец> = {right}.<столбец>"
+            )
+        columns[table] = column
+    return left, right, columns[left], columns[right], match.group("tail").strip()
+
+
+def parse_group(segment: str) -> tuple[str, list[str]]:
+    """
+    Отделить хвост 'group by <столбец>[, <столбец>...]' от сегмента.
+    'age > 18 group by is_active' → ('age > 18', ['is_active']).
+    """
+    match = _GROUP_RE.match(segment.strip())
+    columns = match.group("columns")
+    return (
+        match.group("rest").strip(),
+        [c.strip() for c in columns.split(",")] if columns else [],
+    )
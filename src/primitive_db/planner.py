@@ -0,0 +1,137 @@
+from typing import Callable
+
+from src.primitive_db.expr import And, Between, Compare, Expr, InList, Or
+from src.primitive_db.indexes import SortedIndex, TableIndexes
+
+_RANGES = {
+    "<": lambda v: (None, v, True, False),
+    "<=": lambda v: (None, v, True, True),
+    ">": lambda v: (v, None, False, True),
+    ">=": lambda v: (v, None, True, True),
+}
+
+
+class AccessPlan:
+    """
+    Способ получить строки-кандидаты: полный просмотр или индекс.
+    cost — ожидаемое число просматриваемых строк. Множество ID диапазона
+    упорядоченного индекса собирается лениво (fetch), только если план
+    выбран.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        cost: int,
+        ids: set[int] | None = None,
+        detail: str = "",
+        fetch: Callable[[], set[int]] | None = None,
+    ):
+        self.kind = kind
+        self.cost = cost
+        self._ids = ids
+        self._fetch = fetch
+        self.detail = detail
+
+    @property
+    def ids(self) -> set[int] | None:
+        if self._ids is None and self._fetch is not None:
+            self._ids = self._fetch()
+            self._fetch = None
+        return self._ids
+
+    def __repr__(self) -> str:
+        detail = f" [{self.detail}]" if self.detail else ""
+        return f"{self.kind}{detail}, ~{self.cost} строк"
+
+
+def _lookup(indexes: TableIndexes, column: str, values: list) -> set[int] | None:
+    """ID строк со значением столбца из values или None, если индекса нет."""
+    if column == "ID":
+        return {v for v in values if v in indexes.by_id}
+    index = indexes.hash.get(column)
+    if index is None:
+        return None
+    ids: set[int] = set()
+    for value in values:
+        ids |= index.lookup(value)
+    return ids
+
+
+def _range(
+    index: SortedIndex,
+    ranges: list[tuple],
+    detail: str,
+) -> AccessPlan | None:
+    """План по диапазонам упорядоченного индекса (low, high, вкл., вкл.)."""
+    try:
+        spans = [index.bounds(*r) for r in ranges]
+    except TypeError:
+        return None
+    cost = sum(end - start for start, end in spans)
+
+    def fetch() -> set[int]:
+        return set().union(*(index.ids(start, end) for start, end in spans))
+
+    return AccessPlan("range", cost, detail=detail, fetch=fetch)
+
+
+def _plan(expr: Expr, indexes: TableIndexes) -> AccessPlan | None:
+    if isinstance(expr, Compare) and expr.op == "=":
+        ids = _lookup(indexes, expr.column, [expr.value])
+        if ids is not None:
+            kind = "pk" if expr.column == "ID" else "hash"
+            return AccessPlan(kind, len(ids), ids, repr(expr))
+        index = indexes.sorted.get(expr.column)
+        if index is not None:
+            return _range(index, [(expr.value, expr.value)], repr(expr))
+    elif isinstance(expr, Compare) and expr.op in _RANGES:
+        index = indexes.sorted.get(expr.column)
+        if index is not None:
+            return _range(index, [_RANGES[expr.op](expr.value)], repr(expr))
+    elif isinstance(expr, Between):
+        index = indexes.sorted.get(expr.column)
+        if index is not None:
+            return _range(index, [(expr.low, expr.high)], repr(expr))
+    elif isinstance(expr, InList):
+        ids = _lookup(indexes, expr.column, expr.values)
+        if ids is not None:
+            kind = "pk" if expr.column == "ID" else "hash"
+            return AccessPlan(kind, len(ids), ids, repr(expr))
+        index = indexes.sorted.get(expr.column)
+        if index is not None:
+            return _range(index, [(v, v) for v in expr.values], repr(expr))
+    elif isinstance(expr, And):
+        plans = [p for p in (_plan(item, indexes) for item in expr.items) if p]
+        if plans:
+            return min(plans, key=lambda p: p.cost)
+    elif isinstance(expr, Or):
+        plans = [_plan(item, indexes) for item in expr.items]
+        if all(plans):
+            ids = set().union(*(p.ids for p in plans))
+            detail = " | ".join(p.detail for p in plans)
+            return AccessPlan("union", len(ids), ids, detail)
+    return None
+
+
+def plan_access(
+    expr: Expr | None,
+    indexes: TableIndexes | None,
+    total: int,
+) -> AccessPlan:
+    """
+    Выбрать самый дешевый способ доступа для условия.
+
+    Стоимость индексного доступа — точный размер найденного множества ID
+    (размеры корзин хеш-индекса известны), диапазона упорядоченного
+    индекса — разность его границ, полного просмотра — число строк
+    таблицы. Для AND берется самый избирательный индексируемый
+    член, для OR — объединение, если индексируются все ветви.
+    """
+    full = AccessPlan("full_scan", total)
+    if expr is None or indexes is None:
+        return full
+    plan = _plan(expr, indexes)
+    if plan is None or plan.cost >= total:
+        return full
+    return plan
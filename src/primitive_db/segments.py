@@ -0,0 +1,312 @@
+import json
+import os
+import shutil
+from typing import Any, Iterator
+
+from src.primitive_db.constants import (
+    DATA_DIR,
+    SEGMENT_MANIFEST,
+    SEGMENT_ROWS,
+    SEGMENT_SUFFIX,
+)
+from src.primitive_db.expr import And, Expr, Or, compile_where, to_expr
+from src.primitive_db.metrics import metrics
+from src.primitive_db.storage import write_json_atomic, write_rows_atomic
+from src.primitive_db.table_stats import range_may_match
+
+Zones = dict[str, list | None]
+
+
+def _zones(rows: list[dict]) -> Zones:
+    """
+    Зоны строк: [min, max] каждого столбца. None — значения столбца
+    несравнимы (разных типов), такой столбец сегменты не отсекает.
+    """
+    zones: Zones = {}
+    for column in rows[0]:
+        values = [row.get(column) for row in rows]
+        try:
+            zones[column] = [min(values), max(values)]
+        except TypeError:
+            zones[column] = None
+    return zones
+
+
+def _widen(zones: Zones, other: Zones) -> Zones:
+    """Зоны, покрывающие и zones, и other."""
+    result: Zones = {}
+    for column in dict.fromkeys([*zones, *other]):
+        a, b = zones.get(column), other.get(column)
+        try:
+            result[column] = [min(a[0], b[0]), max(a[1], b[1])]
+        except TypeError:
+            result[column] = None
+    return result
+
+
+def _read_rows(path: str) -> tuple[list[dict], int]:
+    """
+    Прочитать строки файла сегмента и его размер в байтах. Оборванная
+    последняя строка (ее дописывает другой процесс) отбрасывается.
+    """
+    with open(path, "r", encoding="utf-8") as f:
+        text = f.read()
+        size = os.fstat(f.fileno()).st_size
+    text = text[: text.rfind("\n") + 1]
+    if not text:
+        return [], size
+    # Строки JSON не содержат переводов строк, поэтому файл разбирается
+    # одним вызовом как массив объектов.
+    return json.loads("[" + text[:-1].replace("\n", ",") + "]"), size
+
+
+def _segment_path(path: str, number: int) -> str:
+    return os.path.join(path, f"{number:06d}{SEGMENT_SUFFIX}")
+
+
+def _write_manifest(
+    path: str,
+    segment_rows: int,
+    next_id: int,
+    next_segment: int,
+    segments: list["Segment"],
+) -> None:
+    write_json_atomic(
+        os.path.join(path, SEGMENT_MANIFEST),
+        {
+            "segment_rows": segment_rows,
+            "next_id": next_id,
+            "next_segment": next_segment,
+            "segments": [segment.to_json() for segment in segments],
+        },
+    )
+
+
+class Segment:
+    """Сегмент таблицы в манифесте: номер файла, число строк и зоны столбцов."""
+
+    def __init__(self, number: int, rows: int, zones: Zones):
+        self.number = number
+        self.rows = rows
+        self.zones = zones
+
+    def may_match(self, expr: Expr | None) -> bool:
+        """Может ли строка сегмента удовлетворять условию (по зонам)."""
+        if expr is None:
+            return True
+        if isinstance(expr, And):
+            return all(self.may_match(item) for item in expr.items)
+        if isinstance(expr, Or):
+            return any(self.may_match(item) for item in expr.items)
+        zone = self.zones.get(expr.column)
+        return zone is None or range_may_match(zone[0], zone[1], expr)
+
+    def to_json(self) -> dict:
+        return {"number": self.number, "rows": self.rows, "zones": self.zones}
+
+    @classmethod
+    def from_json(cls, data: dict) -> "Segment":
+        return cls(data["number"], data["rows"], data["zones"])
+
+
+class SegmentedTable:
+    """
+    Таблица, разбитая на сегменты data/<table>/<N>.jsonl не больше чем
+    по segment_rows строк.
+
+    В манифесте data/<table>/zones.json для каждого сегмента хранятся
+    число строк и зоны — min и max каждого столбца. Сегменты, зоны которых
+    не отвечают условию where, не читаются; остальные читаются и
+    изменяются по одному, поэтому в памяти не больше одного сегмента
+    (и найденные строки), сколько бы строк ни было в таблице.
+
+    Манифест записывается так, чтобы его зоны покрывали содержимое
+    сегментов и до, и после изменения: при сбое между записью манифеста
+    и сегмента зоны остаются верными, только шире.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.path = os.path.join(DATA_DIR, table_name)
+        manifest = os.path.join(self.path, SEGMENT_MANIFEST)
+        with open(manifest, "r", encoding="utf-8") as f:
+            data = json.load(f)
+        self.segment_rows: int = data["segment_rows"]
+        self.next_id: int = data["next_id"]
+        self.next_segment: int = data["next_segment"]
+        self.segments = [Segment.from_json(s) for s in data["segments"]]
+
+    def __len__(self) -> int:
+        return sum(segment.rows for segment in self.segments)
+
+    def _segment_path(self, segment: Segment) -> str:
+        return _segment_path(self.path, segment.number)
+
+    def _save(self) -> None:
+        _write_manifest(
+            self.path,
+            self.segment_rows,
+            self.next_id,
+            self.next_segment,
+            self.segments,
+        )
+
+    def _read(self, segment: Segment) -> list[dict]:
+        try:
+            rows, size = _read_rows(self._segment_path(segment))
+        except FileNotFoundError:
+            return []
+        metrics.add("bytes_read_total", size)
+        metrics.add("rows_scanned_total", len(rows))
+        return rows
+
+    def _write(self, segment: Segment, rows: list[dict]) -> None:
+        written = write_rows_atomic(self._segment_path(segment), rows)
+        metrics.add("bytes_written_total", written)
+
+    def matching(self, where: Any) -> list[Segment]:
+        """Сегменты, зоны которых могут отвечать условию where."""
+        expr = to_expr(where)
+        return [segment for segment in self.segments if segment.may_match(expr)]
+
+    def _candidates(self, where: Any) -> list[Segment]:
+        """matching с учетом прочитанных и отсеченных сегментов в метриках."""
+        found = self.matching(where)
+        metrics.add("segments_total", len(found), label="read")
+        metrics.add("segments_total", len(self.segments) - len(found), label="skipped")
+        return found
+
+    def scan(self, where: Any) -> Iterator[dict]:
+        """Лениво перебрать строки по where, читая сегменты по одному."""
+        metrics.add("access_total", label="zone_scan")
+        predicate = compile_where(where)
+        for segment in self._candidates(where):
+            for row in self._read(segment):
+                if predicate(row):
+                    yield row
+
+    def append(self, row: dict) -> None:
+        self.extend([row])
+
+    def extend(self, rows: list[dict]) -> None:
+        """
+        Дописать строки: в последний сегмент, пока он не заполнен, затем
+        в новые. Сначала записывается манифест с расширенными зонами,
+        потом строки дописываются в файлы сегментов.
+        """
+        if not rows:
+            return
+        self.next_id = max(self.next_id, max(row["ID"] for row in rows) + 1)
+        chunks: list[tuple[Segment, list[dict]]] = []
+        start = 0
+        if self.segments and self.segments[-1].rows < self.segment_rows:
+            tail = self.segments[-1]
+            start = self.segment_rows - tail.rows
+            chunk = rows[:start]
+            tail.zones = _widen(tail.zones, _zones(chunk))
+            tail.rows += len(chunk)
+            chunks.append((tail, chunk))
+        for offset in range(start, len(rows), self.segment_rows):
+            chunk = rows[offset:offset + self.segment_rows]
+            segment = Segment(self.next_segment, len(chunk), _zones(chunk))
+            self.next_segment += 1
+            self.segments.append(segment)
+            chunks.append((segment, chunk))
+        self._save()
+        for segment, chunk in chunks:
+            with open(self._segment_path(segment), "a", encoding="utf-8") as f:
+                start = f.tell()
+                for row in chunk:
+                    f.write(
+                        json.dumps(row, ensure_ascii=False, separators=(",", ":"))
+                        + "\n"
+                    )
+                f.flush()
+                os.fsync(f.fileno())
+                metrics.add("bytes_written_total", f.tell() - start)
+
+    def update(self, set_clause: dict, where: Any) -> list[dict]:
+        """
+        Обновить строки по where, переписывая только сегменты с
+        подходящими строками; вернуть измененные строки. Манифест
+        записывается, только если зоны сегмента расширились.
+        """
+        predicate = compile_where(where)
+        changed: list[dict] = []
+        for segment in self._candidates(where):
+            rows = self._read(segment)
+            hits = [row for row in rows if predicate(row)]
+            if not hits:
+                continue
+            for row in hits:
+                row.update(set_clause)
+            zones = _widen(segment.zones, _zones(hits))
+            if zones != segment.zones:
+                segment.zones = zones
+                self._save()
+            self._write(segment, rows)
+            changed.extend(hits)
+        return changed
+
+    def delete(self, where: Any) -> list[int]:
+        """
+        Удалить строки по where, переписывая только сегменты с
+        подходящими строками; вернуть ID удаленных. Опустевший сегмент
+        удаляется из манифеста, затем его файл.
+        """
+        predicate = compile_where(where)
+        deleted_ids: list[int] = []
+        for segment in self._candidates(where):
+            kept: list[dict] = []
+            removed = 0
+            for row in self._read(segment):
+                if predicate(row):
+                    deleted_ids.append(row["ID"])
+                    removed += 1
+                else:
+                    kept.append(row)
+            if not removed:
+                continue
+            if not kept:
+                self.segments.remove(segment)
+                self._save()
+                os.remove(self._segment_path(segment))
+                continue
+            self._write(segment, kept)
+            segment.rows = len(kept)
+            segment.zones = _zones(kept)
+            self._save()
+        return deleted_ids
+
+    def to_rows(self) -> list[dict]:
+        """Все строки таблицы (для перевода в json или binary)."""
+        return [row for segment in self.segments for row in self._read(segment)]
+
+    @classmethod
+    def create(
+        cls,
+        table_name: str,
+        rows: list[dict],
+        segment_rows: int = SEGMENT_ROWS,
+        next_id: int = 1,
+    ) -> "SegmentedTable":
+        """
+        Записать строки таблицы сегментами. Манифест записывается
+        последним: до этого таблица остается в прежнем формате.
+        next_id — счетчик следующего ID таблицы, чтобы ID удаленных
+        строк не выдавались повторно.
+        """
+        path = os.path.join(DATA_DIR, table_name)
+        if os.path.isdir(path):
+            # Остатки прерванного перевода: манифеста в каталоге нет.
+            shutil.rmtree(path)
+        os.makedirs(path)
+        segments = []
+        for number, offset in enumerate(range(0, len(rows), segment_rows), start=1):
+            chunk = rows[offset:offset + segment_rows]
+            written = write_rows_atomic(_segment_path(path, number), chunk)
+            metrics.add("bytes_written_total", written)
+            segments.append(Segment(number, len(chunk), _zones(chunk)))
+        next_id = max(next_id, max((row["ID"] for row in rows), default=0) + 1)
+        _write_manifest(path, segment_rows, next_id, len(segments) + 1, segments)
+        return cls(table_name)
@@ -0,0 +1,161 @@
+import asyncio
+import json
+import os
+import signal
+from concurrent.futures import ThreadPoolExecutor
+
+from src.primitive_db.constants import SERVER_MAX_LINE
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import CommandResult, Session
+
+_CLOSE_COMMANDS = {"exit", "quit"}
+
+
+def encode_response(result: CommandResult, request_id=None) -> bytes:
+    """Ответ сервера — одна строка JSON."""
+    response = {
+        "id": request_id,
+        "ok": result.ok,
+        "rows": result.rows,
+        "output": result.output,
+        "cached": result.cached,
+        "elapsed": round(result.elapsed, 6),
+    }
+    line = json.dumps(response, ensure_ascii=False, separators=(",", ":"))
+    return line.encode("utf-8") + b"\n"
+
+
+def decode_request(line: bytes) -> tuple[str, object]:
+    """
+    Строка запроса → (команда, id). Запрос — JSON-объект
+    {"id": ..., "command": "..."} или просто текст команды.
+    """
+    text = line.decode("utf-8").strip()
+    if text.startswith("{"):
+        request = json.loads(text)
+        return str(request.get("command", "")), request.get("id")
+    return text, None
+
+
+class DatabaseServer:
+    """
+    Сервер базы данных: один сеанс с таблицами и индексами в памяти и
+    много клиентских соединений.
+
+    Команды выполняются по одной в отдельном потоке, чтобы цикл asyncio
+    продолжал принимать соединения и читать запросы. Транзакцию в каждый
+    момент ведет одно соединение: команды других соединений до ее
+    завершения отклоняются, а при разрыве соединения она откатывается.
+    """
+
+    def __init__(self, session: Session | None = None):
+        self.session = session or Session(echo=False)
+        self._lock = asyncio.Lock()
+        self._executor = ThreadPoolExecutor(max_workers=1)
+        self._txn_owner: object | None = None
+        self.connections = 0
+
+    async def _execute(self, command: str, owner: object) -> CommandResult:
+        async with self._lock:
+            if self._txn_owner is not None and self._txn_owner is not owner:
+                result = CommandResult(command)
+                result.ok = False
+                result.output = "Ошибка: идет транзакция другого соединения.\n"
+                return result
+            loop = asyncio.get_running_loop()
+            result = await loop.run_in_executor(
+                self._executor, self.session.execute, command
+            )
+            self._txn_owner = owner if self.session.in_transaction else None
+            return result
+
+    async def handle(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+    ) -> None:
+        """Обслужить одно соединение: запрос — строка, ответ — строка."""
+        owner = object()
+        self.connections += 1
+        try:
+            while line := await reader.readline():
+                try:
+                    command, request_id = decode_request(line)
+                except (UnicodeDecodeError, ValueError) as e:
+                    result = CommandResult("")
+                    result.ok = False
+                    result.output = f"Некорректный запрос: {e}\n"
+                    writer.write(encode_response(result))
+                    await writer.drain()
+                    continue
+                if command.strip().lower() in _CLOSE_COMMANDS:
+                    break
+                if not command.strip():
+                    continue
+                result = await self._execute(command, owner)
+                writer.write(encode_response(result, request_id))
+                await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            self.connections -= 1
+            if self._txn_owner is owner:
+                await self._execute("rollback", owner)
+            writer.close()
+
+    async def start(
+        self,
+        socket_path: str | None = None,
+        host: str | None = None,
+        port: int | None = None,
+    ) -> asyncio.AbstractServer:
+        """Начать прием соединений на Unix-сокете или TCP-порту."""
+        if socket_path is not None:
+            if os.path.exists(socket_path):
+                os.remove(socket_path)
+            return await asyncio.start_unix_server(
+                self.handle, path=socket_path, limit=SERVER_MAX_LINE
+            )
+        return await asyncio.start_server(
+            self.handle, host=host, port=port, limit=SERVER_MAX_LINE
+        )
+
+    def close(self) -> None:
+        """Записать изменения на диск и остановить поток выполнения команд."""
+        self._executor.shutdown(wait=True)
+        self.session.close()
+
+
+async def _serve(server: DatabaseServer, socket_path, host, port) -> None:
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for signum in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(signum, stop.set)
+        except (NotImplementedError, RuntimeError):
+            pass  # Windows: остановка только через KeyboardInterrupt
+    listener = await server.start(socket_path, host, port)
+    address = socket_path or f"{host}:{port}"
+    print(f"Сервер базы данных слушает {address}. Остановка — Ctrl+C.")
+    async with listener:
+        await stop.wait()
+
+
+def serve(
+    socket_path: str | None = None,
+    host: str | None = None,
+    port: int | None = None,
+) -> None:
+    """Запустить сервер и работать до Ctrl+C или SIGTERM."""
+    set_auto_confirm(True)
+    server = DatabaseServer()
+    try:
+        asyncio.run(_serve(server, socket_path, host, port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+        set_auto_confirm(False)
+        if socket_path is not None and os.path.exists(socket_path):
+            os.remove(socket_path)
+        print("\nСервер остановлен.")
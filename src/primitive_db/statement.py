@@ -0,0 +1,191 @@
+from functools import lru_cache
+from typing import Any
+
+from src.primitive_db.constants import STATEMENT_CACHE_SIZE
+from src.primitive_db.expr import Expr, condition_cache_info, parse_tokens
+from src.primitive_db.metrics import metrics
+from src.primitive_db.parser import (
+    Param,
+    Token,
+    bind,
+    parameterize,
+    parse_literal,
+    tokenize,
+)
+
+
+class Statement:
+    """
+    Разобранная команда изменения данных: insert, update или delete.
+
+    values — группы значений insert, assignments — пары столбец → значение
+    из set, where — условие update и delete. В шаблоне команды вместо
+    литералов стоят Param; bind возвращает копию с подставленными значениями.
+    """
+
+    def __init__(
+        self,
+        kind: str,
+        table: str,
+        values: list[list[Any]] | None = None,
+        assignments: dict[str, Any] | None = None,
+        where: Expr | None = None,
+    ):
+        self.kind = kind
+        self.table = table
+        self.values = values or []
+        self.assignments = assignments or {}
+        self.where = where
+
+    def bind(self, params: list[Any]) -> "Statement":
+        return Statement(
+            self.kind,
+            self.table,
+            [[bind(v, params) for v in group] for group in self.values],
+            {column: bind(v, params) for column, v in self.assignments.items()},
+            self.where.bind(params) if self.where is not None else None,
+        )
+
+
+class _Reader:
+    """Последовательный разбор токенов одной команды."""
+
+    def __init__(self, tokens: tuple[Token, ...] | list[Token]):
+        self.tokens = tokens
+        self.pos = 0
+
+    def peek(self) -> Token | None:
+        return self.tokens[self.pos] if self.pos < len(self.tokens) else None
+
+    def at_end(self) -> bool:
+        return self.pos >= len(self.tokens)
+
+    def take(self, kind: str, value: str | None = None) -> str:
+        token = self.peek()
+        if token is None:
+            raise ValueError("Неожиданный конец команды.")
+        if token[0] != kind or (value and token[1].lower() != value):
+            raise ValueError(f"Ожидалось {value or kind}, получено: {token[1]!r}")
+        self.pos += 1
+        return token[1]
+
+    def value(self) -> Any:
+        """
+        Значение до запятой, скобки или where: место Param, строка в
+        кавычках или слова без кавычек, склеенные через пробел.
+        """
+        token = self.peek()
+        if token is not None and token[0] in ("param", "str"):
+            self.pos += 1
+            kind, text = token
+            return Param(int(text)) if kind == "param" else parse_literal(text)
+        words = []
+        while (
+            (token := self.peek()) is not None
+            and token[0] == "word"
+            and token[1].lower() != "where"
+        ):
+            if token[1][0] in "\"'":
+                raise ValueError(f"Незакрытая кавычка: {token[1]!r}")
+            words.append(token[1])
+            self.pos += 1
+        if not words:
+            found = token[1] if token is not None else "конец команды"
+            raise ValueError(f"Ожидалось значение, получено: {found!r}")
+        return parse_literal(" ".join(words))
+
+    def values(self, closing: str | None) -> list[Any]:
+        """Значения через запятую до closing (или до конца команды)."""
+        group: list[Any] = []
+        if closing is not None and self.peek() == ("punct", closing):
+            return group
+        group.append(self.value())
+        while self.peek() == ("punct", ","):
+            self.pos += 1
+            group.append(self.value())
+        return group
+
+    def where(self) -> Expr | None:
+        if self.at_end():
+            return None
+        self.take("word", "where")
+        return parse_tokens(self.tokens[self.pos:])
+
+
+def _parse(tokens: tuple[Token, ...] | list[Token]) -> Statement:
+    reader = _Reader(tokens)
+    kind = reader.take("word").lower()
+    if kind == "insert":
+        reader.take("word", "into")
+        table = reader.take("word")
+        reader.take("word", "values")
+        if reader.peek() != ("punct", "("):
+            values = reader.values(None)
+            if not reader.at_end():
+                raise ValueError(f"Лишний фрагмент: {reader.peek()[1]!r}")
+            return Statement(kind, table, values=[values])
+        groups = []
+        while True:
+            reader.take("punct", "(")
+            groups.append(reader.values(")"))
+            reader.take("punct", ")")
+            if reader.at_end():
+                return Statement(kind, table, values=groups)
+            reader.take("punct", ",")
+    if kind == "update":
+        table = reader.take("word")
+        reader.take("word", "set")
+        assignments = {}
+        while True:
+            column = reader.take("word")
+            reader.take("op", "=")
+            assignments[column] = reader.value()
+            if reader.peek() != ("punct", ","):
+                break
+            reader.pos += 1
+        return Statement(kind, table, assignments=assignments, where=reader.where())
+    if kind == "delete":
+        reader.take("word", "from")
+        table = reader.take("word")
+        return Statement(kind, table, where=reader.where())
+    raise ValueError(f"Команда {kind!r} не изменяет данные.")
+
+
+@lru_cache(maxsize=STATEMENT_CACHE_SIZE)
+def _prepare(template: tuple[Token, ...]) -> Statement:
+    return _parse(template)
+
+
+def parse_statement(command: str) -> Statement:
+    """
+    Разобрать insert, update или delete за один проход по токенам.
+
+    Литералы заменяются местами Param, и разобранный шаблон кэшируется:
+    'update t set age = 29 where ID = 5' и 'update t set age = 30 where
+    ID = 7' разбираются один раз, дальше только подставляются значения.
+    """
+    tokens = tokenize(command)
+    template, params = parameterize(tokens)
+    try:
+        statement = _prepare(template)
+    except ValueError:
+        # Сообщение об ошибке — по исходным токенам, а не по шаблону.
+        return _parse(tokens)
+    return statement.bind(params)
+
+
+def cache_stats() -> dict[str, float]:
+    """Статистика кэшей шаблонов команд и условий where."""
+    info = _prepare.cache_info()
+    condition = condition_cache_info()
+    hits = info.hits + condition["hits"]
+    misses = info.misses + condition["misses"]
+    return {
+        "entries": info.currsize + condition["entries"],
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+    }
+
+
+metrics.register("statement_cache", cache_stats)
@@ -0,0 +1,514 @@
+import json
+import os
+import shutil
+import sys
+import threading
+from contextlib import contextmanager
+from typing import Any, Iterable, Iterator
+
+from src.primitive_db.binary_format import read_schema, read_table, write_table
+from src.primitive_db.constants import (
+    BINARY_SUFFIX,
+    DATA_DIR,
+    SEGMENT_MANIFEST,
+    SEQUENCE_SUFFIX,
+    WAL_COMPACT_THRESHOLD,
+    WAL_FSYNC_BATCH,
+    WAL_SUFFIX,
+)
+from src.primitive_db.locks import get_file_lock
+from src.primitive_db.metrics import metrics
+
+_config = {
+    "compact_threshold": WAL_COMPACT_THRESHOLD,
+    "fsync_batch": WAL_FSYNC_BATCH,
+}
+
+
+def configure_storage(
+    compact_threshold: int | None = None,
+    fsync_batch: int | None = None,
+) -> None:
+    """
+    Настроить журнал: порог уплотнения (в записях журнала) и
+    размер пакета fsync (0 — не вызывать fsync, 1 — после каждой записи).
+    """
+    if compact_threshold is not None:
+        _config["compact_threshold"] = compact_threshold
+    if fsync_batch is not None:
+        _config["fsync_batch"] = fsync_batch
+
+
+def _replay(rows: list[dict], records: Iterable[dict]) -> list[dict]:
+    """
+    Применить записи журнала к строкам.
+
+    Записи идемпотентны (put — полная строка по ID, del — удаление по ID),
+    поэтому повторное применение уже уплотненного сегмента безопасно.
+    """
+    by_id = {r["ID"]: r for r in rows}
+    for rec in records:
+        if rec["op"] == "put":
+            by_id[rec["row"]["ID"]] = rec["row"]
+        elif rec["op"] == "del":
+            for row_id in rec["ids"]:
+                by_id.pop(row_id, None)
+    return list(by_id.values())
+
+
+def _sequence(records: Iterable[dict]) -> int:
+    """Наибольший счетчик ID, записанный в записях del (1, если их нет)."""
+    return max((rec.get("next_id", 1) for rec in records), default=1)
+
+
+def _read_segment(path: str) -> list[dict]:
+    """Прочитать сегмент журнала, отбросив оборванную последнюю запись."""
+    records = []
+    with open(path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                records.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+    return records
+
+
+def _tmp_path(path: str) -> str:
+    """
+    Имя временного файла рядом с path, свое у каждого процесса и потока,
+    чтобы параллельные записи одного файла не портили друг друга.
+    """
+    return f"{path}.{os.getpid()}-{threading.get_ident()}.tmp"
+
+
+def _write_json_tmp(path: str, data: Any) -> str:
+    """Записать JSON во временный файл рядом с path и вернуть его путь."""
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        json.dump(data, f, indent=4, ensure_ascii=False)
+        f.flush()
+        os.fsync(f.fileno())
+    return tmp_path
+
+
+def _sync_dir(path: str) -> None:
+    """fsync каталога, чтобы переименование файла пережило сбой."""
+    if not hasattr(os, "O_DIRECTORY"):
+        return
+    fd = os.open(os.path.dirname(os.path.abspath(path)), os.O_RDONLY | os.O_DIRECTORY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def write_json_atomic(path: str, data: Any) -> None:
+    """
+    Записать JSON атомарно: во временный файл, fsync и переименование
+    поверх path. При сбое остается либо старый, либо новый файл целиком.
+    """
+    os.replace(_write_json_tmp(path, data), path)
+    _sync_dir(path)
+
+
+def write_rows_atomic(path: str, rows: list[dict]) -> int:
+    """
+    Записать строки в формате JSON Lines (по объекту на строку файла)
+    атомарно, как write_json_atomic. Вернуть число записанных байт.
+    """
+    tmp_path = _tmp_path(path)
+    with open(tmp_path, "w", encoding="utf-8") as f:
+        for row in rows:
+            f.write(json.dumps(row, ensure_ascii=False, separators=(",", ":")) + "\n")
+        f.flush()
+        os.fsync(f.fileno())
+        written = f.tell()
+    os.replace(tmp_path, path)
+    _sync_dir(path)
+    return written
+
+
+class TableLog:
+    """
+    Хранилище одной таблицы: снимок data/<table>.json (или бинарный
+    data/<table>.tbl) и сегменты журнала data/<table>.wal.<N>,
+    в которые дописываются изменения. Записи del хранят счетчик
+    следующего ID, чтобы удаленные ID не выдавались повторно после сбоя;
+    при удалении сегментов он переносится в data/<table>.seq.
+    Сегментированная таблица хранится
+    в каталоге data/<table>/ (см. segments.SegmentedTable); здесь о ней
+    известны только пути: формат, перевод в json/binary и удаление.
+
+    Доступ нескольких процессов согласуется двумя блокировками:
+    write_lock (data/<table>.write.lock) исключительно держит писатель,
+    snapshot_lock (data/<table>.lock) разделяемо держат читатели на время
+    чтения файлов, а исключительно — замена снимка и удаление сегментов.
+    Дописывание в журнал читателям не мешает: оборванная последняя
+    запись при чтении отбрасывается.
+    """
+
+    def __init__(self, table_name: str):
+        self.table_name = table_name
+        self.json_path = os.path.join(DATA_DIR, f"{table_name}.json")
+        self.binary_path = os.path.join(DATA_DIR, f"{table_name}{BINARY_SUFFIX}")
+        base = os.path.join(DATA_DIR, table_name)
+        self.segments_dir = base
+        self.manifest_path = os.path.join(base, SEGMENT_MANIFEST)
+        self.sequence_path = f"{base}{SEQUENCE_SUFFIX}"
+        self.write_lock = get_file_lock(f"{base}.write.lock")
+        self.snapshot_lock = get_file_lock(f"{base}.lock")
+        self._lock = threading.RLock()
+        self._file = None
+        self._open_segment = 0
+        self._unsynced = 0
+        self._pending = 0
+        self._compactor: threading.Thread | None = None
+        self.next_id = 1
+        segments = self._segments()
+        self._segment = (segments[-1] if segments else 0) + 1
+
+    def _segment_path(self, number: int) -> str:
+        return os.path.join(DATA_DIR, f"{self.table_name}{WAL_SUFFIX}{number}")
+
+    def _segments(self, upto: int | None = None) -> list[int]:
+        """Номера существующих сегментов журнала по возрастанию."""
+        if not os.path.isdir(DATA_DIR):
+            return []
+        prefix = f"{self.table_name}{WAL_SUFFIX}"
+        numbers = []
+        for name in os.listdir(DATA_DIR):
+            rest = name[len(prefix):]
+            if name.startswith(prefix) and rest.isdigit():
+                numbers.append(int(rest))
+        numbers.sort()
+        if upto is not None:
+            numbers = [n for n in numbers if n <= upto]
+        return numbers
+
+    @property
+    def format(self) -> str:
+        """
+        Формат таблицы: segmented, если есть манифест data/<table>/zones.json,
+        binary, если есть data/<table>.tbl, иначе json.
+        """
+        if os.path.exists(self.manifest_path):
+            return "segmented"
+        return "binary" if os.path.exists(self.binary_path) else "json"
+
+    @property
+    def snapshot_path(self) -> str:
+        return self.binary_path if self.format == "binary" else self.json_path
+
+    def has_log(self) -> bool:
+        return self._file is not None or bool(self._segments())
+
+    @contextmanager
+    def _exclusive(self) -> Iterator[None]:
+        """Исключительный доступ к файлам таблицы (писатели и читатели ждут)."""
+        with self.write_lock.exclusive(), self.snapshot_lock.exclusive(), self._lock:
+            yield
+
+    def signature(self, upto: int | None = None) -> tuple:
+        """Отпечаток файлов таблицы (mtime и размер) для проверки свежести."""
+        paths = [self.snapshot_path]
+        paths += [self._segment_path(n) for n in self._segments(upto)]
+        result = []
+        for path in paths:
+            try:
+                st = os.stat(path)
+            except FileNotFoundError:
+                continue
+            result.append((path, st.st_mtime_ns, st.st_size))
+        return tuple(result)
+
+    def _read_snapshot(self) -> list[dict]:
+        if self.format == "binary":
+            return read_table(self.binary_path)
+        try:
+            with open(self.json_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return []
+
+    def _write_snapshot_tmp(
+        self,
+        rows: list[dict],
+        fmt: str,
+        schema: dict[str, str] | None = None,
+    ) -> str:
+        """Записать снимок в формате fmt во временный файл."""
+        if fmt == "json":
+            return _write_json_tmp(self.json_path, rows)
+        tmp_path = _tmp_path(self.binary_path)
+        write_table(tmp_path, schema or read_schema(self.binary_path), rows)
+        return tmp_path
+
+    def _read_sequence(self) -> int:
+        try:
+            with open(self.sequence_path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return 1
+
+    def save_sequence(self, next_id: int) -> None:
+        """Записать счетчик следующего ID в data/<table>.seq."""
+        os.makedirs(DATA_DIR, exist_ok=True)
+        write_json_atomic(self.sequence_path, next_id)
+
+    def _keep_sequence(self, upto: int) -> None:
+        """Перенести счетчик ID из сегментов до upto перед их удалением."""
+        saved = self._read_sequence()
+        next_id = max(
+            [saved]
+            + [
+                _sequence(_read_segment(self._segment_path(number)))
+                for number in self._segments(upto)
+            ]
+        )
+        if next_id > saved:
+            self.save_sequence(next_id)
+
+    def _fold(self, upto: int | None = None) -> list[dict]:
+        """Снимок с воспроизведенными сегментами журнала до upto."""
+        rows = self._read_snapshot()
+        for number in self._segments(upto):
+            rows = _replay(rows, _read_segment(self._segment_path(number)))
+        return rows
+
+    def load(self) -> list[dict]:
+        """
+        Прочитать снимок и воспроизвести поверх него журнал; next_id —
+        сохраненный счетчик следующего ID.
+        """
+        with self.snapshot_lock.shared(), self._lock:
+            rows = self._read_snapshot()
+            self._pending = 0
+            self.next_id = self._read_sequence()
+            for number in self._segments():
+                records = _read_segment(self._segment_path(number))
+                self._pending += len(records)
+                self.next_id = max(self.next_id, _sequence(records))
+                rows = _replay(rows, records)
+            return rows
+
+    def _open_target(self) -> None:
+        """
+        Открыть сегмент для дописывания: последний существующий (его мог
+        начать другой процесс) или новый после ротации. Сегмент, удаленный
+        чужим уплотнением, переоткрывается.
+        """
+        segments = self._segments()
+        if segments:
+            self._segment = max(self._segment, segments[-1])
+        if self._file is not None and (
+            self._open_segment != self._segment
+            or os.fstat(self._file.fileno()).st_nlink == 0
+        ):
+            self._sync()
+            self._file.close()
+            self._file = None
+        if self._file is None:
+            os.makedirs(DATA_DIR, exist_ok=True)
+            self._file = open(self._segment_path(self._segment), "a", encoding="utf-8")
+            self._open_segment = self._segment
+
+    def append(self, records: list[dict]) -> int:
+        """Дописать записи в текущий сегмент журнала; вернуть число байт."""
+        if not records:
+            return 0
+        with self.write_lock.exclusive(), self._lock:
+            self._open_target()
+            start = self._file.tell()
+            for rec in records:
+                self._file.write(
+                    json.dumps(rec, ensure_ascii=False, separators=(",", ":"))
+                    + "\n"
+                )
+            self._unsynced += len(records)
+            self._pending += len(records)
+            self._file.flush()
+            written = self._file.tell() - start
+            batch = _config["fsync_batch"]
+            if batch and self._unsynced >= batch:
+                self._sync()
+            if self._pending >= _config["compact_threshold"]:
+                self._start_compaction()
+        return written
+
+    def sync(self) -> None:
+        """Сбросить дописанные записи журнала на диск (fsync)."""
+        with self._lock:
+            self._sync()
+
+    def _sync(self) -> None:
+        if self._file is not None and self._unsynced:
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        self._unsynced = 0
+
+    def _rotate(self) -> int:
+        """Закрыть текущий сегмент и вернуть номер последнего сегмента."""
+        segments = self._segments()
+        if segments:
+            self._segment = max(self._segment, segments[-1])
+        self._sync()
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        closed = self._segment
+        self._segment += 1
+        return closed
+
+    def _start_compaction(self) -> None:
+        if self._compactor is not None and self._compactor.is_alive():
+            return
+        upto = self._rotate()
+        self._pending = 0
+        self._compactor = threading.Thread(
+            target=self._compact, args=(upto,), daemon=True
+        )
+        self._compactor.start()
+
+    def _compact(self, upto: int) -> None:
+        """
+        Свернуть снимок и сегменты до upto включительно в новый снимок.
+
+        Снимок строится без блокировок; если к моменту замены файлы
+        изменил другой процесс, он перестраивается уже под блокировкой.
+        Ошибка не останавливает работу: временный файл удаляется, ошибка
+        учитывается в метриках (compaction_errors_total) и выводится в
+        stderr, чтобы не попасть в вывод выполняемой команды. Сегменты
+        журнала остаются и сворачиваются при следующем уплотнении.
+        """
+        tmp_path = _tmp_path(self.snapshot_path)
+        try:
+            state = self.signature(upto)
+            self._write_snapshot_tmp(self._fold(upto), self.format)
+            with self._exclusive():
+                if self.signature(upto) != state:
+                    os.remove(tmp_path)
+                    self._write_snapshot_tmp(self._fold(upto), self.format)
+                self._keep_sequence(upto)
+                os.replace(tmp_path, self.snapshot_path)
+                for number in self._segments(upto):
+                    os.remove(self._segment_path(number))
+        except Exception as e:
+            metrics.add("compaction_errors_total", label=self.table_name)
+            print(
+                f'Ошибка уплотнения журнала таблицы "{self.table_name}": {e}',
+                file=sys.stderr,
+            )
+        finally:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+
+    def wait(self) -> None:
+        """Дождаться завершения фонового уплотнения."""
+        compactor = self._compactor
+        if compactor is not None:
+            compactor.join()
+
+    def write_snapshot(self, rows: list[dict]) -> None:
+        """Полностью перезаписать таблицу и очистить журнал."""
+        self.wait()
+        with self._exclusive():
+            upto = self._rotate()
+            os.makedirs(DATA_DIR, exist_ok=True)
+            tmp_path = self._write_snapshot_tmp(rows, self.format)
+            self._keep_sequence(upto)
+            os.replace(tmp_path, self.snapshot_path)
+            for number in self._segments(upto):
+                os.remove(self._segment_path(number))
+            self._pending = 0
+
+    def convert(
+        self,
+        fmt: str,
+        schema: dict[str, str],
+        rows: list[dict] | None = None,
+    ) -> None:
+        """
+        Переписать таблицу в формат fmt (json или binary). rows — строки
+        сегментированной таблицы, ее каталог после записи удаляется;
+        без rows читаются снимок и журнал. Вызывающий, уже держащий
+        write_lock, должен до его захвата дождаться уплотнения (wait).
+        """
+        self.wait()
+        with self._exclusive():
+            if rows is None:
+                rows = self.load()
+            old_path = self.snapshot_path
+            upto = self._rotate()
+            os.makedirs(DATA_DIR, exist_ok=True)
+            tmp_path = self._write_snapshot_tmp(rows, fmt, schema)
+            new_path = self.binary_path if fmt == "binary" else self.json_path
+            self._keep_sequence(upto)
+            os.replace(tmp_path, new_path)
+            if old_path != new_path and os.path.exists(old_path):
+                os.remove(old_path)
+            for number in self._segments(upto):
+                os.remove(self._segment_path(number))
+            self._pending = 0
+            if os.path.isdir(self.segments_dir):
+                shutil.rmtree(self.segments_dir)
+
+    def close(self) -> None:
+        """Сбросить журнал на диск и закрыть сегмент."""
+        self.wait()
+        with self._lock:
+            self._sync()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+
+    def remove_snapshot(self) -> None:
+        """
+        Удалить снимки, сегменты журнала и счетчик ID (после перевода
+        таблицы в сегменты все это хранится в data/<table>/).
+        """
+        self.close()
+        with self._exclusive():
+            paths = [self.json_path, self.binary_path, self.sequence_path]
+            paths += [self._segment_path(n) for n in self._segments()]
+            for path in paths:
+                if os.path.exists(path):
+                    os.remove(path)
+            self._pending = 0
+
+    def drop(self) -> None:
+        """
+        Удалить все файлы таблицы: снимки, журнал и каталог сегментов.
+        Вызывается после того, как удаление таблицы зафиксировано в
+        метаданных.
+
+        Файлы блокировок остаются: другой процесс может ждать flock на
+        уже открытом файле, и после удаления он захватил бы блокировку
+        файла, которого нет, параллельно с процессом, создавшим новый.
+        """
+        self.remove_snapshot()
+        with self._exclusive():
+            if os.path.isdir(self.segments_dir):
+                shutil.rmtree(self.segments_dir)
+
+
+_logs: dict[str, TableLog] = {}
+
+
+def get_table_log(table_name: str) -> TableLog:
+    """Вернуть (создав при необходимости) хранилище таблицы."""
+    log = _logs.get(table_name)
+    if log is None:
+        log = _logs[table_name] = TableLog(table_name)
+    return log
+
+
+def drop_table_log(table_name: str) -> None:
+    """Удалить файлы таблицы и забыть ее хранилище."""
+    get_table_log(table_name).drop()
+    _logs.pop(table_name, None)
+
+
+def close_all() -> None:
+    """Закрыть журналы всех открытых таблиц."""
+    for log in _logs.values():
+        log.close()
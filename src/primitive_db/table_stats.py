@@ -0,0 +1,390 @@
+import base64
+import hashlib
+import math
+from bisect import bisect_right
+from datetime import datetime
+from typing import Any, Iterable
+
+from src.primitive_db.constants import STATS_HISTOGRAM_BUCKETS, STATS_HLL_PRECISION
+from src.primitive_db.expr import And, Between, Expr, InList, Or
+from src.primitive_db.storage import get_table_log
+from src.primitive_db.utils import load_metadata, save_metadata
+
+# Избирательность условия по столбцу без статистики.
+_UNKNOWN = 0.5
+
+
+def _fingerprint(signature: Iterable) -> list:
+    return [list(item) for item in signature]
+
+
+def range_may_match(low: Any, high: Any, expr: Expr) -> bool:
+    """
+    Может ли значение из [low, high] удовлетворять условию по одному
+    столбцу. Значения другого типа не сравниваются — тогда ответ True.
+    """
+    try:
+        if isinstance(expr, InList):
+            return any(low <= v <= high for v in expr.values)
+        if isinstance(expr, Between):
+            return expr.low <= high and expr.high >= low
+        value = expr.value
+        return {
+            "=": lambda: low <= value <= high,
+            "!=": lambda: not (low == high == value),
+            "<": lambda: low < value,
+            "<=": lambda: low <= value,
+            ">": lambda: high > value,
+            ">=": lambda: high >= value,
+        }[expr.op]()
+    except TypeError:
+        return True
+
+
+class HyperLogLog:
+    """
+    Оценка числа различных значений (HyperLogLog) в 2**precision байтах.
+    Значения хешируются по repr, поэтому оценка воспроизводима между
+    запусками; погрешность около 1.04 / sqrt(2**precision).
+    """
+
+    def __init__(self, precision: int = STATS_HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value: Any) -> None:
+        digest = hashlib.blake2b(repr(value).encode(), digest_size=8).digest()
+        x = int.from_bytes(digest, "big")
+        bits = 64 - self.precision
+        rest = x & ((1 << bits) - 1)
+        rank = bits - rest.bit_length() + 1
+        index = x >> bits
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def count(self) -> int:
+        m = len(self.registers)
+        estimate = (0.7213 / (1 + 1.079 / m)) * m * m / sum(
+            2.0 ** -r for r in self.registers
+        )
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return round(estimate)
+
+    def to_json(self) -> str:
+        return base64.b64encode(bytes(self.registers)).decode("ascii")
+
+    @classmethod
+    def from_json(cls, data: str) -> "HyperLogLog":
+        registers = base64.b64decode(data)
+        sketch = cls(len(registers).bit_length() - 1)
+        sketch.registers = bytearray(registers)
+        return sketch
+
+
+class ColumnStats:
+    """
+    Статистика столбца: оценка числа различных значений, min/max и
+    гистограмма равной заполненности (границы bounds, counts — число
+    значений в каждой корзине).
+    """
+
+    def __init__(self):
+        self.distinct = HyperLogLog()
+        self.min: Any = None
+        self.max: Any = None
+        self.bounds: list[Any] = []
+        self.counts: list[int] = []
+
+    @classmethod
+    def build(cls, values: list[Any], buckets: int) -> "ColumnStats":
+        stats = cls()
+        values = [v for v in values if v is not None]
+        for value in values:
+            stats.distinct.add(value)
+        if not values:
+            return stats
+        values.sort()
+        stats.min, stats.max = values[0], values[-1]
+        buckets = min(buckets, len(values))
+        edges = [len(values) * i // buckets for i in range(buckets + 1)]
+        stats.bounds = [values[edge] for edge in edges[:-1]] + [values[-1]]
+        stats.counts = [end - start for start, end in zip(edges, edges[1:])]
+        return stats
+
+    def add(self, value: Any) -> None:
+        """Учесть новое значение: min/max и крайние корзины расширяются."""
+        if value is None:
+            return
+        self.distinct.add(value)
+        try:
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+            if not self.counts:
+                self.bounds, self.counts = [value, value], [1]
+                return
+            self.bounds[0] = min(self.bounds[0], value)
+            self.bounds[-1] = max(self.bounds[-1], value)
+            bucket = bisect_right(self.bounds, value, hi=len(self.counts)) - 1
+            self.counts[max(bucket, 0)] += 1
+        except TypeError:
+            pass
+
+    def fraction_below(self, value: Any, inclusive: bool) -> float:
+        """Доля значений < value (<= при inclusive) по гистограмме."""
+        total = sum(self.counts)
+        if not total:
+            return 0.0
+        below = 0.0
+        for i, count in enumerate(self.counts):
+            low, high = self.bounds[i], self.bounds[i + 1]
+            if high < value or (inclusive and high == value):
+                below += count
+                continue
+            if low > value or (not inclusive and low == value):
+                break
+            numeric = isinstance(value, int) and not isinstance(value, bool)
+            if numeric and high > low:
+                below += count * (value - low) / (high - low)
+            else:
+                below += count / 2
+            break
+        return below / total
+
+    def selectivity(self, expr: Expr) -> float:
+        """Оценка доли строк, удовлетворяющих условию по этому столбцу."""
+        try:
+            if not self.may_match(expr):
+                return 0.0
+            distinct = max(self.distinct.count(), 1)
+            if isinstance(expr, InList):
+                return min(1.0, len(expr.values) / distinct)
+            if isinstance(expr, Between):
+                return max(
+                    0.0,
+                    self.fraction_below(expr.high, True)
+                    - self.fraction_below(expr.low, False),
+                )
+            if expr.op == "=":
+                return 1 / distinct
+            if expr.op == "!=":
+                return 1 - 1 / distinct
+            if expr.op in ("<", "<="):
+                return self.fraction_below(expr.value, expr.op == "<=")
+            return 1 - self.fraction_below(expr.value, expr.op == ">")
+        except TypeError:
+            return _UNKNOWN
+
+    def may_match(self, expr: Expr) -> bool:
+        """Может ли хоть одно значение из [min, max] удовлетворять условию."""
+        if self.min is None:
+            return False
+        return range_may_match(self.min, self.max, expr)
+
+    def histogram(self) -> str:
+        """'10 [2] 18 [2] 30': границы корзин и число значений между ними."""
+        if not self.counts:
+            return ""
+        parts = [repr(self.bounds[0])]
+        for count, bound in zip(self.counts, self.bounds[1:]):
+            parts.append(f"[{count}] {bound!r}")
+        return " ".join(parts)
+
+    def to_json(self) -> dict:
+        return {
+            "distinct": self.distinct.to_json(),
+            "min": self.min,
+            "max": self.max,
+            "bounds": self.bounds,
+            "counts": self.counts,
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "ColumnStats":
+        stats = cls()
+        stats.distinct = HyperLogLog.from_json(data["distinct"])
+        stats.min, stats.max = data["min"], data["max"]
+        stats.bounds, stats.counts = data["bounds"], data["counts"]
+        return stats
+
+
+class TableStats:
+    """
+    Статистика таблицы, собранная командой analyze: число строк и
+    статистика каждого столбца. fingerprint — отпечаток файлов таблицы,
+    с которым статистика согласована (см. StatsRegistry.fresh).
+    """
+
+    def __init__(self, row_count: int, columns: dict[str, ColumnStats]):
+        self.row_count = row_count
+        self.columns = columns
+        self.fingerprint: list = []
+        self.analyzed = datetime.now().isoformat(timespec="seconds")
+
+    def selectivity(self, expr: Expr) -> float:
+        """Оценка доли строк, удовлетворяющих условию."""
+        if isinstance(expr, And):
+            return math.prod(self.selectivity(item) for item in expr.items)
+        if isinstance(expr, Or):
+            return 1 - math.prod(1 - self.selectivity(item) for item in expr.items)
+        column = self.columns.get(expr.column)
+        return column.selectivity(expr) if column is not None else _UNKNOWN
+
+    def may_match(self, expr: Expr) -> bool:
+        if isinstance(expr, And):
+            return all(self.may_match(item) for item in expr.items)
+        if isinstance(expr, Or):
+            return any(self.may_match(item) for item in expr.items)
+        column = self.columns.get(expr.column)
+        return column is None or column.may_match(expr)
+
+    def order(self, expr: Expr) -> Expr:
+        """
+        Переставить части условия: в AND первыми проверяются самые
+        избирательные, в OR — самые вероятные, чтобы проверка строки
+        завершалась раньше.
+        """
+        if isinstance(expr, And):
+            items = sorted(map(self.order, expr.items), key=self.selectivity)
+            return And(items)
+        if isinstance(expr, Or):
+            items = sorted(
+                map(self.order, expr.items),
+                key=self.selectivity,
+                reverse=True,
+            )
+            return Or(items)
+        return expr
+
+    def to_json(self) -> dict:
+        return {
+            "row_count": self.row_count,
+            "analyzed": self.analyzed,
+            "fingerprint": self.fingerprint,
+            "columns": {c: s.to_json() for c, s in self.columns.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: dict) -> "TableStats":
+        columns = {c: ColumnStats.from_json(s) for c, s in data["columns"].items()}
+        stats = cls(data["row_count"], columns)
+        stats.fingerprint = data["fingerprint"]
+        stats.analyzed = data["analyzed"]
+        return stats
+
+
+class StatsRegistry:
+    """
+    Статистика всех таблиц, хранится в db_stats.json рядом с db_meta.json.
+
+    Статистика свежая, пока отпечаток файлов таблицы совпадает с
+    записанным: изменения через пул таблиц учитываются сразу (observe,
+    sync), а изменения другими процессами делают ее устаревшей. Отсечение
+    запросов по min/max использует только свежую статистику, порядок
+    проверки условий — любую.
+    """
+
+    def __init__(self):
+        self._tables: dict[str, TableStats] = {}
+        self._pending: str | None = None
+        self._changed = False
+
+    def load(self, filepath: str) -> None:
+        """Сбросить статистику и отложить чтение filepath до первого обращения."""
+        self._tables = {}
+        self._pending = filepath
+        self._changed = False
+
+    def _loaded(self) -> dict[str, TableStats]:
+        if self._pending is not None:
+            filepath, self._pending = self._pending, None
+            for table_name, data in load_metadata(filepath).items():
+                self._tables[table_name] = TableStats.from_json(data)
+        return self._tables
+
+    def save(self, filepath: str) -> None:
+        if not self._changed:
+            return
+        save_metadata(
+            filepath,
+            {name: t.to_json() for name, t in self._loaded().items()},
+        )
+        self._changed = False
+
+    def analyze(
+        self,
+        table_name: str,
+        rows: list[dict],
+        schema: dict[str, str],
+        buckets: int = STATS_HISTOGRAM_BUCKETS,
+    ) -> TableStats:
+        """Собрать статистику по строкам таблицы, согласованным с ее файлами."""
+        columns = {
+            column: ColumnStats.build([row.get(column) for row in rows], buckets)
+            for column in schema
+        }
+        stats = TableStats(len(rows), columns)
+        stats.fingerprint = _fingerprint(get_table_log(table_name).signature())
+        self._loaded()[table_name] = stats
+        self._changed = True
+        return stats
+
+    def get(self, table_name: str) -> TableStats | None:
+        return self._loaded().get(table_name)
+
+    def fresh(self, table_name: str) -> TableStats | None:
+        """Статистика, если файлы таблицы не менялись в обход пула."""
+        stats = self._loaded().get(table_name)
+        if stats is None:
+            return None
+        signature = _fingerprint(get_table_log(table_name).signature())
+        return stats if stats.fingerprint == signature else None
+
+    def observe(self, table_name: str, rows: list[dict], changed: list[dict]) -> None:
+        """Учесть добавленные и измененные строки (удаления — только в row_count)."""
+        stats = self._loaded().get(table_name)
+        if stats is None:
+            return
+        stats.row_count = len(rows)
+        for row in changed:
+            for column, column_stats in stats.columns.items():
+                column_stats.add(row.get(column))
+        self._changed = True
+
+    def sync(self, table_name: str, before: tuple, after: tuple) -> None:
+        """
+        Файлы таблицы перезаписаны пулом: было before, стало after. Если
+        статистика была согласована с before, она согласована и с after —
+        все изменения уже учтены через observe.
+        """
+        stats = self._loaded().get(table_name)
+        if stats is not None and stats.fingerprint == _fingerprint(before):
+            stats.fingerprint = _fingerprint(after)
+            self._changed = True
+
+    def may_match(self, table_name: str, expr: Expr | None) -> bool:
+        """False, если по свежей статистике условию не отвечает ни одна строка."""
+        if expr is None:
+            return True
+        stats = self.fresh(table_name)
+        return stats is None or stats.may_match(expr)
+
+    def row_count(self, table_name: str) -> int | None:
+        stats = self.fresh(table_name)
+        return stats.row_count if stats is not None else None
+
+    def order(self, table_name: str, expr: Expr | None) -> Expr | None:
+        stats = self._loaded().get(table_name)
+        if expr is None or stats is None:
+            return expr
+        return stats.order(expr)
+
+    def drop_table(self, table_name: str) -> None:
+        if self._loaded().pop(table_name, None) is not None:
+            self._changed = True
+
+
+table_stats = StatsRegistry()
@@ -1,7 +1,16 @@
+import csv
 import json
 import os
+from typing import Any, Iterator
 
-from src.primitive_db.constants import DATA_DIR
+from src.primitive_db.constants import DATA_DIR, TXN_FILE
+from src.primitive_db.metrics import metrics
+from src.primitive_db.storage import (
+    close_all,
+    drop_table_log,
+    get_table_log,
+    write_json_atomic,
+)
 
 
 def load_metadata(filepath):
@@ -14,9 +23,17 @@ def load_metadata(filepath):
 
 
 def save_metadata(filepath, data):
-    """Сохраняет метаданные в JSON-файл."""
-    with open(filepath, "w", encoding="utf-8") as file:
-        json.dump(data, file, indent=4, ensure_ascii=False)
+    """Сохраняет метаданные в JSON-файл (атомарно, через временный файл)."""
+    write_json_atomic(filepath, data)
+
+
+def file_signature(filepath: str) -> tuple | None:
+    """(mtime, размер) файла или None, если файла нет."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
 
 
 def _ensure_data_dir() -> None:
@@ -25,27 +42,151 @@ def _ensure_data_dir() -> None:
         os.makedirs(DATA_DIR, exist_ok=True)
 
 
-def _table_path(table_name: str) -> str:
-    """Вернуть путь к файлу данных таблицы."""
+def load_table_data(table_name: str) -> list[dict]:
+    """
+    Загрузить данные таблицы: снимок data/<table>.json и журнал изменений.
+    Если файлов нет — вернуть пустой список. Сегментированная таблица
+    целиком не загружается (см. segments.SegmentedTable).
+    """
     _ensure_data_dir()
-    return os.path.join(DATA_DIR, f"{table_name}.json")
+    log = get_table_log(table_name)
+    if log.format == "segmented":
+        raise ValueError(
+            f'Таблица "{table_name}" хранится сегментами и не загружается целиком.'
+        )
+    metrics.add("bytes_read_total", sum(size for _, _, size in log.signature()))
+    return log.load()
 
 
-def load_table_data(table_name: str) -> list[dict]:
+def save_table_data(table_name: str, data: list[dict]) -> None:
+    """Полностью перезаписать данные таблицы в data/<table>.json."""
+    _ensure_data_dir()
+    log = get_table_log(table_name)
+    log.write_snapshot(data)
+    metrics.add("bytes_written_total", os.path.getsize(log.snapshot_path))
+
+
+def change_records(
+    changed: list[dict] | None = None,
+    deleted_ids: list[int] | None = None,
+    next_id: int | None = None,
+) -> list[dict]:
     """
-    Загрузить данные таблицы из data/<table>.json. 
-    Если файла нет — вернуть пустой список.
+    Записи журнала для измененных строк и удаленных ID. next_id —
+    счетчик следующего ID, его хранит запись del.
     """
-    path = _table_path(table_name)
-    try:
-        with open(path, "r", encoding="utf-8") as f:
-            return json.load(f)
-    except FileNotFoundError:
-        return []
+    records: list[dict] = [{"op": "put", "row": row} for row in changed or []]
+    if deleted_ids:
+        record = {"op": "del", "ids": list(deleted_ids)}
+        if next_id is not None:
+            record["next_id"] = next_id
+        records.append(record)
+    return records
 
 
-def save_table_data(table_name: str, data: list[dict]) -> None:
-    """Сохранить данные таблицы в data/<table>.json."""
-    path = _table_path(table_name)
-    with open(path, "w", encoding="utf-8") as f:
-        json.dump(data, f, indent=4, ensure_ascii=False)
+def log_table_changes(
+    table_name: str,
+    changed: list[dict] | None = None,
+    deleted_ids: list[int] | None = None,
+    next_id: int | None = None,
+) -> None:
+    """Дописать измененные строки и удаленные ID в журнал таблицы."""
+    records = change_records(changed, deleted_ids, next_id)
+    written = get_table_log(table_name).append(records)
+    metrics.add("bytes_written_total", written)
+
+
+def delete_table_data(table_name: str) -> None:
+    """Удалить файлы данных таблицы (снимок и журнал)."""
+    drop_table_log(table_name)
+
+
+def _apply_transaction(txn: dict) -> None:
+    """
+    Применить зафиксированную транзакцию. Повторное применение безопасно:
+    метаданные перезаписываются целиком, записи журнала идемпотентны.
+    """
+    for table_name in txn["dropped"]:
+        delete_table_data(table_name)
+    for table_name, records in txn["tables"].items():
+        log = get_table_log(table_name)
+        log.append(records)
+        log.sync()
+    save_metadata(txn["meta_file"], txn["metadata"])
+
+
+def commit_transaction(
+    meta_file: str,
+    metadata: dict,
+    tables: dict[str, list[dict]],
+    dropped: list[str],
+) -> None:
+    """
+    Зафиксировать транзакцию: метаданные, записи журналов таблиц и
+    удаленные таблицы сначала атомарно записываются в один файл
+    TXN_FILE (временный файл, fsync, переименование) — это точка
+    фиксации. Затем изменения переносятся в файлы базы, и TXN_FILE
+    удаляется. Если процесс прервется после точки фиксации,
+    recover_transaction при следующем запуске доведет перенос до конца.
+    """
+    txn = {
+        "meta_file": meta_file,
+        "metadata": metadata,
+        "tables": tables,
+        "dropped": dropped,
+    }
+    write_json_atomic(TXN_FILE, txn)
+    _apply_transaction(txn)
+    os.remove(TXN_FILE)
+
+
+def recover_transaction() -> bool:
+    """Довести до конца транзакцию, прерванную после фиксации."""
+    if not os.path.exists(TXN_FILE):
+        return False
+    _apply_transaction(load_metadata(TXN_FILE))
+    os.remove(TXN_FILE)
+    return True
+
+
+def close_table_storage() -> None:
+    """Сбросить на диск журналы всех таблиц."""
+    close_all()
+
+
+def read_import_file(filepath: str, columns: list[str]) -> Iterator[list[Any]]:
+    """
+    Потоково читать записи для импорта из .csv или .jsonl.
+
+    В CSV первая строка пропускается, если совпадает с именами столбцов.
+    В JSONL каждая строка — объект с ключами-столбцами или список значений.
+    Столбец ID во входных данных игнорируется.
+    """
+    ext = os.path.splitext(filepath)[1].lower()
+    with open(filepath, "r", encoding="utf-8", newline="") as f:
+        if ext == ".csv":
+            reader = csv.reader(f)
+            header = next(reader, None)
+            if header is None:
+                return
+            header = [h.strip() for h in header]
+            id_pos = header.index("ID") if "ID" in header else None
+            if [h for h in header if h != "ID"] != columns:
+                id_pos = None
+                yield header
+            for record in reader:
+                if id_pos is not None:
+                    record = record[:id_pos] + record[id_pos + 1:]
+                if record:
+                    yield record
+        elif ext == ".jsonl":
+            for line in f:
+                if not line.strip():
+                    continue
+                record = json.loads(line)
+                if isinstance(record, dict):
+                    yield [record[c] for c in columns]
+                else:
+                    yield record
+        else:
+            raise ValueError(f"Неподдерживаемый формат файла: {ext or filepath}")
@@ -0,0 +1,174 @@
+import os
+import queue
+import signal
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+
+import pytest
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def run_main(
+    cwd: Path, *args: str, script: str = "", timeout: float = 60
+) -> subprocess.CompletedProcess:
+    """Запустить программу с аргументами args в каталоге cwd."""
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    return subprocess.run(
+        [sys.executable, "-m", "src.primitive_db.main", *args],
+        input=script,
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=timeout,
+    )
+
+
+def run_database(
+    cwd: Path, script: str, *args: str, timeout: float = 60
+) -> subprocess.CompletedProcess:
+    """Выполнить команды script в отдельном процессе базы в каталоге cwd."""
+    return run_main(cwd, "--script", "-", "-y", *args, script=script, timeout=timeout)
+
+
+class DatabaseProcess:
+    """Процесс базы, читающий команды по одной из stdin."""
+
+    def __init__(self, cwd: Path):
+        env = dict(os.environ, PYTHONPATH=str(ROOT), PYTHONUNBUFFERED="1")
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "src.primitive_db.main", "--script", "-", "-y"],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.STDOUT,
+            cwd=cwd,
+            env=env,
+            text=True,
+        )
+        self.lines: queue.Queue[str] = queue.Queue()
+        threading.Thread(target=self._read, daemon=True).start()
+
+    def _read(self) -> None:
+        for line in self.process.stdout:
+            self.lines.put(line)
+
+    def send(self, command: str, expect: str, timeout: float = 30) -> str:
+        """Отправить команду и вернуть вывод до строки, содержащей expect."""
+        self.process.stdin.write(command + "\n")
+        self.process.stdin.flush()
+        output = ""
+        while expect not in output:
+            try:
+                output += self.lines.get(timeout=timeout)
+            except queue.Empty:
+                raise AssertionError(f"нет {expect!r} в выводе: {output}") from None
+        return output
+
+    def close(self) -> None:
+        self.process.stdin.close()
+        try:
+            self.process.wait(timeout=30)
+        except subprocess.TimeoutExpired:
+            self.process.kill()
+
+
+@pytest.fixture
+def session(tmp_path):
+    """Процесс базы, которому команды отправляются по одной."""
+    process = DatabaseProcess(tmp_path)
+    yield process
+    process.close()
+
+
+CRASH_SCRIPT = """
+import os
+import sys
+
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import Session
+from src.primitive_db.storage import configure_storage, get_table_log
+
+configure_storage(compact_threshold={compact_threshold})
+set_auto_confirm(True)
+session = Session()
+for command in sys.stdin.read().splitlines():
+    session.execute(command)
+for table_name in {wait_for!r}:
+    get_table_log(table_name).wait()
+os._exit(0)
+"""
+
+
+def crash_database(
+    cwd: Path,
+    script: str,
+    compact_threshold: int = 1000,
+    wait_for: tuple[str, ...] = (),
+) -> subprocess.CompletedProcess:
+    """
+    Выполнить команды script и завершить процесс без закрытия сессии
+    (как при сбое), дождавшись фонового уплотнения таблиц wait_for.
+    """
+    code = CRASH_SCRIPT.format(compact_threshold=compact_threshold, wait_for=wait_for)
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    return subprocess.run(
+        [sys.executable, "-c", code],
+        input=script,
+        cwd=cwd,
+        env=env,
+        capture_output=True,
+        text=True,
+        timeout=60,
+    )
+
+
+@pytest.fixture
+def crash(tmp_path):
+    """Выполнение скриптов с аварийным завершением процесса."""
+
+    def run(script: str, **kwargs):
+        return crash_database(tmp_path, script, **kwargs)
+
+    return run
+
+
+@pytest.fixture
+def database(tmp_path):
+    """Запуск скриптов базы во временном каталоге."""
+
+    def run(script: str, *args: str, timeout: float = 60):
+        return run_database(tmp_path, script, *args, timeout=timeout)
+
+    return run
+
+
+@pytest.fixture
+def server(tmp_path):
+    """Сервер базы (database serve) на Unix-сокете; значение — путь сокета."""
+    socket_path = str(tmp_path / "db.sock")
+    env = dict(os.environ, PYTHONPATH=str(ROOT))
+    command = [sys.executable, "-m", "src.primitive_db.main", "serve"]
+    process = subprocess.Popen(
+        [*command, "--socket", socket_path],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        cwd=tmp_path,
+        env=env,
+        text=True,
+    )
+    deadline = time.monotonic() + 30
+    while not os.path.exists(socket_path):
+        if process.poll() is not None or time.monotonic() > deadline:
+            process.kill()
+            raise AssertionError(f"сервер не запустился: {process.stdout.read()}")
+        time.sleep(0.05)
+    yield socket_path
+    process.send_signal(signal.SIGINT)
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
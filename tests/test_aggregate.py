@@ -0,0 +1,94 @@
+import pytest
+
+from src.primitive_db.aggregate import (
+    Aggregate,
+    aggregate,
+    finish,
+    fold,
+    merge,
+    parse_select_list,
+)
+
+ROWS = [
+    {"ID": 1, "city": "x", "age": 10},
+    {"ID": 2, "city": "y", "age": 20},
+    {"ID": 3, "city": "x", "age": 30},
+    {"ID": 4, "city": "y"},
+    {"ID": 5, "city": "x", "age": 5},
+]
+
+ITEMS = "count(*), count(age), sum(age), avg(age), min(age), max(age)"
+
+
+def test_parse_select_list():
+    items = parse_select_list("city, COUNT( * ), avg(age)")
+    assert items[0] == "city"
+    assert [(a.func, a.column) for a in items[1:]] == [("count", "*"), ("avg", "age")]
+    with pytest.raises(ValueError):
+        parse_select_list("sum(*)")
+    with pytest.raises(ValueError):
+        parse_select_list("age + 1")
+
+
+def test_aggregates_without_group_by():
+    items = parse_select_list(ITEMS)
+    assert aggregate(ROWS, items, []) == [
+        {
+            "count(*)": 5,
+            "count(age)": 4,
+            "sum(age)": 65,
+            "avg(age)": 16.25,
+            "min(age)": 5,
+            "max(age)": 30,
+        }
+    ]
+
+
+def test_group_by_keeps_first_appearance_order():
+    items = parse_select_list("city, count(*), avg(age), max(age)")
+    assert aggregate(ROWS, items, ["city"]) == [
+        {"city": "x", "count(*)": 3, "avg(age)": 15.0, "max(age)": 30},
+        {"city": "y", "count(*)": 2, "avg(age)": 20.0, "max(age)": 20},
+    ]
+
+
+def test_empty_input():
+    items = parse_select_list(ITEMS)
+    assert aggregate([], items, []) == [
+        {
+            "count(*)": 0,
+            "count(age)": 0,
+            "sum(age)": 0,
+            "avg(age)": None,
+            "min(age)": None,
+            "max(age)": None,
+        }
+    ]
+    assert aggregate([], parse_select_list("city, count(*)"), ["city"]) == []
+
+
+@pytest.mark.parametrize("split", [0, 1, 2, 4, 5])
+def test_merge_of_partial_folds_matches_single_fold(split):
+    items = parse_select_list("city, " + ITEMS)
+    parts = [
+        fold(ROWS[:split], items, ["city"]),
+        fold([], items, ["city"]),
+        fold(ROWS[split:], items, ["city"]),
+    ]
+    merged = finish(merge(parts, items), items, ["city"])
+    assert merged == aggregate(ROWS, items, ["city"])
+
+    whole = parse_select_list(ITEMS)
+    parts = [fold(ROWS[:split], whole, []), fold(ROWS[split:], whole, [])]
+    assert finish(merge(parts, whole), whole, []) == aggregate(ROWS, whole, [])
+
+
+def test_merge_skips_empty_partial_state():
+    agg = Aggregate("min", "age")
+    state = agg.start()
+    agg.merge(state, agg.start())
+    agg.merge(state, [1, 7])
+    agg.merge(state, [0, None])
+    agg.merge(state, [2, 3])
+    assert state == [3, 3]
+    assert agg.result(state) == 3
@@ -0,0 +1,26 @@
+import json
+
+import pytest
+from conftest import run_main
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary", "segmented"])
+def test_bench_runs_for_each_format(tmp_path, fmt):
+    result = run_main(
+        tmp_path,
+        "bench",
+        "--rows", "50",
+        "--ops", "3",
+        "--format", fmt,
+        "--output", "bench.json",
+        timeout=120,
+    )
+    assert result.returncode == 0, result.stderr
+    report = json.loads((tmp_path / "bench.json").read_text(encoding="utf-8"))
+    assert report["format"] == fmt
+    operations = report["sizes"][0]["operations"]
+    assert operations["insert"]["count"] == 3
+    assert operations["update"]["count"] == 3
+    indexed = fmt != "segmented"
+    assert (operations["select_eq_index"] is not None) == indexed
+    assert (operations["load"] is not None) == indexed
@@ -0,0 +1,56 @@
+import json
+
+import pytest
+
+from src.primitive_db.buffer_pool import TablePool
+from src.primitive_db.indexes import index_registry
+
+
+def _pool_stats(output: str) -> dict:
+    start = output.index("{")
+    end = output.rindex("}") + 1
+    return json.loads(output[start:end])["table_pool"]
+
+
+def test_flush_every_zero_keeps_changes_in_pool(database, tmp_path):
+    script = "create_table t v:int\ninsert into t values (1)\nstats json\nexit\n"
+    out = database(script, "--flush-every", "0").stdout
+    assert _pool_stats(out)["pending_rows"] == 1
+
+    out = database("select from t\nexit\n").stdout
+    assert "| 1 " in out
+
+
+def test_default_flush_writes_every_change(database):
+    script = "create_table t v:int\ninsert into t values (1)\nstats json\nexit\n"
+    assert _pool_stats(database(script).stdout)["pending_rows"] == 0
+
+
+def _two_tables(first: str, second: str) -> str:
+    return (
+        f"create_table {first} v:int\ncreate_table {second} v:int\n"
+        f"insert into {first} values (1)\ninsert into {second} values (2)\n"
+        "stats json\nexit\n"
+    )
+
+
+def test_pool_memory_evicts_tables(database):
+    assert _pool_stats(database(_two_tables("a", "b")).stdout)["tables"] == 2
+    out = database(_two_tables("c", "d"), "--pool-memory", "0").stdout
+    assert _pool_stats(out)["tables"] == 1
+
+
+def test_record_changes_rejects_changed_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pool = TablePool(flush_every=0)
+    rows = pool.get("t")
+    row = {"ID": 1, "v": 1}
+    rows.append(row)
+    index_registry.get("t", rows).on_insert(row)
+    pool.record_changes("t", rows, changed=[row])
+
+    row["ID"] = 10
+    with pytest.raises(ValueError, match="ID=10"):
+        pool.record_changes("t", rows, changed=[row])
+    assert len(pool.pending_records()["t"]) == 1
+    index_registry.drop_table("t")
@@ -0,0 +1,59 @@
+import pytest
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary"])
+def test_cache_sees_other_process_writes(database, session, fmt):
+    database(
+        f"create_table t v:int\ninsert into t values (1)\nconvert_table t {fmt}\nexit\n"
+    )
+    session.send("select from t", "| 1  | 1 |")
+    assert "(из кэша)" in session.send("select from t\nmark", "'mark'")
+
+    database("insert into t values (2)\nexit\n")
+    out = session.send("select from t\nmark", "'mark'")
+    assert "| 2  | 2 |" in out
+    assert "(из кэша)" not in out
+
+
+JOIN_SETUP = (
+    "create_table users name:str\n"
+    "create_table orders user_id:int\n"
+    'insert into users values ("Ann")\n'
+    "insert into orders values (1)\n"
+)
+
+
+def test_cache_hit_reported_after_rows(database):
+    out = database("create_table t v:int\ninsert into t values (1)\n"
+                   "select from t\nselect from t\nexit\n").stdout
+    first, second = out.split("+----+---+\n| ID | v |")[1:3]
+    assert "(из кэша)" not in first
+    rows, hit = second.rsplit("+----+---+\n", 1)
+    assert "| 1  | 1 |" in rows
+    assert hit.startswith("(из кэша) Запрос 'all' найден.")
+
+
+def test_join_output_has_no_cache_lines(database):
+    script = JOIN_SETUP + (
+        "select from users\n"
+        "select from users join orders on users.ID = orders.user_id\nexit\n"
+    )
+    out = database(script).stdout
+    assert "(из кэша)" not in out
+
+
+def test_cache_hit_in_result_not_output(tmp_path, monkeypatch):
+    from src.primitive_db.engine import Session
+
+    monkeypatch.chdir(tmp_path)
+    session = Session(echo=False)
+    try:
+        session.execute("create_table t v:int")
+        session.execute("insert into t values (1)")
+        assert not session.execute("select from t").cached
+        result = session.execute("select from t")
+        assert result.cached
+        assert result.rows == [{"ID": 1, "v": 1}]
+        assert result.output == ""
+    finally:
+        session.close()
@@ -0,0 +1,97 @@
+import pytest
+
+from src.primitive_db.expr import And, Between, Compare, InList, Or, parse_condition
+
+ROWS = [
+    {"ID": 1, "name": "a", "age": 10},
+    {"ID": 2, "name": "b", "age": 20},
+    {"ID": 3, "name": "c", "age": 30},
+]
+
+
+def _matching(text: str) -> list[int]:
+    predicate = parse_condition(text).compile()
+    return [row["ID"] for row in ROWS if predicate(row)]
+
+
+def test_and_binds_tighter_than_or():
+    expr = parse_condition('ID = 1 or name = "b" and age = 30')
+    assert isinstance(expr, Or)
+    assert isinstance(expr.items[1], And)
+    assert _matching('ID = 1 or name = "b" and age = 30') == [1]
+    assert _matching('(ID = 1 or name = "b") and age = 20') == [2]
+
+
+@pytest.mark.parametrize(
+    "text, expected",
+    [
+        ("age = 20", [2]),
+        ("age != 20", [1, 3]),
+        ("age <> 20", [1, 3]),
+        ("age < 20", [1]),
+        ("age <= 20", [1, 2]),
+        ("age > 20", [3]),
+        ("age >= 20", [2, 3]),
+        ('name in ("a", "c")', [1, 3]),
+        ("age between 15 and 30", [2, 3]),
+        ('age between 15 and 30 and name != "c"', [2]),
+    ],
+)
+def test_comparisons(text, expected):
+    assert _matching(text) == expected
+
+
+def test_node_types_and_columns():
+    expr = parse_condition('age between 1 and 5 and name in ("a") and ID = 2')
+    assert [type(item) for item in expr.items] == [Between, InList, Compare]
+    assert expr.columns() == {"age", "name", "ID"}
+    assert expr.equalities() == {"ID": 2}
+    assert parse_condition("ID = 1 or ID = 2").equalities() == {}
+
+
+def test_missing_column_and_wrong_type_do_not_match():
+    predicate = parse_condition("score > 5").compile()
+    assert not predicate({"ID": 1})
+    assert not parse_condition("age > 5").compile()({"age": "x"})
+    assert not parse_condition("score != 5").compile()({"ID": 1})
+
+
+@pytest.mark.parametrize(
+    "text", ["age >", "age = 1 and", "(age = 1", "age = 1 )", "age in 1"]
+)
+def test_malformed_condition(text):
+    with pytest.raises(ValueError):
+        parse_condition(text)
+
+
+PLANNER_SETUP = (
+    "create_table t name:str age:int city:str\n"
+    'insert into t values ("a", 10, "x")\n'
+    'insert into t values ("b", 20, "y")\n'
+    'insert into t values ("c", 30, "x")\n'
+    'insert into t values ("d", 40, "z")\n'
+    'insert into t values ("e", 50, "y")\n'
+    "create_index t city\n"
+    "create_index t age sorted\n"
+)
+
+
+@pytest.mark.parametrize(
+    "where, plan",
+    [
+        ("ID = 2", "pk [ID = 2], ~1 строк"),
+        ("ID in (1, 2)", "pk [ID in (1, 2)], ~2 строк"),
+        ('city = "x"', "hash [city = 'x'], ~2 строк"),
+        ("age > 35", "range [age > 35], ~2 строк"),
+        ("age <= 20", "range [age <= 20], ~2 строк"),
+        ("age between 20 and 30", "range [age between 20 and 30], ~2 строк"),
+        ('ID = 1 or city = "z"', "union [ID = 1 | city = 'z'], ~2 строк"),
+        ('age > 35 and name = "e"', "range [age > 35], ~2 строк"),
+        ('name = "a"', "full_scan, ~5 строк"),
+        ('ID = 1 or name = "b"', "full_scan, ~5 строк"),
+        ("age >= 0", "full_scan, ~5 строк"),
+    ],
+)
+def test_explain_access_plan(database, where, plan):
+    out = database(PLANNER_SETUP + f"explain select from t where {where}\n").stdout
+    assert f"План: {plan}" in out
@@ -0,0 +1,61 @@
+import pytest
+
+SETUP = (
+    "create_table t name:str v:int\n"
+    'insert into t values ("a", 1)\n'
+    'insert into t values ("b", 2)\n'
+)
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary", "segmented"])
+def test_convert_keeps_rows(database, fmt):
+    out = database(SETUP + f"convert_table t {fmt}\nexit\n").stdout
+    assert f'Таблица "t" преобразована в формат {fmt}' in out
+
+    out = database(
+        'select from t where name = "b"\n'
+        'update t set v = 5 where name = "a"\n'
+        "select from t where v = 5\nexit\n"
+    ).stdout
+    assert "| 2  |  b   | 2 |" in out
+    assert "| 1  |  a   | 5 |" in out
+
+
+@pytest.mark.parametrize("fmt", ["binary", "segmented"])
+def test_convert_during_compaction(database, tmp_path, fmt):
+    (tmp_path / "rows.csv").write_text(
+        "v\n" + "".join(f"{i}\n" for i in range(50_000)), encoding="utf-8"
+    )
+    script = (
+        "create_table t v:int\nimport t from rows.csv\n"
+        f"convert_table t {fmt}\nselect count(*) from t\nexit\n"
+    )
+    out = database(script, "--compact-threshold", "1000", timeout=30).stdout
+    assert f'Таблица "t" преобразована в формат {fmt}' in out
+    assert "|  50000   |" in out
+    assert not list((tmp_path / "data").glob("*.tmp"))
+
+
+@pytest.mark.parametrize("fmt", ["json", "binary", "segmented"])
+def test_update_checks_column_types(database, fmt):
+    database(SETUP + f"convert_table t {fmt}\nexit\n")
+    result = database(
+        'update t set v = "abc" where ID = 1\n'
+        "update t set bogus = 1 where ID = 1\n"
+        'update t set v = "7" where ID = 2\n'
+        "select from t where v = 1\nselect from t where v = 7\nexit\n",
+        "--compact-threshold",
+        "2",
+    )
+    assert "Некорректное значение: Некорректный тип значения: 'abc' для int" in (
+        result.stdout
+    )
+    assert 'Ошибка: Столбец "bogus" не найден.' in result.stdout
+    assert "| 1  |  a   | 1 |" in result.stdout
+    assert "| 2  |  b   | 7 |" in result.stdout
+    assert "Traceback" not in result.stderr
+
+
+def test_update_unknown_table(database):
+    out = database("update nope set v = 1 where ID = 1\nexit\n").stdout
+    assert 'Ошибка: Таблица "nope" не существует.' in out
@@ -0,0 +1,47 @@
+SCRIPT = (
+    "create_table t v:int\n"
+    "insert into t values (1)\n"
+    "insert into t values (2)\n"
+    "insert into t values (3)\n"
+    "delete from t where ID = 3\n"
+)
+
+
+def test_deleted_id_not_reused_after_crash(crash, database):
+    crash(SCRIPT)
+    out = database("insert into t values (4)\nexit\n").stdout
+    assert 'Запись с ID=4 успешно добавлена в таблицу "t".' in out
+
+
+def test_sequence_survives_compaction(crash, database, tmp_path):
+    crash(SCRIPT, compact_threshold=4, wait_for=("t",))
+    assert not (tmp_path / "data" / "t.wal.1").exists()
+    assert (tmp_path / "data" / "t.seq").read_text() == "4"
+
+    out = database("insert into t values (4)\nexit\n").stdout
+    assert 'Запись с ID=4 успешно добавлена в таблицу "t".' in out
+
+
+def test_drop_table_resets_sequence(crash, database, tmp_path):
+    crash(SCRIPT, compact_threshold=4, wait_for=("t",))
+    out = database(
+        "drop_table t\ncreate_table t v:int\ninsert into t values (1)\nexit\n"
+    ).stdout
+    assert 'Запись с ID=1 успешно добавлена в таблицу "t".' in out
+
+
+def test_sequence_kept_across_segmented_conversion(database):
+    out = database(
+        SCRIPT + "convert_table t segmented\ninsert into t values (4)\n"
+        "delete from t where ID = 4\nconvert_table t json\n"
+        "insert into t values (5)\nexit\n"
+    ).stdout
+    assert 'Запись с ID=4 успешно добавлена в таблицу "t".' in out
+    assert 'Запись с ID=5 успешно добавлена в таблицу "t".' in out
+
+
+def test_sequence_kept_across_segmented_conversion_after_restart(database):
+    database(SCRIPT + "convert_table t segmented\nexit\n")
+    database("delete from t where ID = 2\nconvert_table t binary\nexit\n")
+    out = database("insert into t values (4)\nexit\n").stdout
+    assert 'Запись с ID=4 успешно добавлена в таблицу "t".' in out
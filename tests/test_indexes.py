@@ -0,0 +1,103 @@
+import pytest
+from conftest import run_database
+
+from src.primitive_db.indexes import SortedIndex
+
+ROWS = [
+    {"ID": 1, "age": 30},
+    {"ID": 2, "age": 10},
+    {"ID": 3, "age": 30},
+    {"ID": 4, "age": 20},
+    {"ID": 5, "age": 30},
+    {"ID": 6},
+]
+
+
+def _index() -> SortedIndex:
+    index = SortedIndex("age")
+    index.build(ROWS)
+    return index
+
+
+def _ids(index: SortedIndex, *args, **kwargs) -> set[int]:
+    return index.ids(*index.bounds(*args, **kwargs))
+
+
+def test_duplicates_are_ordered_by_id():
+    index = _index()
+    assert index.entries == [(10, 2), (20, 4), (30, 1), (30, 3), (30, 5)]
+    assert list(index.iter_ids()) == [2, 4, 1, 3, 5]
+    assert list(index.iter_ids(descending=True)) == [1, 3, 5, 4, 2]
+
+
+@pytest.mark.parametrize(
+    "args, kwargs, expected",
+    [
+        ((20, 30), {}, {4, 1, 3, 5}),
+        ((20, 30), {"low_inclusive": False}, {1, 3, 5}),
+        ((20, 30), {"high_inclusive": False}, {4}),
+        ((30, 30), {}, {1, 3, 5}),
+        ((30, 30), {"low_inclusive": False}, set()),
+        ((None, 20), {}, {2, 4}),
+        ((20, None), {"low_inclusive": False}, {1, 3, 5}),
+        ((15, 25), {}, {4}),
+        ((40, None), {}, set()),
+        ((30, 10), {}, set()),
+    ],
+)
+def test_bounds(args, kwargs, expected):
+    assert _ids(_index(), *args, **kwargs) == expected
+
+
+def test_add_and_remove_keep_order():
+    index = _index()
+    index.remove({"ID": 3, "age": 30})
+    index.remove({"ID": 3, "age": 30})
+    index.remove({"ID": 4, "age": 99})
+    index.add({"ID": 7, "age": 30})
+    index.add({"ID": 8, "age": 5})
+    assert list(index.iter_ids()) == [8, 2, 4, 1, 5, 7]
+    assert len(index) == 6
+
+
+SETUP = (
+    "create_table t name:str age:int\n"
+    'insert into t values ("a", 30)\n'
+    'insert into t values ("b", 10)\n'
+    'insert into t values ("c", 30)\n'
+    'insert into t values ("d", 20)\n'
+    'insert into t values ("e", 30)\n'
+)
+
+QUERIES = (
+    "select from t order by age desc limit 3 offset 1\n"
+    "select from t order by age limit 2 offset 2\n"
+    "select from t where age >= 20 order by age desc\n"
+    'update t set age = 5 where name = "c"\n'
+    'update t set age = 40 where name = "b"\n'
+    'delete from t where name = "d"\n'
+    "select from t where age < 25 order by age\n"
+    "select from t where age between 5 and 40 order by age desc limit 2\n"
+    "exit\n"
+)
+
+
+def _results(output: str) -> list[str]:
+    output = output.split("Выход из программы")[0]
+    return [line for line in output.splitlines() if line.startswith("| ")]
+
+
+def test_order_by_with_index_matches_full_sort(tmp_path, database):
+    plain = _results(database(SETUP + QUERIES).stdout)
+    indexed_dir = tmp_path / "indexed"
+    indexed_dir.mkdir()
+    script = SETUP + "create_index t age sorted\n" + QUERIES
+    indexed = _results(run_database(indexed_dir, script).stdout)
+    assert indexed == plain
+    assert indexed[1:4] == [
+        "| 3  |  c   |  30 |",
+        "| 5  |  e   |  30 |",
+        "| 4  |  d   |  20 |",
+    ]
+    assert "| 3  |  c   |  5  |" in indexed
+    assert "| 2  |  b   |  40 |" in indexed
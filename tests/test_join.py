@@ -0,0 +1,123 @@
+import pytest
+
+from src.primitive_db.engine import Session
+from src.primitive_db.expr import parse_condition
+from src.primitive_db.join import qualify, split_where
+
+SCHEMAS = {
+    "users": {"ID": "int", "name": "str", "age": "int"},
+    "orders": {"ID": "int", "user_id": "int", "total": "int", "name": "str"},
+}
+
+
+def test_qualify():
+    assert qualify("age", SCHEMAS) == "users.age"
+    assert qualify("orders.name", SCHEMAS) == "orders.name"
+    with pytest.raises(ValueError, match="в нескольких таблицах"):
+        qualify("name", SCHEMAS)
+    with pytest.raises(ValueError, match='"foo" не найден'):
+        qualify("foo", SCHEMAS)
+    with pytest.raises(ValueError, match='"users.total" не найден'):
+        qualify("users.total", SCHEMAS)
+
+
+def test_split_where_pushes_down_single_table_terms():
+    expr = parse_condition(
+        'age > 18 and orders.name = "x" and total between 1 and 5 '
+        "and (age > 60 or total > 100)"
+    )
+    pushed, residual = split_where(expr, SCHEMAS)
+    assert repr(pushed["users"]) == "age > 18"
+    assert repr(pushed["orders"]) == "(name = 'x' and total between 1 and 5)"
+    assert repr(residual) == "(users.age > 60 or orders.total > 100)"
+
+
+def test_split_where_without_condition():
+    assert split_where(None, SCHEMAS) == ({"users": None, "orders": None}, None)
+    pushed, residual = split_where(parse_condition("users.ID = 1"), SCHEMAS)
+    assert repr(pushed["users"]) == "ID = 1"
+    assert pushed["orders"] is None and residual is None
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    db = Session(echo=False)
+    for command in (
+        "create_table users name:str age:int",
+        "create_table orders user_id:int total:int name:str",
+        'insert into users values ("Ann", 30)',
+        'insert into users values ("Bob", 15)',
+        'insert into orders values (1, 10, "o1")',
+        'insert into orders values (2, 30, "o2")',
+        'insert into orders values (1, 15, "o3")',
+        'insert into orders values (1, 30, "o4")',
+    ):
+        assert db.execute(command).ok, command
+    yield db
+    db.close()
+
+
+def _pairs(db: Session, command: str) -> list[tuple[int, int]]:
+    result = db.execute(command)
+    assert result.ok, result.output
+    return [(row["users.ID"], row["orders.ID"]) for row in result.rows]
+
+
+def test_hash_join_builds_on_smaller_table(db):
+    join = "select from users join orders on users.age = orders.total"
+    out = db.execute(f"explain {join}").output
+    assert "hash_join [хеш-таблица по users.age (~2 строк), перебор orders]" in out
+    assert sorted(_pairs(db, join)) == [(1, 2), (1, 4), (2, 3)]
+
+    for _ in range(3):
+        db.execute('insert into users values ("Eve", 99)')
+    out = db.execute(f"explain {join}").output
+    assert "hash_join [хеш-таблица по orders.total (~4 строк), перебор users]" in out
+
+
+def test_index_join_matches_hash_join(db):
+    join = "select from users join orders on users.age = orders.total where age > 20"
+    hashed = _pairs(db, join)
+    db.execute("create_index orders total")
+    out = db.execute(f"explain {join}").output
+    assert "index_join [перебор users, индекс orders.total]" in out
+    assert sorted(_pairs(db, join)) == sorted(hashed) == [(1, 2), (1, 4)]
+
+
+def test_index_join_uses_larger_indexed_side(db):
+    join = "select from users join orders on users.ID = orders.user_id"
+    out = db.execute(f"explain {join}").output
+    assert "index_join [перебор orders, индекс users.ID]" in out
+    before = sorted(_pairs(db, join))
+    assert before == [(1, 1), (1, 3), (1, 4), (2, 2)]
+
+    db.execute("create_index orders user_id")
+    out = db.execute(f"explain {join}").output
+    assert "index_join [перебор users, индекс orders.user_id]" in out
+    assert sorted(_pairs(db, join)) == before
+
+
+def test_join_where_order_and_residual(db):
+    join = (
+        "select from orders join users on orders.user_id = users.ID "
+        "where users.name = \"Ann\" and (age > 40 or total > 12) "
+        "order by total desc limit 2"
+    )
+    result = db.execute(join)
+    assert [row["orders.name"] for row in result.rows] == ["o4", "o3"]
+
+
+@pytest.mark.parametrize(
+    "where, message",
+    [
+        ('name = "Ann"', 'Столбец "name" есть в нескольких таблицах'),
+        ("foo = 1", 'Столбец "foo" не найден'),
+    ],
+)
+def test_join_rejects_ambiguous_and_unknown_columns(db, where, message):
+    result = db.execute(
+        f"select from users join orders on users.ID = orders.user_id where {where}"
+    )
+    assert not result.ok
+    assert message in result.output
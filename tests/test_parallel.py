@@ -0,0 +1,74 @@
+import pytest
+
+from src.primitive_db.aggregate import aggregate, parse_select_list
+from src.primitive_db.binary_format import BinaryTable, write_table
+from src.primitive_db.expr import parse_condition
+from src.primitive_db.parallel import ParallelScanner
+
+SCHEMA = {"ID": "int", "city": "str", "age": "int", "active": "bool"}
+ROWS = [
+    {"ID": i, "city": "xyz"[i % 3], "age": i * 7 % 50, "active": i % 4 == 0}
+    for i in range(1, 1002)
+]
+
+
+@pytest.fixture
+def table(tmp_path):
+    path = str(tmp_path / "t.tbl")
+    write_table(path, SCHEMA, ROWS)
+    table = BinaryTable(path)
+    yield table
+    table.close()
+
+
+@pytest.fixture
+def scanner(monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 4)
+    scanner = ParallelScanner(workers=3, min_rows=1)
+    yield scanner
+    scanner.close()
+
+
+@pytest.mark.parametrize(
+    "where",
+    ["age > 30", 'city = "y" or age < 5', "active = true and age between 10 and 20"],
+)
+def test_parallel_match_equals_serial_scan(table, scanner, where):
+    expr = parse_condition(where)
+    predicate = expr.compile()
+    expected = [pos for pos, row in enumerate(ROWS) if predicate(row)]
+    assert scanner.match(table, expr) == expected
+    assert [row["ID"] for row in table.rows(expected)] == [
+        row["ID"] for row in ROWS if predicate(row)
+    ]
+
+
+@pytest.mark.parametrize("where", [None, "age >= 25"])
+def test_parallel_aggregate_equals_serial(table, scanner, where):
+    items = parse_select_list("city, count(*), sum(age), avg(age), min(age), max(ID)")
+    expr = parse_condition(where) if where else None
+    rows = [row for row in ROWS if expr is None or expr.compile()(row)]
+    result = scanner.aggregate(table, expr, items, ["city"])
+    assert result == aggregate(rows, items, ["city"])
+    assert [row["city"] for row in result] == ["y", "z", "x"]
+
+
+def test_pool_is_reused_between_scans(table, scanner):
+    expr = parse_condition("age = 0")
+    first = scanner.match(table, expr)
+    pool = scanner._pool
+    assert len(scanner._chunks(len(table))) == 3
+    assert scanner.match(table, expr) == first
+    assert scanner._pool is pool
+    scanner.configure(workers=2)
+    assert scanner._pool is None
+
+
+def test_applies_only_to_large_binary_tables(table, monkeypatch):
+    monkeypatch.setattr("os.cpu_count", lambda: 8)
+    assert ParallelScanner(workers=2, min_rows=1).applies(table)
+    assert not ParallelScanner(workers=2, min_rows=1).applies(ROWS)
+    assert not ParallelScanner(workers=2, min_rows=5000).applies(table)
+    assert not ParallelScanner(workers=1, min_rows=1).applies(table)
+    monkeypatch.setattr("os.cpu_count", lambda: 1)
+    assert not ParallelScanner(workers=4, min_rows=1).applies(table)
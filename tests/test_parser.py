@@ -0,0 +1,92 @@
+import shlex
+
+import pytest
+
+from src.primitive_db.expr import parse_condition
+from src.primitive_db.parser import Param, parameterize, split_command, tokenize
+from src.primitive_db.statement import _prepare, cache_stats, parse_statement
+
+
+@pytest.mark.parametrize(
+    "text",
+    [
+        "insert users Ann 28",
+        "  select   from\tusers  ",
+        'insert users "Ann Lee" 28',
+        "insert users 'Ann Lee' \"O'Neil\"",
+        'insert users a"b c"d e',
+        'insert users "" \'\'',
+        'update users set name = "a  b"\nwhere ID = 1',
+        r"insert users Ann\ Lee 28",
+        r'insert users "say \"hi\"" x',
+        r"insert users 'back\slash'",
+        "",
+    ],
+)
+def test_split_command_matches_shlex(text):
+    assert split_command(text) == shlex.split(text)
+
+
+@pytest.mark.parametrize("text", ['insert users "Ann', "insert users 'Ann", 'a"b'])
+def test_split_command_unclosed_quote(text):
+    with pytest.raises(ValueError):
+        shlex.split(text)
+    with pytest.raises(ValueError):
+        split_command(text)
+
+
+def test_tokenize():
+    assert tokenize('name = "a b" and age>=18 or x in (1,\'y\')') == [
+        ("word", "name"),
+        ("op", "="),
+        ("str", '"a b"'),
+        ("word", "and"),
+        ("word", "age"),
+        ("op", ">="),
+        ("word", "18"),
+        ("word", "or"),
+        ("word", "x"),
+        ("word", "in"),
+        ("punct", "("),
+        ("word", "1"),
+        ("punct", ","),
+        ("str", "'y'"),
+        ("punct", ")"),
+    ]
+
+
+def test_statement_template_is_parsed_once():
+    before = cache_stats()["hits"]
+    parse_statement('update t set name = "a", age = 1 where ID in (1, 2)')
+    parse_statement('update t set name = "b", age = 2 where ID in (3, 4)')
+    assert cache_stats()["hits"] > before
+
+
+def test_bound_statements_are_independent():
+    command = 'update t set name = "{}", age = {} where ID in ({}, 9)'
+    first = parse_statement(command.format("a", 1, 5))
+    second = parse_statement(command.format("b", 2, 6))
+
+    first.assignments["name"] = "changed"
+    first.where.values.append(7)
+    assert second.assignments == {"name": "b", "age": 2}
+    assert second.where.values == [6, 9]
+    third = parse_statement(command.format("c", 3, 8))
+    assert third.assignments == {"name": "c", "age": 3}
+    assert third.where.values == [8, 9]
+
+    template, _ = parameterize(tokenize(command.format("d", 4, 10)))
+    cached = _prepare(template)
+    assert all(isinstance(v, Param) for v in cached.assignments.values())
+    assert all(isinstance(v, Param) for v in cached.where.values)
+
+
+def test_bound_conditions_are_independent():
+    first = parse_condition('age between 1 and 5 and name in ("a", "b")')
+    second = parse_condition('age between 2 and 6 and name in ("c", "d")')
+    first.items[1].values.append("x")
+    first.items[0].low = 0
+    assert repr(second) == "(age between 2 and 6 and name in ('c', 'd'))"
+    third = parse_condition('age between 3 and 7 and name in ("e", "f")')
+    assert repr(third) == "(age between 3 and 7 and name in ('e', 'f'))"
+    assert third.items[1] is not first.items[1]
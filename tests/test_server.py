@@ -0,0 +1,119 @@
+import json
+import socket
+import threading
+import time
+
+import pytest
+
+from src.primitive_db.client import Client, ClientPool, ServerError
+
+
+def _raw(socket_path: str, *lines: bytes) -> list[dict]:
+    """Отправить строки запросов как есть и прочитать по ответу на каждую."""
+    with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as sock:
+        sock.settimeout(30)
+        sock.connect(socket_path)
+        reader = sock.makefile("rb")
+        responses = []
+        for line in lines:
+            sock.sendall(line + b"\n")
+            responses.append(json.loads(reader.readline()))
+        reader.close()
+        return responses
+
+
+def _count(client: Client) -> int:
+    return client.select("select count(*) from t")[0]["count(*)"]
+
+
+@pytest.fixture
+def client(server):
+    with Client(server, timeout=30) as client:
+        client.execute("create_table t v:int", check=True)
+        client.execute("insert into t values (1)", check=True)
+        yield client
+
+
+def test_malformed_request_keeps_connection(server, client):
+    bad_json, bad_utf8, good = _raw(
+        server, b'{"id": 1, "command"', b"\xff\xfe", b'{"id": 2, "command": "info t"}'
+    )
+    for response in (bad_json, bad_utf8):
+        assert not response["ok"]
+        assert response["id"] is None
+        assert response["output"].startswith("Некорректный запрос")
+    assert good["ok"] and good["id"] == 2
+
+
+def test_response_echoes_request_id(server, client):
+    text_id, plain, missing = _raw(
+        server,
+        b'{"id": "q-7", "command": "select from t"}',
+        b"select from t",
+        b'{"command": "select from t"}',
+    )
+    assert text_id["id"] == "q-7"
+    assert text_id["rows"] == [{"ID": 1, "v": 1}]
+    assert plain["id"] is None and plain["ok"]
+    assert missing["id"] is None and missing["ok"]
+    assert client.execute("select from t")["id"] == 3
+
+
+def test_transaction_blocks_other_connections(server, client):
+    with Client(server, timeout=30) as other:
+        client.execute("begin", check=True)
+        client.execute("insert into t values (2)", check=True)
+        with pytest.raises(ServerError, match="транзакция другого соединения"):
+            other.execute("select from t", check=True)
+        assert _count(client) == 2
+        client.execute("commit", check=True)
+        assert _count(other) == 2
+
+
+def test_disconnect_rolls_back_transaction(server, client):
+    owner = Client(server, timeout=30)
+    owner.execute("begin", check=True)
+    owner.execute("insert into t values (2)", check=True)
+    owner.close()
+
+    deadline = time.monotonic() + 30
+    while not client.execute("select count(*) from t")["ok"]:
+        assert time.monotonic() < deadline, "транзакция не откатилась"
+        time.sleep(0.05)
+    assert _count(client) == 1
+    client.execute("insert into t values (3)", check=True)
+    assert client.select("select from t where v = 2") == []
+
+
+def test_client_pool_concurrent_inserts(server, client):
+    pool = ClientPool(3, socket_path=server, timeout=30)
+    active, peak, guard = [0], [0], threading.Lock()
+    errors = []
+
+    def work(k: int) -> None:
+        try:
+            for i in range(25):
+                with pool.connection() as conn:
+                    with guard:
+                        active[0] += 1
+                        peak[0] = max(peak[0], active[0])
+                    conn.execute(f"insert into t values ({k * 100 + i})", check=True)
+                    with guard:
+                        active[0] -= 1
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=work, args=(k,)) for k in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=60)
+
+    assert errors == []
+    assert peak[0] <= 3
+    rows = pool.select("select from t")
+    assert len(rows) == 201
+    assert len({row["ID"] for row in rows}) == 201
+    pool.close()
+    with pytest.raises(ConnectionError):
+        pool.execute("select from t")
@@ -0,0 +1,93 @@
+from src.primitive_db import storage
+from src.primitive_db.metrics import metrics
+
+
+def _inserts(count: int) -> str:
+    lines = ["create_table t v:int"]
+    lines += [f"insert into t values ({i})" for i in range(1, count + 1)]
+    return "\n".join(lines + ["exit"]) + "\n"
+
+
+def test_compact_threshold_option(database, tmp_path):
+    assert database(_inserts(10), "--compact-threshold", "5").returncode == 0
+    assert (tmp_path / "data" / "t.json").exists()
+
+    out = database("select from t\nexit\n").stdout
+    assert all(f"| {i} " in out for i in range(1, 11))
+
+
+def test_default_compact_threshold_keeps_journal(database, tmp_path):
+    assert database(_inserts(10)).returncode == 0
+    assert not (tmp_path / "data" / "t.json").exists()
+    assert (tmp_path / "data" / "t.wal.1").exists()
+
+
+def test_storage_options_reject_negative(database):
+    result = database("exit\n", "--fsync-batch", "-1")
+    assert result.returncode == 2
+    assert "--fsync-batch" in result.stderr
+
+
+LOCK_FILES = {"t.lock", "t.write.lock"}
+
+
+def test_drop_table_removes_data_files(database, tmp_path):
+    database(_inserts(3))
+    database("create_table other v:int\ninsert into other values (1)\nexit\n")
+    database("drop_table t\nexit\n")
+    names = {path.name for path in (tmp_path / "data").iterdir()}
+    assert {name for name in names if name.startswith("t.")} == LOCK_FILES
+    assert "other.write.lock" in names
+
+
+def test_drop_table_in_transaction_removes_data_files(database, tmp_path):
+    database(_inserts(3))
+    database("begin\ndrop_table t\ncommit\nexit\n")
+    names = {path.name for path in (tmp_path / "data").iterdir()}
+    assert names == LOCK_FILES
+
+    out = database("create_table t v:int\ninsert into t values (7)\nselect from t\n")
+    assert "| 1  | 7 |" in out.stdout
+
+
+def test_update_rejects_id_and_keeps_rows_after_restart(database):
+    out = database(_inserts(3).replace("exit\n", "update t set ID = 10 where ID = 1\n"))
+    assert 'Ошибка: Столбец "ID" изменить нельзя.' in out.stdout
+    assert out.returncode == 1
+
+    out = database("select from t\nexit\n").stdout
+    assert "| 10 " not in out
+    assert all(f"| {i}  | {i} |" in out for i in (1, 2, 3))
+
+
+def _puts(*ids: int) -> list[dict]:
+    return [{"op": "put", "row": {"ID": i, "v": i}} for i in ids]
+
+
+def test_compaction_error_is_reported_and_retried(tmp_path, monkeypatch, capsys):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setitem(storage._config, "compact_threshold", 2)
+    log = storage.TableLog("t")
+
+    def broken(rows, fmt, schema=None):
+        open(storage._tmp_path(log.json_path), "w").close()
+        raise TypeError("снимок не записан")
+
+    monkeypatch.setattr(log, "_write_snapshot_tmp", broken)
+    before = metrics.snapshot()["counters"].get("compaction_errors_total", {})
+    log.append(_puts(1, 2))
+    log.wait()
+    assert 'Ошибка уплотнения журнала таблицы "t": снимок не записан' in (
+        capsys.readouterr().err
+    )
+    after = metrics.snapshot()["counters"]["compaction_errors_total"]
+    assert after != before
+    assert not list((tmp_path / "data").glob("*.tmp"))
+    assert (tmp_path / "data" / "t.wal.1").exists()
+
+    monkeypatch.delattr(log, "_write_snapshot_tmp")
+    log.append(_puts(3, 4))
+    log.wait()
+    log.close()
+    assert [r["ID"] for r in log.load()] == [1, 2, 3, 4]
+    assert not list((tmp_path / "data").glob("t.wal.*"))
@@ -0,0 +1,133 @@
+import pytest
+
+from src.primitive_db.decorators import set_auto_confirm
+from src.primitive_db.engine import Session
+from src.primitive_db.expr import parse_condition
+from src.primitive_db.table_stats import ColumnStats, HyperLogLog, range_may_match
+
+
+@pytest.mark.parametrize("n", [10, 1_000, 50_000])
+def test_hyperloglog_error_bound(n):
+    sketch = HyperLogLog()
+    for i in range(n):
+        sketch.add(f"v{i}")
+        sketch.add(f"v{i}")
+    # Погрешность ~1.04 / sqrt(4096) ≈ 1.6%; допускаем три стандартных.
+    assert abs(sketch.count() - n) <= max(1, 0.05 * n)
+    restored = HyperLogLog.from_json(sketch.to_json())
+    assert restored.precision == sketch.precision
+    assert restored.count() == sketch.count()
+
+
+def test_histogram_is_equi_depth():
+    stats = ColumnStats.build([*range(1000), None], buckets=10)
+    assert (stats.min, stats.max) == (0, 999)
+    assert stats.counts == [100] * 10
+    assert stats.bounds[:3] == [0, 100, 200]
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ("v < 250", 0.25),
+        ("v <= 249", 0.25),
+        ("v >= 900", 0.1),
+        ("v between 100 and 299", 0.2),
+        ("v = 5", 0.001),
+        ("v != 5", 0.999),
+        ("v in (1, 2, 3)", 0.003),
+        ("v > 5000", 0.0),
+        ("v < -1", 0.0),
+    ],
+)
+def test_histogram_selectivity(condition, expected):
+    stats = ColumnStats.build(list(range(1000)), buckets=10)
+    assert stats.selectivity(parse_condition(condition)) == pytest.approx(
+        expected, abs=0.01
+    )
+
+
+@pytest.mark.parametrize(
+    "condition, expected",
+    [
+        ("v = 10", True),
+        ("v = 31", False),
+        ("v != 10", True),
+        ("v < 10", False),
+        ("v <= 10", True),
+        ("v > 30", False),
+        ("v >= 30", True),
+        ("v in (1, 40)", False),
+        ("v in (1, 20)", True),
+        ("v between 31 and 40", False),
+        ("v between 0 and 10", True),
+        ('v = "x"', True),
+    ],
+)
+def test_range_may_match(condition, expected):
+    assert range_may_match(10, 30, parse_condition(condition)) is expected
+
+
+def test_may_match_on_same_value_range():
+    assert not range_may_match(5, 5, parse_condition("v != 5"))
+    assert not ColumnStats().may_match(parse_condition("v = 1"))
+
+
+QUERIES = [
+    "select from t where v > 30",
+    "select from t where v < 10",
+    "select from t where v = 2",
+    "select from t where v between 20 and 25",
+    'select from t where name = "z"',
+    "select count(*) from t where v >= 31",
+]
+
+
+def _results(session: Session) -> list:
+    return [session.execute(query).rows for query in QUERIES]
+
+
+@pytest.mark.parametrize("analyze", [False, True])
+def test_pruning_after_update_and_delete_matches_full_scan(
+    tmp_path, monkeypatch, analyze
+):
+    monkeypatch.chdir(tmp_path)
+    set_auto_confirm(True)
+    session = Session(echo=False)
+    try:
+        session.execute("create_table t name:str v:int")
+        for i in range(10, 31):
+            session.execute(f'insert into t values ("n{i}", {i})')
+        if analyze:
+            session.execute("analyze t")
+            explain = session.execute("explain select from t where v > 30").output
+            assert "пустой результат" in explain
+
+        session.execute("update t set v = 40 where v = 30")
+        session.execute('update t set v = 2, name = "z" where v = 10')
+        session.execute("delete from t where v = 20")
+        session.execute('insert into t values ("n5", 5)')
+        if analyze:
+            explain = session.execute("explain select from t where v > 30").output
+            assert "пустой результат" not in explain
+            explain = session.execute("explain select from t where v > 40").output
+            assert "пустой результат" in explain
+        results = _results(session)
+    finally:
+        session.close()
+        set_auto_confirm(False)
+
+    assert results[0] == [{"ID": 21, "name": "n30", "v": 40}]
+    assert [row["v"] for row in results[1]] == [2, 5]
+    assert results[2] == results[4] == [{"ID": 1, "name": "z", "v": 2}]
+    assert [row["v"] for row in results[3]] == [21, 22, 23, 24, 25]
+    assert results[5] == [{"count(*)": 1}]
+
+
+def test_stats_from_before_other_process_write_are_not_used(database, session):
+    database("create_table t v:int\ninsert into t values (1)\nanalyze t\nexit\n")
+    out = session.send("select from t where v > 1\nmark", "'mark'")
+    assert "| 2  | 5 |" not in out
+    database("insert into t values (5)\nexit\n")
+    out = session.send("select from t where v > 1\nmark", "'mark'")
+    assert "| 2  | 5 |" in out
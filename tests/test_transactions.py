@@ -0,0 +1,22 @@
+def test_commit_aborts_after_concurrent_write(database, tmp_path, session):
+    database("create_table t v:int\ninsert into t values (1)\nexit\n")
+    session.send("begin", "Транзакция начата.")
+    session.send("insert into t values (2)", "ID=2")
+
+    out = database("insert into t values (3)\nexit\n").stdout
+    assert 'Запись с ID=2 успешно добавлена в таблицу "t".' in out
+
+    out = session.send("commit", "Транзакция")
+    assert 'таблицы "t" изменены другим процессом' in out
+    session.send("exit", "Выход из программы...")
+
+    out = database("select from t\nexit\n").stdout
+    assert "| 2  | 3 |" in out
+    assert "| 2  | 2 |" not in out
+
+
+def test_commit_without_concurrent_write(database):
+    database("create_table t v:int\nexit\n")
+    out = database("begin\ninsert into t values (1)\ncommit\nselect from t\nexit\n")
+    assert "Транзакция зафиксирована. Изменено таблиц: 1." in out.stdout
+    assert "| 1  | 1 |" in out.stdout